@@ -4,6 +4,8 @@ Comprehensive Data Analysis Script for CSV files
 Analyzes products, marketing, and reviews data
 """
 
+import argparse
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -11,12 +13,49 @@ from collections import Counter
 import warnings
 warnings.filterwarnings('ignore')
 
+from lookups import ProductLookup, key_integrity, pre_launch_mask
+from dedup import count_duplicates
+from grouped import group_share
+from quick_look import print_quick_look, stream_quick_look
+from profiling import add_profile_argument, start_profiler
+from report_tables import brand_performance, channel_efficiency, platform_bias
+from sales_data import SALES_PATH, sales_available
+
+parser = argparse.ArgumentParser(description="Comprehensive data analysis report")
+parser.add_argument('--approx', action='store_true',
+                    help="single-pass sketch-based quick look with error bounds (for huge inputs)")
+parser.add_argument('--chunksize', type=int, default=100_000,
+                    help="rows per chunk in --approx mode")
+add_profile_argument(parser)
+args = parser.parse_args()
+profiler = start_profiler(args.profile)
+
 print("=" * 80)
 print("COMPREHENSIVE DATA ANALYSIS REPORT")
 print("=" * 80)
 print()
 
+if args.approx:
+    profiler.section("quick look")
+    print_quick_look("REVIEWS", stream_quick_look(
+        'reviews.csv', numeric=['rating'], distinct=['comment', 'product_id', 'platform'],
+        heavy=['comment', 'product_id'], chunksize=args.chunksize
+    ))
+    print_quick_look("PRODUCTS", stream_quick_look(
+        'products.csv', numeric=['base_price'], distinct=['brand', 'type'], chunksize=args.chunksize
+    ), bins=0)
+    if sales_available():
+        print_quick_look("SALES", stream_quick_look(
+            SALES_PATH, numeric=['avg_price', 'units_sold', 'revenue'],
+            distinct=['transaction_id', 'product_id', 'region'],
+            heavy=['product_id', 'channel'], chunksize=args.chunksize
+        ))
+    else:
+        print(f"\n{SALES_PATH} not available (Git LFS pointer) - skipped")
+    sys.exit(0)
+
 # Load all datasets
+profiler.section("load")
 print("Loading datasets...")
 products = pd.read_csv('products.csv')
 marketing = pd.read_csv('marketing.csv')
@@ -34,6 +73,7 @@ marketing['end_date'] = pd.to_datetime(marketing['end_date'])
 reviews['date'] = pd.to_datetime(reviews['date'])
 
 TODAY = datetime(2025, 11, 3)  # Current date from environment
+product_lookup = ProductLookup(products)
 
 print("=" * 80)
 print("1. DATA QUALITY ISSUES")
@@ -41,6 +81,7 @@ print("=" * 80)
 print()
 
 # Check for future dates
+profiler.section("future dates")
 print("🔍 TEMPORAL ANOMALIES (Future Dates):")
 print("-" * 80)
 
@@ -58,25 +99,34 @@ if len(future_reviews) > 0:
         print(f"   - {row['review_id']}: {row['product_id']} on {row['date'].date()}")
 
 # Check for reviews before product launch
+profiler.section("pre-launch reviews")
 print("\n🚨 Reviews BEFORE Product Launch:")
 print("-" * 80)
-merged = reviews.merge(products[['product_id', 'launch_date']], on='product_id', how='left')
-invalid_reviews = merged[merged['date'] < merged['launch_date']]
+review_codes = product_lookup.codes(reviews['product_id'])
+invalid_mask = pre_launch_mask(reviews, 'date', product_lookup, review_codes)
+invalid_reviews = reviews[invalid_mask].assign(
+    launch_date=product_lookup.launch_dates(review_codes[invalid_mask])
+)
 print(f"Found {len(invalid_reviews)} reviews before product launch date!")
 if len(invalid_reviews) > 0:
     for _, row in invalid_reviews.head(10).iterrows():
         print(f"   - {row['review_id']}: {row['product_id']} reviewed on {row['date'].date()}, launched on {row['launch_date'].date()}")
 
 # Check for marketing campaigns before product launch
+profiler.section("pre-launch campaigns")
 print("\n🚨 Marketing Campaigns BEFORE Product Launch:")
 print("-" * 80)
-mkt_merged = marketing.merge(products[['product_id', 'launch_date']], on='product_id', how='left')
-invalid_campaigns = mkt_merged[mkt_merged['start_date'] < mkt_merged['launch_date']]
+campaign_codes = product_lookup.codes(marketing['product_id'])
+invalid_mask = pre_launch_mask(marketing, 'start_date', product_lookup, campaign_codes)
+invalid_campaigns = marketing[invalid_mask].assign(
+    launch_date=product_lookup.launch_dates(campaign_codes[invalid_mask])
+)
 print(f"Found {len(invalid_campaigns)} campaigns before product launch!")
 if len(invalid_campaigns) > 0:
     for _, row in invalid_campaigns.head(10).iterrows():
         print(f"   - {row['campaign_id']}: {row['product_id']} campaign on {row['start_date'].date()}, product launched on {row['launch_date'].date()}")
 
+profiler.section("sentiment mismatches")
 print("\n🔍 SENTIMENT vs RATING vs COMMENT MISMATCHES:")
 print("-" * 80)
 
@@ -115,28 +165,30 @@ for word in positive_words:
         for _, row in sample.iterrows():
             print(f"   ⚠️  {row['review_id']}: Rating {row['rating']} ({row['sentiment']}) but comment: '{row['comment']}'")
 
+profiler.section("duplicates & missing")
 print("\n🔍 DUPLICATE & MISSING DATA:")
 print("-" * 80)
-print(f"Duplicate product IDs: {products['product_id'].duplicated().sum()}")
-print(f"Duplicate campaign IDs: {marketing['campaign_id'].duplicated().sum()}")
-print(f"Duplicate review IDs: {reviews['review_id'].duplicated().sum()}")
+print(f"Duplicate product IDs: {count_duplicates(products['product_id'])}")
+print(f"Duplicate campaign IDs: {count_duplicates(marketing['campaign_id'])}")
+print(f"Duplicate review IDs: {count_duplicates(reviews['review_id'])}")
 print(f"Reviews with missing comments: {reviews['comment'].isna().sum()}")
 print(f"Reviews with missing ratings: {reviews['rating'].isna().sum()}")
 
 # Check for orphaned records
+profiler.section("foreign keys")
 print("\n🔗 DATA INTEGRITY (Foreign Keys):")
 print("-" * 80)
-valid_products = set(products['product_id'])
-invalid_marketing = marketing[~marketing['product_id'].isin(valid_products)]
-invalid_reviews = reviews[~reviews['product_id'].isin(valid_products)]
-print(f"Marketing campaigns for non-existent products: {len(invalid_marketing)}")
-print(f"Reviews for non-existent products: {len(invalid_reviews)}")
+marketing_keys = key_integrity(marketing['product_id'], products['product_id'])
+review_keys = key_integrity(reviews['product_id'], products['product_id'])
+print(f"Marketing campaigns for non-existent products: {marketing_keys.orphan_rows}")
+print(f"Reviews for non-existent products: {review_keys.orphan_rows}")
 
 print("\n" + "=" * 80)
 print("2. STATISTICAL ANALYSIS")
 print("=" * 80)
 print()
 
+profiler.section("products overview")
 print("📊 PRODUCTS OVERVIEW:")
 print("-" * 80)
 print(f"Total products: {len(products)}")
@@ -149,6 +201,7 @@ print(products['type'].value_counts())
 print(f"\nPrice statistics:")
 print(products['base_price'].describe())
 
+profiler.section("marketing overview")
 print("\n📊 MARKETING ANALYSIS:")
 print("-" * 80)
 print(f"Total campaigns: {len(marketing)}")
@@ -163,6 +216,7 @@ print(marketing['engagement_rate'].describe())
 print(f"\nTop spending campaigns:")
 print(marketing.nlargest(5, 'spend_idr')[['campaign_id', 'product_id', 'spend_idr', 'channel', 'engagement_rate']])
 
+profiler.section("reviews overview")
 print("\n📊 REVIEWS ANALYSIS:")
 print("-" * 80)
 print(f"Total reviews: {len(reviews)}")
@@ -187,6 +241,7 @@ print("3. CROSS-DATASET INSIGHTS")
 print("=" * 80)
 print()
 
+profiler.section("marketing ROI")
 print("🔗 MARKETING ROI ANALYSIS:")
 print("-" * 80)
 # Calculate reviews per product during/after campaign period
@@ -201,13 +256,13 @@ for _, campaign in marketing.head(10).iterrows():
         avg_rating = campaign_reviews['rating'].mean()
         print(f"{campaign['campaign_id']} ({campaign['channel']}): {len(campaign_reviews)} reviews, avg rating {avg_rating:.2f}, engagement {campaign['engagement_rate']:.1%}, spend IDR {campaign['spend_idr']:,.0f}")
 
+profiler.section("product performance")
 print("\n📈 PRODUCT PERFORMANCE:")
 print("-" * 80)
-product_stats = reviews.groupby('product_id').agg({
-    'rating': ['mean', 'count'],
-    'sentiment': lambda x: (x == 'Positive').sum() / len(x)
-}).round(2)
-product_stats.columns = ['avg_rating', 'review_count', 'positive_ratio']
+product_stats = reviews.groupby('product_id')['rating'].agg(['mean', 'count'])
+product_stats.columns = ['avg_rating', 'review_count']
+product_stats['positive_ratio'] = group_share(reviews['product_id'], reviews['sentiment'], 'Positive')
+product_stats = product_stats.round(2)
 product_stats = product_stats.sort_values('avg_rating', ascending=False)
 
 # Merge with product info
@@ -223,30 +278,18 @@ for _, row in product_performance.tail(5).iterrows():
     if not pd.isna(row['avg_rating']):
         print(f"   {row['product_id']}: {row['product_name']} - {row['avg_rating']:.2f} avg rating ({row['review_count']:.0f} reviews)")
 
+profiler.section("brand performance")
 print("\n🎯 BRAND PERFORMANCE:")
 print("-" * 80)
-brand_reviews = reviews.merge(products[['product_id', 'brand']], on='product_id')
-brand_stats = brand_reviews.groupby('brand').agg({
-    'rating': ['mean', 'count'],
-    'sentiment': lambda x: (x == 'Positive').sum() / len(x) * 100
-}).round(2)
-brand_stats.columns = ['avg_rating', 'total_reviews', 'positive_pct']
-brand_stats = brand_stats.sort_values('avg_rating', ascending=False)
+brand_stats = brand_performance(reviews, products)
 print(brand_stats)
 
+profiler.section("marketing efficiency")
 print("\n💰 MARKETING EFFICIENCY:")
 print("-" * 80)
 # Cost per engagement point
-marketing['cost_per_engagement'] = marketing['spend_idr'] / (marketing['engagement_rate'] * 100)
-channel_efficiency = marketing.groupby('channel').agg({
-    'spend_idr': 'sum',
-    'engagement_rate': 'mean',
-    'campaign_id': 'count',
-    'cost_per_engagement': 'mean'
-}).round(2)
-channel_efficiency.columns = ['total_spend', 'avg_engagement', 'num_campaigns', 'avg_cost_per_engagement']
-channel_efficiency = channel_efficiency.sort_values('avg_engagement', ascending=False)
-print(channel_efficiency)
+channel_stats = channel_efficiency(marketing)
+print(channel_stats)
 
 print("\n" + "=" * 80)
 print("4. UNIQUE INSIGHTS & PATTERNS")
@@ -254,6 +297,7 @@ print("=" * 80)
 print()
 
 # Comment frequency analysis
+profiler.section("comment patterns")
 print("🗣️  REVIEW COMMENT PATTERNS:")
 print("-" * 80)
 comment_freq = Counter(reviews['comment'])
@@ -264,6 +308,7 @@ for comment, count in comment_freq.most_common(10):
     print(f"   '{comment}' - {count} times ({pct:.1f}%)")
 
 # Suspicious pattern: same comment with different sentiments
+profiler.section("contradictory comments")
 print("\n🚩 SAME COMMENT, DIFFERENT SENTIMENTS/RATINGS:")
 print("-" * 80)
 for comment, count in comment_freq.most_common(5):
@@ -275,13 +320,14 @@ for comment, count in comment_freq.most_common(5):
         print(f"  - Rating range: {subset['rating'].min():.1f} - {subset['rating'].max():.1f}")
 
 # Platform bias
+profiler.section("platform bias")
 print("\n📱 PLATFORM RATING BIAS:")
 print("-" * 80)
-platform_bias = reviews.groupby('platform')['rating'].agg(['mean', 'std', 'count']).round(2)
-platform_bias = platform_bias.sort_values('mean', ascending=False)
-print(platform_bias)
+platform_stats = platform_bias(reviews)
+print(platform_stats)
 
 # Temporal patterns
+profiler.section("temporal patterns")
 print("\n📅 TEMPORAL PATTERNS:")
 print("-" * 80)
 reviews['year'] = reviews['date'].dt.year
@@ -295,6 +341,7 @@ print("\nAverage rating by month:")
 print(monthly_avg_rating)
 
 # Campaign timing analysis
+profiler.section("campaign timing")
 print("\n⏰ CAMPAIGN TIMING:")
 print("-" * 80)
 marketing['start_month'] = marketing['start_date'].dt.month
@@ -308,6 +355,7 @@ print("5. SUMMARY OF CRITICAL FINDINGS")
 print("=" * 80)
 print()
 
+profiler.section("summary")
 print("🚨 CRITICAL DATA QUALITY ISSUES:")
 print("-" * 80)
 print(f"1. {len(future_reviews)} reviews are dated in the FUTURE (after Nov 3, 2025)")
@@ -322,7 +370,7 @@ print("\n💡 KEY BUSINESS INSIGHTS:")
 print("-" * 80)
 print(f"1. Total marketing spend: IDR {marketing['spend_idr'].sum():,.0f}")
 print(f"2. Average product rating: {reviews['rating'].mean():.2f}/5.0")
-print(f"3. Best performing channel: {channel_efficiency.index[0]} (engagement: {channel_efficiency.iloc[0]['avg_engagement']:.1%})")
+print(f"3. Best performing channel: {channel_stats.index[0]} (engagement: {channel_stats.iloc[0]['avg_engagement']:.1%})")
 print(f"4. Most reviewed product: {most_reviewed.index[0]} ({most_reviewed.iloc[0]} reviews)")
 print(f"5. Review platforms: {reviews['platform'].nunique()} different platforms")
 
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Reusable synthetic-data anomaly checks
+Each check is vectorized and returns a CheckResult(name, score, flagged, details)
+where score is in [0, 1] and higher means more suspicious; callers act on
+flagged rather than re-thresholding details.
+review_checks() derives the arrays several checks share (day numbers,
+weekdays, product codes) once; each check still makes its own pass over those
+arrays or its column (value_counts, bincount, ...). sales_checks() streams
+chunks, counting transaction IDs and rows per day out of core
+"""
+
+from collections import OrderedDict, namedtuple
+
+import pandas as pd
+import numpy as np
+
+from dedup import count_duplicates, parse_uuids
+from out_of_core import MEMORY_BUDGET, ExternalGroupBy
+from stat_tests import multinomial_test
+
+CheckResult = namedtuple('CheckResult', ['name', 'score', 'flagged', 'details'])
+
+
+def _clip01(x):
+    return float(min(1.0, max(0.0, x)))
+
+
+def sequential_ids(ids, prefix=''):
+    """IDs like R100000, R100001... with no gaps are a generator artifact"""
+    nums = ids.str.slice(len(prefix)).astype(np.int64).to_numpy()
+    steps = np.diff(nums)
+    non_sequential = int(np.count_nonzero(steps != 1))
+    details = {
+        'min': int(nums.min()),
+        'max': int(nums.max()),
+        'expected': int(nums.max() - nums.min() + 1),
+        'count': len(nums),
+        'non_sequential': non_sequential,
+    }
+    score = 1 - non_sequential / max(len(steps), 1)
+    return CheckResult('sequential_ids', _clip01(score), non_sequential == 0, details)
+
+
+def count_uniformity(counts, probs=None, alpha=0.05, n_resamples=10_000, seed=42,
+                     name='count_uniformity'):
+    """Category counts that sit closer to their expected shares than multinomial noise allows
+
+    Flagged when the Monte Carlo chi-square test's lower tail (p_lower, kept
+    in details['test']) is below alpha. probs (any non-negative weights)
+    defaults to equal shares; expected counts and the per-category noise std
+    sqrt(n p (1 - p)) follow them.
+    """
+    counts = pd.Series(counts)
+    n, k = counts.sum(), len(counts)
+    shares = np.full(k, 1 / k) if probs is None else np.asarray(probs, dtype=float) / np.sum(probs)
+    expected = pd.Series(n * shares, index=counts.index)
+    # Std of each category count under a fair multinomial draw
+    noise_std = pd.Series(np.sqrt(n * shares * (1 - shares)), index=counts.index)
+    test = multinomial_test(counts.to_numpy(), probs, n_resamples=n_resamples, seed=seed, name=name)
+    details = {
+        'counts': counts,
+        'expected': expected,
+        'std': counts.std(),
+        'noise_std': noise_std,
+        'max_deviation_pct': float(((counts - expected).abs() / expected).max() * 100),
+        'p_lower': test.p_lower,
+        'test': test,
+    }
+    return CheckResult(name, _clip01(1 - test.p_lower), test.p_lower < alpha, details)
+
+
+def decimal_granularity(values):
+    """Ratings spread over every tenth (x.0 .. x.9) suggest uniform random draws"""
+    values = np.asarray(values, dtype=float)
+    digits = np.round(values * 10) % 10
+    unique_digits = np.unique(digits)
+    details = {
+        'unique_values': list(np.unique(values)),
+        'decimal_count': int(np.count_nonzero(values % 1 != 0)),
+        'unique_digits': list(unique_digits),
+    }
+    return CheckResult('decimal_granularity', len(unique_digits) / 10,
+                       len(unique_digits) == 10, details)
+
+
+def daily_volume(day_numbers, min_cv=0.3):
+    """Per-day record counts that vary too little (coefficient of variation)"""
+    _, per_day = np.unique(day_numbers, return_counts=True)
+    return _volume_spread(per_day, min_cv)
+
+
+def _volume_spread(per_day, min_cv=0.3):
+    mean, std = per_day.mean(), per_day.std(ddof=1)
+    cv = std / mean
+    details = {'mean': mean, 'std': std, 'cv': cv, 'days': len(per_day)}
+    return CheckResult('daily_volume', _clip01(1 - cv / min_cv), cv < min_cv, details)
+
+
+def group_balance(codes, n_groups, expected=None, tolerance=0.1, name='group_balance'):
+    """Per-group record counts that are nearly identical"""
+    counts = np.bincount(codes[codes >= 0], minlength=n_groups)
+    counts = counts[counts > 0]
+    expected = counts.mean() if expected is None else expected
+    std = counts.std(ddof=1)
+    details = {'counts': counts, 'expected': expected, 'mean': counts.mean(), 'std': std,
+               'max': int(counts.max()), 'min': int(counts.min())}
+    limit = expected * tolerance
+    return CheckResult(name, _clip01(1 - std / limit) if limit else 0.0, std < limit, details)
+
+
+def group_mean_spread(codes, n_groups, values, min_std=0.2, name='group_mean_spread'):
+    """Per-group averages that barely differ from each other"""
+    known = codes >= 0
+    sizes = np.bincount(codes[known], minlength=n_groups)
+    sums = np.bincount(codes[known], weights=values[known], minlength=n_groups)
+    means = sums[sizes > 0] / sizes[sizes > 0]
+    std = means.std(ddof=1)
+    details = {'means': means, 'mean': means.mean(), 'std': std,
+               'min': means.min(), 'max': means.max()}
+    return CheckResult(name, _clip01(1 - std / min_std), std < min_std, details)
+
+
+def duplicate_ids(ids, name='duplicate_ids'):
+    """Repeated values in a column that should be unique"""
+    return _duplicate_share(count_duplicates(ids), len(ids), name)
+
+
+def _duplicate_share(duplicates, count, name):
+    details = {'duplicates': duplicates, 'count': count}
+    return CheckResult(name, _clip01(duplicates / max(count, 1) * 100), duplicates > 0, details)
+
+
+def negative_values(values, name='negative_values'):
+    """Values that must be >= 0 (e.g. days_since_launch)"""
+    values = np.asarray(values, dtype=float)
+    negative = values < 0
+    details = {'negative': int(negative.sum()), 'count': len(values),
+               'min': float(values.min()) if len(values) else np.nan}
+    return CheckResult(name, float(negative.mean()) if len(values) else 0.0,
+                       bool(negative.any()), details)
+
+
+def product_invariant(total, left, right, rtol=1e-6, atol=0.5, name='product_invariant'):
+    """Rows where total != left * right (e.g. revenue vs units_sold * avg_price)"""
+    total = np.asarray(total, dtype=float)
+    expected = np.asarray(left, dtype=float) * np.asarray(right, dtype=float)
+    bad = ~np.isclose(total, expected, rtol=rtol, atol=atol)
+    details = {'mismatched': int(bad.sum()), 'count': len(total),
+               'max_abs_error': float(np.abs(total - expected).max()) if len(total) else 0.0}
+    return CheckResult(name, float(bad.mean()) if len(total) else 0.0, bool(bad.any()), details)
+
+
+def review_checks(reviews, n_products=None):
+    """All review-table checks from one pass of derived arrays"""
+    dates = reviews['date']
+    day_numbers = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+    weekdays = (day_numbers + 3) % 7  # 1970-01-01 was a Thursday; 0 = Monday
+    product_codes, product_ids = pd.factorize(reviews['product_id'])
+    n_groups = len(product_ids)
+    expected = len(reviews) / (n_products or n_groups)
+
+    checks = OrderedDict()
+    checks['sequential_ids'] = sequential_ids(reviews['review_id'], 'R')
+    checks['platform_uniformity'] = count_uniformity(
+        reviews['platform'].value_counts(), name='platform_uniformity')
+    checks['decimal_granularity'] = decimal_granularity(reviews['rating'])
+    # Expected weekday shares follow how often each weekday occurs in the covered range
+    calendar = np.arange(day_numbers.min(), day_numbers.max() + 1)
+    weekday_share = np.bincount((calendar + 3) % 7, minlength=7)
+    checks['day_of_week_uniformity'] = count_uniformity(
+        pd.Series(np.bincount(weekdays, minlength=7)), weekday_share,
+        name='day_of_week_uniformity')
+    checks['daily_volume'] = daily_volume(day_numbers)
+    checks['product_balance'] = group_balance(
+        product_codes, n_groups, expected, name='product_balance')
+    checks['product_rating_spread'] = group_mean_spread(
+        product_codes, n_groups, reviews['rating'].to_numpy(dtype=float), name='product_rating_spread')
+    return checks
+
+
+def sales_checks(sales, rtol=1e-6, memory_budget=MEMORY_BUDGET):
+    """All sales-table checks (UUID duplicates, negative days_since_launch, revenue invariant)
+
+    sales is a DataFrame or an iterable of chunks (e.g. iter_sales()); UUIDs
+    and rows per day are counted with ExternalGroupBy, so memory follows
+    memory_budget. IDs that are not UUIDs (expected to be rare) are kept
+    and checked in memory.
+    """
+    chunks = [sales] if isinstance(sales, pd.DataFrame) else sales
+    uuids = ExternalGroupBy(['high', 'low'], ['rows'], memory_budget)
+    days = ExternalGroupBy(['day'], ['rows'], memory_budget)
+    other_ids, negatives, invariants = [], [], []
+    for chunk in chunks:
+        ids = chunk['transaction_id'].to_numpy(dtype=object)
+        words, valid = parse_uuids(ids)
+        uuids.add({'high': words[valid, 0].view(np.int64), 'low': words[valid, 1].view(np.int64),
+                   'rows': np.ones(int(valid.sum()))})
+        other_ids.append(ids[~valid])
+        negatives.append(negative_values(chunk['days_since_launch']).details)
+        invariants.append(product_invariant(chunk['revenue'], chunk['units_sold'], chunk['avg_price'],
+                                            rtol=rtol).details)
+        if 'date' in chunk:
+            day_numbers = chunk['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+            days.add({'day': day_numbers, 'rows': np.ones(len(day_numbers))})
+
+    # Every UUID group of n rows holds n - 1 repeats; other IDs never equal a UUID
+    per_id = uuids.result()['rows'].to_numpy()
+    other_ids = np.concatenate(other_ids) if other_ids else np.empty(0, dtype=object)
+    duplicates = int(per_id.sum()) - len(per_id) + count_duplicates(other_ids)
+    count = sum(part['count'] for part in negatives)
+
+    checks = OrderedDict()
+    checks['duplicate_transactions'] = _duplicate_share(duplicates, count, 'duplicate_transactions')
+    checks['negative_days_since_launch'] = _merged_share(
+        negatives, 'negative', 'negative_days_since_launch', 'min', np.min, np.nan)
+    checks['revenue_invariant'] = _merged_share(
+        invariants, 'mismatched', 'revenue_invariant', 'max_abs_error', np.max, 0.0)
+    if days.rows:
+        checks['daily_volume'] = _volume_spread(days.result()['rows'].to_numpy())
+    return checks
+
+
+def _merged_share(parts, key, name, extreme, reduce, empty):
+    """negative_values / product_invariant result from the details of each chunk"""
+    bad = sum(part[key] for part in parts)
+    count = sum(part['count'] for part in parts)
+    extremes = [part[extreme] for part in parts if part['count']]
+    details = {key: bad, 'count': count, extreme: float(reduce(extremes)) if extremes else empty}
+    return CheckResult(name, bad / count if count else 0.0, bad > 0, details)
+
+
+def print_checks(checks):
+    """One line per check: flag marker, name, score and headline details"""
+    for result in checks.values():
+        marker = '⚠️ ' if result.flagged else '✓ '
+        headline = {k: v for k, v in result.details.items() if np.isscalar(v)}
+        summary = ', '.join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                            for k, v in headline.items())
+        print(f"{marker} {result.name:28s} score {result.score:.2f}  ({summary})")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Product cannibalization around launches
+For every product launch, each earlier product sharing its type and/or brand is
+an incumbent. The incumbent's daily sales before and after the launch are
+compared against the rest of the catalog (to net out market-wide moves), and
+the two daily series are correlated over the post-launch window. All pairs are
+evaluated together on stacked windows, split into batches across processes
+"""
+
+import pandas as pd
+import numpy as np
+
+from campaign_lift import prefix_sums, window_sums
+from parallel import parallel_map
+
+
+def candidate_pairs(products, by=('type', 'brand')):
+    """(launched, incumbent) row pairs where the incumbent launched first and shares a key
+
+    `relation` names the shared keys, e.g. 'type+brand', 'type' or 'brand'.
+    """
+    launch = pd.to_datetime(products['launch_date']).to_numpy()
+    earlier = launch[None, :] < launch[:, None]
+    shared = np.zeros((len(by),) + earlier.shape, dtype=bool)
+    for k, column in enumerate(by):
+        codes, _ = pd.factorize(products[column])
+        shared[k] = (codes[:, None] == codes[None, :]) & (codes[:, None] >= 0)
+    launched, incumbent = np.nonzero(earlier & shared.any(axis=0))
+    # Bit k set when key k is shared; one label per bit pattern
+    pattern = (shared[:, launched, incumbent] << np.arange(len(by))[:, None]).sum(axis=0)
+    labels = np.array(['+'.join(c for k, c in enumerate(by) if bits >> k & 1)
+                       for bits in range(1 << len(by))], dtype=object)
+    return pd.DataFrame({'launched': launched, 'incumbent': incumbent, 'relation': labels[pattern]})
+
+
+def _row_corr(x, y):
+    """Pearson correlation of matching rows of x and y"""
+    x = x - x.mean(axis=1, keepdims=True)
+    y = y - y.mean(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (x * y).sum(axis=1) / np.sqrt((x * x).sum(axis=1) * (y * y).sum(axis=1))
+
+
+def _pair_batch(series, task):
+    """Post-launch daily correlation for one batch of pairs"""
+    launched, incumbent, starts, window = task
+    n_days = series.shape[1]
+    days = starts[:, None] + np.arange(window)
+    valid = (days >= 0) & (days < n_days)
+    days = np.clip(days, 0, n_days - 1)
+    x = np.where(valid, series[launched[:, None], days], np.nan)
+    y = np.where(valid, series[incumbent[:, None], days], np.nan)
+    corr = _row_corr(x, y)
+    # Windows that run past the data are unreliable
+    return np.where(valid.all(axis=1), corr, np.nan)
+
+
+def cannibalization(products, cube, window=30, by=('type', 'brand'), measure='units',
+                    batch_size=5_000, workers=None):
+    """One row per (launched, incumbent) pair with pre/post rates and substitution
+
+    incumbent_change_pct : incumbent daily sales after vs before the launch
+    market_change_pct    : same change for all other products (the control)
+    excess_change_pct    : incumbent change beyond the market move
+    substitution         : incumbent volume lost beyond the market move, as a
+                           share of the new product's post-launch volume
+    post_corr            : correlation of the two daily series after launch
+    """
+    series = cube.series(measure)
+    prefix = prefix_sums(series)
+    total_prefix = prefix.sum(axis=0, keepdims=True)
+    catalog = products.set_index('product_id').loc[cube.product_ids]
+    pairs = candidate_pairs(catalog, by)
+    launched = pairs['launched'].to_numpy()
+    incumbent = pairs['incumbent'].to_numpy()
+    start = cube.day_index(catalog['launch_date'])[launched]
+
+    def rates(rows, table, lo, hi):
+        totals, days = window_sums(table, rows, lo, hi)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(days > 0, totals / days, np.nan)
+
+    zeros = np.zeros(len(pairs), dtype=np.int64)
+    inc_pre = rates(incumbent, prefix, start - window, start)
+    inc_post = rates(incumbent, prefix, start, start + window)
+    new_post = rates(launched, prefix, start, start + window)
+    # Market control: everything except the two products in the pair
+    new_pre = rates(launched, prefix, start - window, start)
+    market_pre = rates(zeros, total_prefix, start - window, start) - inc_pre - new_pre
+    market_post = rates(zeros, total_prefix, start, start + window) - inc_post - new_post
+
+    batches = range(0, len(pairs), batch_size)
+    tasks = [(launched[i:i + batch_size], incumbent[i:i + batch_size], start[i:i + batch_size], window)
+             for i in batches]
+    post_corr = np.concatenate(parallel_map(_pair_batch, tasks, workers, shared=series) or [np.empty(0)])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        market_change = market_post / market_pre - 1
+        expected_post = inc_pre * (1 + market_change)
+        result = pd.DataFrame({
+            'launched': cube.product_ids[launched],
+            'incumbent': cube.product_ids[incumbent],
+            'relation': pairs['relation'],
+            'launch_date': pd.Timestamp(cube.start) + pd.to_timedelta(start, unit='D'),
+            'incumbent_pre': inc_pre,
+            'incumbent_post': inc_post,
+            'launched_post': new_post,
+            'incumbent_change_pct': (inc_post / inc_pre - 1) * 100,
+            'market_change_pct': market_change * 100,
+            'excess_change_pct': (inc_post / expected_post - 1) * 100,
+            'substitution': (expected_post - inc_post) / new_post,
+            'post_corr': post_corr,
+        })
+    return result
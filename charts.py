@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Columnar ASCII bar charts with batched output
+Charts take whole vectors of labels / values, compute bar lengths vectorized,
+support top-N truncation, and are written with one buffered write.
+The same charts can be exported to a static HTML/SVG page for sharing
+"""
+
+import html
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+Chart = namedtuple('Chart', ['title', 'labels', 'values', 'lengths', 'annotations', 'headers',
+                             'span', 'fill', 'omitted'])
+
+
+def bar_lengths(values, width=50, max_value=None):
+    """Bar length per value: int(value / max_value * width), max_value defaults to the max"""
+    values = np.asarray(values, dtype=float)
+    if max_value is None:
+        max_value = values.max() if len(values) else 1
+    if not max_value:
+        return np.zeros(len(values), dtype=int)
+    return np.nan_to_num(values / max_value * width).astype(int).clip(0, None)
+
+
+def bar_chart(labels, values, width=50, max_value=None, annotations=None, title=None,
+              headers=None, fill=None, top=None, span=None):
+    """Build a Chart from label / value vectors
+
+    Bars are int(value / max_value * width) long; `span` is the longest possible
+    bar (defaults to width) and sets the fill length and the HTML scale.
+    annotations: text after each bar (may contain newlines for detail lines)
+    headers:     optional text printed before each bar line
+    fill:        character padding bars out to `width` (e.g. '░' for progress bars)
+    top:         keep only the first N rows
+    """
+    labels = [str(label) for label in labels]
+    values = np.asarray(values, dtype=float)
+    annotations = [''] * len(labels) if annotations is None else list(annotations)
+    headers = None if headers is None else list(headers)
+    omitted = 0
+    if top is not None and len(labels) > top:
+        omitted = len(labels) - top
+        labels, values, annotations = labels[:top], values[:top], annotations[:top]
+        headers = None if headers is None else headers[:top]
+    lengths = bar_lengths(values, width, max_value)
+    return Chart(title, labels, values, lengths, annotations, headers,
+                 width if span is None else span, fill, omitted)
+
+
+def render_lines(chart, bar_char='█', underline=True):
+    """Text lines for a chart (title first when set)"""
+    lines = [] if chart.title is None else [chart.title] + (["-" * 80] if underline else [])
+    bars = np.char.multiply(bar_char, chart.lengths)
+    if chart.fill:
+        bars = np.char.add(bars, np.char.multiply(chart.fill, np.maximum(chart.span - chart.lengths, 0)))
+    headers = chart.headers or [None] * len(chart.labels)
+    for header, label, bar, note in zip(headers, chart.labels, bars, chart.annotations):
+        if header is not None:
+            lines.append(header)
+        lines.append(f"{label}: {bar} {note}" if note else f"{label}: {bar}")
+    if chart.omitted:
+        lines.append(f"... {chart.omitted:,} more not shown")
+    return lines
+
+
+def write_chart(chart, out=None, leading_newline=True, underline=True):
+    """Render and emit a chart with a single write"""
+    out = sys.stdout if out is None else out
+    text = '\n'.join(render_lines(chart, underline=underline)) + '\n'
+    out.write(('\n' + text) if leading_newline and chart.title else text)
+
+
+def to_html(charts, path, title="Key Findings - Visual Summary"):
+    """Write charts as one static HTML page with inline SVG bars"""
+    row_h, label_w, bar_w = 22, 260, 400
+    parts = [
+        "<!DOCTYPE html>",
+        f"<html><head><meta charset='utf-8'><title>{html.escape(title)}</title>",
+        "<style>body{font-family:sans-serif;margin:2em}svg text{font-size:12px}</style>",
+        f"</head><body><h1>{html.escape(title)}</h1>",
+    ]
+    for chart in charts:
+        n = len(chart.labels)
+        if chart.title:
+            parts.append(f"<h2>{html.escape(chart.title.strip())}</h2>")
+        parts.append(f"<svg width='{label_w + bar_w + 320}' height='{row_h * n + 4}'>")
+        scale = bar_w / max(chart.span, 1)
+        for i, (label, length, note) in enumerate(zip(chart.labels, chart.lengths, chart.annotations)):
+            y = i * row_h
+            note = note.split('\n')[0]
+            parts.append(
+                f"<text x='0' y='{y + 15}'>{html.escape(label.strip())}</text>"
+                f"<rect x='{label_w}' y='{y + 3}' width='{length * scale:.1f}' height='{row_h - 6}'"
+                f" fill='#4c78a8'/>"
+                f"<text x='{label_w + length * scale + 6:.1f}' y='{y + 15}'>{html.escape(note)}</text>"
+            )
+        parts.append("</svg>")
+    parts.append("</body></html>")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(parts))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Correlation / ROI matrix engine
+Builds the product x feature matrix (price, size, marketing, reviews, sales) from
+per-product aggregates, computes every pairwise correlation with a single matrix
+product, and attaches bootstrap confidence intervals computed in parallel batches
+"""
+
+from functools import partial
+
+import pandas as pd
+import numpy as np
+
+from lookups import ProductLookup
+from parallel import batch_sizes, parallel_map, spawn_seeds
+
+
+def _per_product(codes, n, weights=None):
+    known = codes >= 0
+    w = None if weights is None else np.asarray(weights, dtype=float)[known]
+    return np.bincount(codes[known], weights=w, minlength=n)
+
+
+def product_feature_matrix(products, marketing, reviews, sales_totals=None):
+    """One row per product: price, size_ml, marketing, review and (optional) sales aggregates"""
+    lookup = ProductLookup(products)
+    n = len(lookup.product_ids)
+
+    mkt_codes = lookup.codes(marketing['product_id'])
+    campaigns = _per_product(mkt_codes, n)
+    review_codes = lookup.codes(reviews['product_id'])
+    review_count = _per_product(review_codes, n)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        features = pd.DataFrame({
+            'price': products['base_price'].to_numpy(dtype=float),
+            'size_ml': products['size_ml'].to_numpy(dtype=float),
+            'marketing_spend': _per_product(mkt_codes, n, marketing['spend_idr']),
+            'avg_engagement': _per_product(mkt_codes, n, marketing['engagement_rate']) / campaigns,
+            'num_campaigns': campaigns,
+            'review_count': review_count,
+            'avg_rating': _per_product(review_codes, n, reviews['rating']) / review_count,
+        }, index=lookup.product_ids)
+    if sales_totals is not None:
+        features = features.join(sales_totals)
+    return features
+
+
+def _pairwise_corr(X):
+    """Pairwise-complete Pearson correlation of the columns of X (..., n, p)
+
+    Missing values are handled per pair like DataFrame.corr(). All sums come
+    from one (batched) matrix product [Z, Z**2, M]^T @ [Z, M].
+    """
+    M = ~np.isnan(X)
+    # Centre each column first to keep the sums well conditioned
+    counts = M.sum(axis=-2, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(M, X, 0).sum(axis=-2, keepdims=True) / counts
+    Z = np.where(M, X - means, 0.0)
+    Mf = M.astype(float)
+    p = X.shape[-1]
+
+    G = np.swapaxes(np.concatenate([Z, Z * Z, Mf], axis=-1), -1, -2) @ np.concatenate([Z, Mf], axis=-1)
+    P = G[..., :p, :p]           # sum z_i z_j over rows valid for both
+    S1 = G[..., :p, p:]          # sum z_i over rows valid for both
+    S2 = G[..., p:2 * p, p:]     # sum z_i^2 over rows valid for both
+    N = G[..., 2 * p:, p:]       # rows valid for both
+
+    S1T = np.swapaxes(S1, -1, -2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = P - S1 * S1T / N
+        var_i = S2 - S1 * S1 / N
+        var_j = np.swapaxes(var_i, -1, -2)
+        corr = cov / np.sqrt(var_i * var_j)
+    corr = np.where(N >= 2, corr, np.nan)
+    return np.clip(corr, -1, 1)
+
+
+def correlation_matrix(features):
+    """All pairwise correlations of a feature frame as a labelled DataFrame"""
+    X = features.to_numpy(dtype=float)
+    return pd.DataFrame(_pairwise_corr(X), index=features.columns, columns=features.columns)
+
+
+def _bootstrap_batch(X, task):
+    size, seed = task
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(X), size=(size, len(X)))
+    return _pairwise_corr(X[idx])
+
+
+def bootstrap_correlations(features, n_resamples=2000, confidence=0.95, seed=0,
+                           batch_size=250, workers=None):
+    """Percentile bootstrap CI for every pairwise correlation
+
+    Resamples are drawn in vectorized batches (one batched matmul per batch),
+    each with its own spawned seed, and batches are spread across processes.
+    """
+    X = features.to_numpy(dtype=float)
+    sizes = batch_sizes(n_resamples, batch_size)
+    tasks = list(zip(sizes, spawn_seeds(seed, len(sizes))))
+    draws = np.concatenate(parallel_map(partial(_bootstrap_batch, X), tasks, workers))
+    alpha = (1 - confidence) / 2
+    lower, upper = np.nanquantile(draws, [alpha, 1 - alpha], axis=0)
+    labels = dict(index=features.columns, columns=features.columns)
+    return pd.DataFrame(lower, **labels), pd.DataFrame(upper, **labels)
+
+
+def campaign_roi(marketing):
+    """Per-campaign cost per engagement point (IDR per 1% engagement)"""
+    return marketing['spend_idr'] / (marketing['engagement_rate'] * 100)
+
+
+def roi_matrix(marketing, rows='channel', cols=None):
+    """Spend, mean engagement and cost per engagement point on a rows x cols grid
+
+    cols defaults to the campaign start year-month (the time axis).
+    """
+    col_keys = marketing['start_date'].dt.to_period('M') if cols is None else marketing[cols]
+    r_codes, r_labels = pd.factorize(marketing[rows], sort=True)
+    c_codes, c_labels = pd.factorize(col_keys, sort=True)
+    flat = r_codes * len(c_labels) + c_codes
+    shape = (len(r_labels), len(c_labels))
+
+    def grid(weights=None):
+        return np.bincount(flat, weights=weights, minlength=shape[0] * shape[1]).reshape(shape)
+
+    n = grid()
+    spend = grid(marketing['spend_idr'].to_numpy(dtype=float))
+    engagement = grid(marketing['engagement_rate'].to_numpy(dtype=float))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_engagement = np.where(n > 0, engagement / n, np.nan)
+        cost = np.where(n > 0, spend / (avg_engagement * 100), np.nan)
+    labels = dict(index=pd.Index(r_labels, name=rows), columns=pd.Index(c_labels, name=cols or 'month'))
+    return {
+        'spend': pd.DataFrame(spend, **labels),
+        'avg_engagement': pd.DataFrame(avg_engagement, **labels),
+        'cost_per_engagement': pd.DataFrame(cost, **labels),
+    }
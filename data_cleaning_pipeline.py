@@ -4,16 +4,33 @@ Data Cleaning Pipeline for Competition Submission
 Systematically cleans the synthetic dataset while documenting all decisions
 """
 
+import argparse
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from lookups import ProductLookup, after_launch_mask, pre_launch_mask, take
+from features import (
+    attach_features, dimension_codes, fill_missing, gather_frame,
+    marketing_features, product_attributes, review_metrics
+)
+from sales_data import SALES_PATH, sales_available
+from profiling import add_profile_argument, start_profiler
+from sales_validation import REJECT_PATH, WARNINGS, validate_sales
+
+parser = argparse.ArgumentParser(description="Clean the raw datasets into *_cleaned.csv")
+add_profile_argument(parser)
+args = parser.parse_args()
+profiler = start_profiler(args.profile)
+
 print("=" * 80)
 print("DATA CLEANING PIPELINE FOR COMPETITION")
 print("=" * 80)
 print()
 
 # Load original data
+profiler.section("load")
 print("Loading original datasets...")
 products = pd.read_csv('products.csv')
 marketing = pd.read_csv('marketing.csv')
@@ -27,6 +44,9 @@ reviews['date'] = pd.to_datetime(reviews['date'])
 
 TODAY = datetime(2025, 11, 3)
 
+# product_id -> launch_date / base_price / brand arrays, shared by every stage
+product_lookup = ProductLookup(products)
+
 print(f"Original sizes:")
 print(f"  Products: {len(products)}")
 print(f"  Marketing: {len(marketing)}")
@@ -44,6 +64,7 @@ print()
 # ============================================================================
 # STEP 1: Temporal Cleaning
 # ============================================================================
+profiler.section("STEP 1: temporal cleaning")
 print("STEP 1: Temporal Integrity Cleaning")
 print("-" * 80)
 
@@ -54,32 +75,21 @@ reviews_clean = reviews[reviews['date'] <= TODAY].copy()
 cleaning_log.append(f"Removed {len(future_reviews)} future-dated reviews")
 
 # Remove reviews before product launch
-reviews_with_launch = reviews_clean.merge(
-    products[['product_id', 'launch_date']],
-    on='product_id',
-    how='left'
-)
-pre_launch = reviews_with_launch[reviews_with_launch['date'] < reviews_with_launch['launch_date']]
-print(f"Removing {len(pre_launch)} reviews before product launch dates")
-reviews_clean = reviews_with_launch[
-    reviews_with_launch['date'] >= reviews_with_launch['launch_date']
-].drop('launch_date', axis=1).copy()
-cleaning_log.append(f"Removed {len(pre_launch)} pre-launch reviews")
+review_codes = product_lookup.codes(reviews_clean['product_id'])
+pre_launch = pre_launch_mask(reviews_clean, 'date', product_lookup, review_codes)
+print(f"Removing {pre_launch.sum()} reviews before product launch dates")
+keep = after_launch_mask(reviews_clean, 'date', product_lookup, review_codes)
+reviews_clean = reviews_clean[keep].reset_index(drop=True)
+review_codes = review_codes[keep]
+cleaning_log.append(f"Removed {pre_launch.sum()} pre-launch reviews")
 
 # Remove marketing campaigns before product launch
-marketing_with_launch = marketing.merge(
-    products[['product_id', 'launch_date']],
-    on='product_id',
-    how='left'
-)
-pre_launch_campaigns = marketing_with_launch[
-    marketing_with_launch['start_date'] < marketing_with_launch['launch_date']
-]
-print(f"Removing {len(pre_launch_campaigns)} campaigns before product launch")
-marketing_clean = marketing_with_launch[
-    marketing_with_launch['start_date'] >= marketing_with_launch['launch_date']
-].drop('launch_date', axis=1).copy()
-cleaning_log.append(f"Removed {len(pre_launch_campaigns)} pre-launch campaigns")
+campaign_codes = product_lookup.codes(marketing['product_id'])
+pre_launch_campaigns = pre_launch_mask(marketing, 'start_date', product_lookup, campaign_codes)
+print(f"Removing {pre_launch_campaigns.sum()} campaigns before product launch")
+keep = after_launch_mask(marketing, 'start_date', product_lookup, campaign_codes)
+marketing_clean = marketing[keep].reset_index(drop=True)
+cleaning_log.append(f"Removed {pre_launch_campaigns.sum()} pre-launch campaigns")
 
 print(f"✓ Temporal cleaning complete")
 print()
@@ -87,6 +97,7 @@ print()
 # ============================================================================
 # STEP 2: Sentiment Alignment
 # ============================================================================
+profiler.section("STEP 2: sentiment alignment")
 print("STEP 2: Sentiment Label Correction")
 print("-" * 80)
 
@@ -116,6 +127,7 @@ print()
 # ============================================================================
 # STEP 3: Comment Analysis & Flagging
 # ============================================================================
+profiler.section("STEP 3: comment templates")
 print("STEP 3: Comment Template Detection")
 print("-" * 80)
 
@@ -150,33 +162,36 @@ print()
 # ============================================================================
 # STEP 4: Feature Engineering
 # ============================================================================
+profiler.section("STEP 4: feature engineering")
 print("STEP 4: Feature Engineering")
 print("-" * 80)
 
+# Features are computed per product / per platform first and attached to the
+# review rows once at the end of STEP 6 (one gather, one concat)
+new_features = {}
+
 # Product features
 print("Adding product features...")
-reviews_clean = reviews_clean.merge(
-    products[['product_id', 'brand', 'type', 'base_price', 'launch_date']],
-    on='product_id',
-    how='left'
-)
+product_dim = product_attributes(products)
+product_codes = dimension_codes(product_dim.index, product_lookup, review_codes)
+new_features.update(gather_frame(product_dim, product_codes, ['brand', 'type', 'base_price', 'launch_date']))
 
 # Age features
-reviews_clean['product_age_days'] = (reviews_clean['date'] - reviews_clean['launch_date']).dt.days
-reviews_clean['review_year'] = reviews_clean['date'].dt.year
-reviews_clean['review_month'] = reviews_clean['date'].dt.month
-reviews_clean['review_day_of_week'] = reviews_clean['date'].dt.dayofweek
+review_dates = reviews_clean['date']
+new_features['product_age_days'] = pd.TimedeltaIndex(
+    review_dates.to_numpy() - new_features['launch_date']
+).days.to_numpy()
+new_features['review_year'] = review_dates.dt.year.to_numpy()
+new_features['review_month'] = review_dates.dt.month.to_numpy()
+new_features['review_day_of_week'] = review_dates.dt.dayofweek.to_numpy()
 
 # Price tier
-reviews_clean['price_tier'] = pd.cut(
-    reviews_clean['base_price'],
-    bins=[0, 25000, 35000, 50000],
-    labels=['low', 'medium', 'high']
-)
+new_features.update(gather_frame(product_dim, product_codes, ['price_tier']))
 
 # Platform features (check for platform bias)
 platform_avg_rating = reviews_clean.groupby('platform')['rating'].mean()
-reviews_clean['platform_avg_rating'] = reviews_clean['platform'].map(platform_avg_rating)
+platform_codes = platform_avg_rating.index.get_indexer(reviews_clean['platform'])
+new_features['platform_avg_rating'] = take(platform_avg_rating.to_numpy(), platform_codes)
 
 print(f"✓ Added {7} new features")
 print()
@@ -184,41 +199,18 @@ print()
 # ============================================================================
 # STEP 5: Marketing Features
 # ============================================================================
+profiler.section("STEP 5: marketing features")
 print("STEP 5: Marketing Feature Engineering")
 print("-" * 80)
 
-# Aggregate marketing data per product
-marketing_agg = marketing_clean.groupby('product_id').agg({
-    'spend_idr': 'sum',
-    'engagement_rate': 'mean',
-    'campaign_id': 'count'
-}).rename(columns={
-    'spend_idr': 'total_marketing_spend',
-    'engagement_rate': 'avg_engagement_rate',
-    'campaign_id': 'num_campaigns'
-})
-
-# Add channel diversity
-channel_diversity = marketing_clean.groupby('product_id')['channel'].nunique()
-marketing_agg['channel_diversity'] = channel_diversity
-
-# Most used channel
-most_used_channel = marketing_clean.groupby('product_id')['channel'].agg(
-    lambda x: x.value_counts().index[0] if len(x) > 0 else 'none'
-)
-marketing_agg['primary_channel'] = most_used_channel
-
-# Merge marketing features into reviews
-reviews_clean = reviews_clean.merge(
-    marketing_agg,
-    on='product_id',
-    how='left'
-)
+# Aggregate marketing data per product (spend, engagement, campaigns, channels)
+marketing_agg = marketing_features(marketing_clean)
+marketing_codes = dimension_codes(marketing_agg.index, product_lookup, review_codes)
+new_features.update(gather_frame(marketing_agg, marketing_codes))
 
 # Fill NaN for products with no marketing
-reviews_clean['total_marketing_spend'] = reviews_clean['total_marketing_spend'].fillna(0)
-reviews_clean['num_campaigns'] = reviews_clean['num_campaigns'].fillna(0)
-reviews_clean['channel_diversity'] = reviews_clean['channel_diversity'].fillna(0)
+for col in ['total_marketing_spend', 'num_campaigns', 'channel_diversity']:
+    new_features[col] = fill_missing(new_features[col], 0)
 
 print(f"✓ Added {5} marketing features")
 print()
@@ -226,34 +218,48 @@ print()
 # ============================================================================
 # STEP 6: Aggregate Product Metrics
 # ============================================================================
+profiler.section("STEP 6: product metrics")
 print("STEP 6: Creating Product Performance Metrics")
 print("-" * 80)
 
-product_metrics = reviews_clean.groupby('product_id').agg({
-    'rating': ['mean', 'std', 'count'],
-    'sentiment': lambda x: (x == 'Positive').sum() / len(x),
-    'is_template': 'mean'
-}).round(3)
-
-product_metrics.columns = [
-    'avg_rating', 'rating_std', 'review_count',
-    'positive_ratio', 'template_ratio'
-]
-
-# Add to reviews
-reviews_clean = reviews_clean.merge(
-    product_metrics[['avg_rating', 'positive_ratio']],
-    on='product_id',
-    how='left',
-    suffixes=('', '_product')
-)
+product_metrics = review_metrics(reviews_clean)
+metric_codes = dimension_codes(product_metrics.index, product_lookup, review_codes)
+new_features.update(gather_frame(product_metrics, metric_codes, ['avg_rating', 'positive_ratio']))
+
+# Attach every engineered feature to the reviews in one pass
+reviews_clean = attach_features(reviews_clean, new_features)
 
 print(f"✓ Added product-level aggregates")
 print()
 
 # ============================================================================
-# STEP 7: Save Cleaned Data
+# STEP 7: Sales Validation
+# ============================================================================
+profiler.section("STEP 7: sales validation")
+print("STEP 7: Sales Row Validation")
+print("-" * 80)
+
+if sales_available():
+    # Row rules run chunk by chunk; failing rows go to a gzip reject file
+    started = time.perf_counter()
+    sales_validator = validate_sales(product_lookup, chunksize=250_000)
+    elapsed = time.perf_counter() - started
+    for reason, count in sales_validator.counts.items():
+        if count:
+            print(f"  {reason:28s}: {count:,} rows" + (" (warning, kept)" if reason in WARNINGS else ""))
+    print(f"Rejected {sales_validator.rejected:,} of {sales_validator.rows:,} sales rows → {REJECT_PATH}")
+    # Whole stage: CSV parsing, the row rules and writing the reject file
+    print(f"Validated at {sales_validator.rows / max(elapsed, 1e-9):,.0f} rows/s")
+    cleaning_log.append(f"Flagged {sales_validator.rejected} sales rows failing validation ({REJECT_PATH})")
+    print(f"✓ Sales validation complete")
+else:
+    print(f"{SALES_PATH} not available (Git LFS pointer) - skipped")
+print()
+
+# ============================================================================
+# STEP 8: Save Cleaned Data
 # ============================================================================
+profiler.section("STEP 8: save")
 print("=" * 80)
 print("SAVING CLEANED DATASETS")
 print("=" * 80)
@@ -270,8 +276,9 @@ print(f"✓ Saved products_cleaned.csv ({len(products)} records)")
 print()
 
 # ============================================================================
-# STEP 8: Cleaning Summary Report
+# STEP 9: Cleaning Summary Report
 # ============================================================================
+profiler.section("STEP 9: summary")
 print("=" * 80)
 print("CLEANING SUMMARY")
 print("=" * 80)
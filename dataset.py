@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Lazy, notebook-friendly access to the datasets
+Dataset().sales is a query over a columnar copy of sales.csv (sales_store/:
+one .npy per column, rows sorted by product then date). filter() narrows the
+rows by product and date through the store's per-product offsets and binary
+search on the date column before any values are read, and a query only loads
+the columns it uses (memory-mapped), e.g.
+
+    ds = Dataset()
+    ds.sales.filter(product='PC001', date=('2024-01-01', '2024-03-31')).agg({'revenue': 'sum'})
+
+reads one product's quarter of the date and revenue columns. agg() streams
+the selection through out_of_core.ExternalGroupBy in row chunks, so grouped
+sums / counts / means / extremes stay within $SALES_MEMORY_BUDGET. The store is
+rebuilt whenever sales.csv changes. products / marketing / reviews are small
+and are read (with parsed dates) on first use
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import numpy as np
+
+from lookups import key_integrity
+from out_of_core import MEMORY_BUDGET, ExternalGroupBy, parse_bytes
+from quality_metrics import file_signature
+from sales_data import SALES_PATH, iter_sales, sales_available
+
+STORE_PATH = 'sales_store'
+STORE_VERSION = 1
+# Stored as int32 codes into the label lists kept in meta.json
+CATEGORICAL = ['product_id', 'region', 'channel']
+DATE_COLUMNS = {'products': ['launch_date'], 'marketing': ['start_date', 'end_date'], 'reviews': ['date']}
+NO_DAY = np.iinfo(np.int64).min  # NaT as int64 days, sorts first in every product block
+CHUNK_ROWS = 250_000
+# agg() funcs built from per-group partial sums / extremes; others load the selection
+STREAMED = {'sum', 'count', 'size', 'mean', 'min', 'max'}
+
+
+def _encode(values, labels):
+    """Codes of values in the grow-only labels list (-1 for missing)"""
+    codes, uniques = pd.factorize(values)
+    known = pd.Index(labels).get_indexer(uniques)
+    labels.extend(uniques[known < 0])
+    # Trailing -1 so missing values (code -1) map to -1
+    mapping = np.append(pd.Index(labels).get_indexer(uniques), -1)
+    return mapping[codes].astype(np.int32)
+
+
+def _column(chunk, col, labels):
+    if col in CATEGORICAL:
+        return _encode(chunk[col], labels[col])
+    if col == 'date':
+        return pd.to_datetime(chunk[col], errors='coerce').to_numpy().astype('datetime64[D]')
+    if pd.api.types.is_numeric_dtype(chunk[col]):
+        return chunk[col].to_numpy()
+    values = chunk[col].fillna('').to_numpy(dtype=str)
+    try:
+        return values.astype('S')
+    except UnicodeEncodeError:
+        return values
+
+
+def build_store(path=SALES_PATH, store=STORE_PATH, chunksize=250_000):
+    """Write the columnar copy of sales.csv, replacing any previous store"""
+    signature = file_signature(path)
+    labels = {col: [] for col in CATEGORICAL}
+    parts = {}
+    for chunk in iter_sales(path, chunksize):
+        for col in chunk.columns:
+            parts.setdefault(col, []).append(_column(chunk, col, labels))
+    columns = {col: np.concatenate(chunks) for col, chunks in parts.items()}
+    n_rows = len(columns['product_id'])
+    for col in CATEGORICAL:
+        # Sorted labels, so grouping on codes orders groups like grouping the strings
+        order = np.argsort(np.asarray(labels[col], dtype=object), kind='stable')
+        rank = np.empty(len(order) + 1, dtype=np.int32)
+        rank[order], rank[-1] = np.arange(len(order)), -1
+        columns[col] = rank[columns[col]]
+        labels[col] = [labels[col][i] for i in order]
+
+    products = columns['product_id']
+    # Stable, so rows of one product and day keep their file order
+    order = np.lexsort((columns['date'].view(np.int64), products))
+    offsets = np.searchsorted(products[order], np.arange(-1, len(labels['product_id']) + 1))
+    meta = {
+        'version': STORE_VERSION, 'signature': signature, 'rows': int(n_rows),
+        'columns': list(columns), 'labels': {col: [str(v) for v in labels[col]] for col in CATEGORICAL},
+        'counts': {col: np.bincount(columns[col][columns[col] >= 0], minlength=len(labels[col])).tolist()
+                   for col in CATEGORICAL},
+        'missing': {col: int((columns[col] < 0).sum()) for col in CATEGORICAL},
+        'offsets': offsets.tolist(),
+    }
+
+    parent = os.path.dirname(os.path.abspath(store))
+    tmp = tempfile.mkdtemp(prefix='.sales_store.', dir=parent)
+    try:
+        np.save(os.path.join(tmp, '_row.npy'), order)
+        for col, values in columns.items():
+            np.save(os.path.join(tmp, f'{col}.npy'), values[order])
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        if os.path.exists(store):
+            shutil.rmtree(store)
+        os.replace(tmp, store)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return SalesStore(store)
+
+
+class SalesStore:
+    """Read side of sales_store/: metadata plus memory-mapped columns"""
+
+    def __init__(self, root=STORE_PATH):
+        self.root = root
+        with open(os.path.join(root, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.columns = self.meta['columns']
+        self.labels = {col: pd.Index(labels) for col, labels in self.meta['labels'].items()}
+        self.offsets = np.asarray(self.meta['offsets'], dtype=np.int64)
+        self.rows = self.meta['rows']
+
+    def column(self, name):
+        return np.load(os.path.join(self.root, f'{name}.npy'), mmap_mode='r')
+
+    def days(self):
+        """Date column as int64 days (NaT -> NO_DAY)"""
+        return self.column('date').view(np.int64)
+
+
+def open_store(path=SALES_PATH, store=STORE_PATH, chunksize=250_000):
+    """SalesStore for path, (re)built first if missing or written from another file version"""
+    if os.path.exists(os.path.join(store, 'meta.json')):
+        current = SalesStore(store)
+        if current.meta['version'] == STORE_VERSION and current.meta['signature'] == file_signature(path):
+            return current
+    return build_store(path, store, chunksize)
+
+
+def _day(value):
+    return None if value is None else int(pd.Timestamp(value).to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+
+def _as_list(values):
+    return [values] if isinstance(values, str) or not np.iterable(values) else list(values)
+
+
+def _split_ranges(ranges, rows):
+    """(starts, ends) pieces of non-empty row ranges, each covering at most `rows` rows"""
+    starts, ends = ranges
+    before = np.concatenate([[0], np.cumsum(ends - starts)])
+    for lo in range(0, int(before[-1]), rows):
+        hi = min(lo + rows, int(before[-1]))
+        first = np.searchsorted(before, lo, side='right') - 1
+        last = np.searchsorted(before, hi, side='left')
+        yield (starts[first:last] + np.maximum(lo - before[first:last], 0),
+               ends[first:last] - np.maximum(before[first + 1:last + 1] - hi, 0))
+
+
+def _dates(days):
+    """int64 days (NO_DAY -> NaT) as datetime64[ns]"""
+    return np.asarray(days, dtype=np.int64).view('datetime64[D]').astype('datetime64[ns]')
+
+
+class SalesQuery:
+    """Immutable, chainable selection of sales rows and columns
+
+    filter() and select() return new queries; nothing is read until a
+    terminal method (to_pandas, head, count, agg, keys, value_counts,
+    date_range). Rows come back in store order (product, then date); the
+    index is the row's position in sales.csv, so sort_index() restores file
+    order.
+    """
+
+    def __init__(self, store, products=None, days=(None, None), where=(), columns=None):
+        self.store = store
+        self.products = products
+        self.days = days
+        self.where = where
+        self.columns = columns
+
+    def _replace(self, **changes):
+        state = {'products': self.products, 'days': self.days, 'where': self.where, 'columns': self.columns}
+        state.update(changes)
+        return SalesQuery(self.store, **state)
+
+    def filter(self, product=None, date=None, region=None, channel=None):
+        """Rows matching every given condition (and those of earlier filters)
+
+        product / region / channel take one value or a list; date takes one
+        day or an inclusive (start, end) pair, either end may be None.
+        """
+        query = self
+        if product is not None:
+            codes = self.store.labels['product_id'].get_indexer(_as_list(product))
+            codes = set(codes[codes >= 0].tolist())
+            query = query._replace(products=codes if self.products is None else self.products & codes)
+        if date is not None:
+            if isinstance(date, slice):
+                date = (date.start, date.stop)
+            first, last = (date if isinstance(date, (tuple, list)) else (date, date))
+            lo, hi = _day(first), _day(last)
+            old_lo, old_hi = query.days
+            lo = lo if old_lo is None else old_lo if lo is None else max(lo, old_lo)
+            hi = hi if old_hi is None else old_hi if hi is None else min(hi, old_hi)
+            query = query._replace(days=(lo, hi))
+        for col, values in (('region', region), ('channel', channel)):
+            if values is not None:
+                codes = self.store.labels[col].get_indexer(_as_list(values))
+                query = query._replace(where=query.where + ((col, codes[codes >= 0]),))
+        return query
+
+    def select(self, *columns):
+        """Query returning only these columns"""
+        unknown = set(columns) - set(self.store.columns)
+        if unknown:
+            raise KeyError(f"unknown sales columns: {sorted(unknown)}")
+        return self._replace(columns=list(columns))
+
+    def _ranges(self):
+        """(starts, ends) row ranges left after the product and date filters"""
+        offsets = self.store.offsets
+        if self.products is None:
+            blocks = np.arange(len(offsets) - 1)
+        else:
+            blocks = np.asarray(sorted(self.products), dtype=np.int64) + 1
+        starts, ends = offsets[blocks], offsets[blocks + 1]
+        lo, hi = self.days
+        if lo is not None or hi is not None:
+            days = self.store.days()
+            lo = NO_DAY + 1 if lo is None else lo
+            for i, (start, end) in enumerate(zip(starts, ends)):
+                block = days[start:end]
+                starts[i] = start + np.searchsorted(block, lo, side='left')
+                ends[i] = start + (len(block) if hi is None else np.searchsorted(block, hi, side='right'))
+        keep = ends > starts
+        return starts[keep], ends[keep]
+
+    def _read(self, name, ranges):
+        values = self.store.column(name)
+        starts, ends = ranges
+        if len(starts) == 1:
+            return np.array(values[starts[0]:ends[0]])
+        return np.concatenate([values[s:e] for s, e in zip(starts, ends)]) if len(starts) else values[:0]
+
+    def _mask(self, ranges):
+        mask = None
+        for col, codes in self.where:
+            matched = np.isin(self._read(col, ranges), codes)
+            mask = matched if mask is None else mask & matched
+        return mask
+
+    def _decode(self, name, values):
+        if name in CATEGORICAL:
+            return pd.Categorical.from_codes(values, categories=self.store.labels[name])
+        if values.dtype.kind == 'M':
+            return values.astype('datetime64[ns]')
+        if values.dtype.kind == 'S':
+            values = pd.Series(values.astype(str))
+            return values.mask(values == '').to_numpy()
+        return values
+
+    def to_pandas(self, columns=None, ranges=None):
+        """DataFrame of the selected rows; product_id / region / channel as categoricals"""
+        columns = columns or self.columns or self.store.columns
+        ranges = self._ranges() if ranges is None else ranges
+        mask = self._mask(ranges)
+        data = {}
+        for name in ['_row'] + [c for c in columns if c != '_row']:
+            values = self._read(name, ranges)
+            data[name] = values if mask is None else values[mask]
+        index = pd.Index(data.pop('_row'))
+        return pd.DataFrame({name: self._decode(name, values) for name, values in data.items()}, index=index)
+
+    def head(self, n=5):
+        """First n rows in store order, reading only those rows when no mask filter is set"""
+        if self.where:
+            return self.to_pandas().head(n)
+        starts, ends = self._ranges()
+        taken = np.minimum(np.cumsum(ends - starts), n)
+        return self.to_pandas(ranges=(starts, starts + np.diff(taken, prepend=0)))
+
+    def count(self):
+        ranges = self._ranges()
+        mask = self._mask(ranges)
+        return int((ranges[1] - ranges[0]).sum()) if mask is None else int(mask.sum())
+
+    def __len__(self):
+        return self.count()
+
+    def agg(self, spec=None, by=None, freq=None, memory_budget=MEMORY_BUDGET, **named):
+        """Aggregate the selection, optionally grouped
+
+        spec is {column: func or [funcs]}, or use named aggregations
+        (total=('revenue', 'sum')). by takes column names; with freq (a
+        pandas offset such as 'W', 'MS', 'ME') dates are binned like
+        resample / pd.Grouper. Without by, returns a Series.
+
+        sum / count / size / mean / min / max of numeric columns (min / max
+        of date, count / size of any column), grouped by categorical, date or
+        integer columns, run out of core within memory_budget; any other
+        aggregation loads the selected columns into memory.
+        """
+        by = [] if by is None else _as_list(by)
+        if freq and 'date' not in by:
+            by.append('date')
+        for col, funcs in (spec or {}).items():
+            for func in _as_list(funcs):
+                name = col if not isinstance(funcs, (list, tuple)) else f'{col}_{func}'
+                named[name] = (col, func)
+        if not named:
+            raise ValueError("agg() needs a spec or named aggregations")
+        for name, value in named.items():
+            if not (isinstance(value, tuple) and len(value) == 2 and isinstance(value[0], str)):
+                raise TypeError(f"agg() named aggregation {name}={value!r} must be a (column, func) "
+                                f"tuple, e.g. {name}=('revenue', 'sum'); use spec for {{column: func}}")
+        if self._streamable(by, named):
+            return self._external_agg(by, freq, named, memory_budget)
+        needed = list(dict.fromkeys(by + [col for col, _ in named.values()]))
+        frame = self.to_pandas(needed)
+        if not by:
+            return pd.Series({name: frame[col].agg(func) for name, (col, func) in named.items()})
+        keys = [pd.Grouper(key='date', freq=freq) if col == 'date' and freq else col for col in by]
+        result = frame.groupby(keys, observed=True).agg(**named).reset_index()
+        for col in by:
+            if isinstance(result[col].dtype, pd.CategoricalDtype):
+                result[col] = result[col].astype(result[col].cat.categories.dtype)
+        return result
+
+    def _kind(self, name):
+        """'category', 'date', 'int', 'float' or 'text' for a store column"""
+        if name in CATEGORICAL:
+            return 'category'
+        kind = self.store.column(name).dtype.kind
+        return {'M': 'date', 'i': 'int', 'u': 'int', 'f': 'float'}.get(kind, 'text')
+
+    def _key_codes(self, name, values):
+        """(int64 keys, missing mask) of a by column"""
+        if self._kind(name) == 'date':
+            days = values.view(np.int64)
+            return days, days == NO_DAY
+        codes = values.astype(np.int64)
+        return codes, (codes < 0 if name in CATEGORICAL else np.zeros(len(codes), dtype=bool))
+
+    def _key_values(self, name, keys):
+        """by column values back from int64 keys"""
+        kind = self._kind(name)
+        if kind == 'category':
+            return self.store.labels[name].take(keys)
+        return _dates(keys) if kind == 'date' else keys.astype(self.store.column(name).dtype)
+
+    def _present(self, name, values):
+        """Rows of a column that count() counts"""
+        kind = self._kind(name)
+        if kind == 'category':
+            return values >= 0
+        if kind == 'date':
+            return values.view(np.int64) != NO_DAY
+        if kind == 'text':
+            return values != values.dtype.type()
+        return ~np.isnan(values) if kind == 'float' else np.ones(len(values), dtype=bool)
+
+    def _numbers(self, name, values):
+        """A numeric or date column as float64 (dates as days), NaN where missing"""
+        if self._kind(name) != 'date':
+            return values.astype(np.float64)
+        days = values.view(np.int64)
+        return np.where(days == NO_DAY, np.nan, days.astype(np.float64))
+
+    def _restore(self, name, func, values):
+        """A finished partial column in the dtype pandas would give func over this column"""
+        if func in ('count', 'size'):
+            return values.astype(np.int64)
+        kind = self._kind(name)
+        if func in ('min', 'max') and kind == 'date':
+            return pd.Series(_dates(values.fillna(NO_DAY).to_numpy()), index=values.index)
+        if kind == 'int' and func in ('sum', 'min', 'max') and not values.isna().any():
+            return values.astype(np.int64 if func == 'sum' else self.store.column(name).dtype)
+        return values
+
+    def _streamable(self, by, named):
+        """Whether agg() can run out of core (see STREAMED)"""
+        if set(by + [col for col, _ in named.values()]) - set(self.store.columns) or set(by) & set(named):
+            return False
+        if any(self._kind(col) in ('float', 'text') for col in by):
+            return False
+        for col, func in named.values():
+            kind = self._kind(col)
+            if not isinstance(func, str) or func not in STREAMED:
+                return False
+            if func not in ('count', 'size') and (kind in ('category', 'text')
+                                                  or kind == 'date' and func not in ('min', 'max')):
+                return False
+        return True
+
+    def _external_agg(self, by, freq, named, memory_budget):
+        """agg() from partial sums, counts and extremes per group (ExternalGroupBy)"""
+        # (column, partial) -> value column; mean = sum / count, size counts rows
+        parts = {}
+        for col, func in named.values():
+            for part in {'mean': ('sum', 'count'), 'size': ('size',)}.get(func, (func,)):
+                parts.setdefault((None if part == 'size' else col, part), f'_{len(parts)}')
+        how = {name: part if part in ('min', 'max') else 'sum' for (_, part), name in parts.items()}
+        keys = by or ['_all']
+        groups = ExternalGroupBy(keys, list(how), memory_budget, how=how)
+        columns = list(dict.fromkeys(by + [col for col, _ in parts if col is not None]))
+        rows = max(1, min(CHUNK_ROWS, parse_bytes(memory_budget) // 8 // (8 * (len(columns) + 1))))
+        for piece in _split_ranges(self._ranges(), rows):
+            mask = self._mask(piece)
+            raw = {name: self._read(name, piece) for name in columns}
+            if mask is not None:
+                raw = {name: values[mask] for name, values in raw.items()}
+            n = int((piece[1] - piece[0]).sum()) if mask is None else int(mask.sum())
+            chunk = {} if by else {'_all': np.zeros(n, dtype=np.int64)}
+            known = np.ones(n, dtype=bool)
+            # Rows with a missing key drop out, as in groupby()
+            for col in by:
+                chunk[col], missing = self._key_codes(col, raw[col])
+                known &= ~missing
+            for (col, part), name in parts.items():
+                if part == 'size':
+                    chunk[name] = np.ones(n)
+                elif part == 'count':
+                    chunk[name] = self._present(col, raw[col]).astype(float)
+                else:
+                    chunk[name] = self._numbers(col, raw[col])
+            groups.add({name: values[known] for name, values in chunk.items()})
+
+        result = groups.result()
+        if not by:
+            empty = {name: [np.nan if kind in ('min', 'max') else 0.0] for name, kind in how.items()}
+            result = result if len(result) else pd.DataFrame(empty)
+        for col in by:
+            result[col] = self._key_values(col, result[col].to_numpy())
+        if freq:
+            keys = [pd.Grouper(key='date', freq=freq) if col == 'date' else col for col in by]
+            result = result.groupby(keys).agg(how).reset_index()
+
+        out = {col: result[col] for col in by}
+        for name, (col, func) in named.items():
+            if func == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    values = result[parts[col, 'sum']] / result[parts[col, 'count']]
+            else:
+                values = result[parts[None if func == 'size' else col, func]]
+            out[name] = self._restore(col, func, values)
+        if not by:
+            return pd.Series({name: values.iloc[0] for name, values in out.items()})
+        return pd.DataFrame(out).reset_index(drop=True)
+
+    def keys(self, column='product_id'):
+        """Distinct values of a categorical column within the selection"""
+        counts = self.value_counts(column)
+        return list(counts.index[counts > 0])
+
+    def value_counts(self, column='product_id'):
+        """Rows per label of a categorical column (store label order)"""
+        labels = self.store.labels[column]
+        if self.products is None and self.days == (None, None) and not self.where:
+            counts = self.store.meta['counts'][column]
+        else:
+            ranges = self._ranges()
+            codes = self._read(column, ranges)
+            mask = self._mask(ranges)
+            codes = codes if mask is None else codes[mask]
+            counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        return pd.Series(counts, index=labels, name='count')
+
+    def date_range(self):
+        """(first, last) date in the selection, NaT dates ignored"""
+        dates = pd.Series(self.to_pandas(['date'])['date'])
+        return dates.min(), dates.max()
+
+
+class Dataset:
+    """products / marketing / reviews DataFrames plus the lazy sales query
+
+    cleaned=True reads the *_cleaned.csv outputs of data_cleaning_pipeline.py
+    instead of the raw files.
+    """
+
+    def __init__(self, root='.', cleaned=False, store=None):
+        self.root = root
+        self.suffix = '_cleaned' if cleaned else ''
+        self.store_path = store or os.path.join(root, STORE_PATH)
+        self.tables = {}
+        self._store = None
+
+    def _table(self, name):
+        if name not in self.tables:
+            self.tables[name] = pd.read_csv(os.path.join(self.root, f'{name}{self.suffix}.csv'),
+                                            parse_dates=DATE_COLUMNS[name])
+        return self.tables[name]
+
+    @property
+    def products(self):
+        return self._table('products')
+
+    @property
+    def marketing(self):
+        return self._table('marketing')
+
+    @property
+    def reviews(self):
+        return self._table('reviews')
+
+    @property
+    def sales_path(self):
+        return os.path.join(self.root, SALES_PATH)
+
+    @property
+    def sales(self):
+        if self._store is None:
+            if not sales_available(self.sales_path):
+                raise FileNotFoundError(f"{self.sales_path} not available (Git LFS pointer)")
+            self._store = open_store(self.sales_path, self.store_path)
+        return SalesQuery(self._store)
+
+    def key_integrity(self, table, column='product_id'):
+        """lookups.key_integrity of table[column] against products.product_id"""
+        master = self.products['product_id']
+        if table != 'sales':
+            return key_integrity(self._table(table)[column], master)
+        store = self.sales.store
+        labels = list(store.labels[column]) + [np.nan]
+        counts = store.meta['counts'][column] + [store.meta['missing'][column]]
+        return key_integrity(labels, master, counts)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Duplicate detection for ID columns over fixed-width integer keys
+IDs become rows of uint64 words: UUIDs parse to their 128 bits (two words),
+other IDs are packed from their raw bytes. UUIDs compare by value, so two IDs
+that differ only in hex case are the same ID (pandas would compare the text). Duplicates are found by
+sorting a 64-bit hash of the words and checking only hash-equal rows exactly,
+so the result matches pandas duplicated() while holding ~24 bytes per row
+instead of a Python string. DuplicateTracker does the same across chunks, and
+PartitionedDuplicates spills hash partitions to disk for inputs larger than RAM
+"""
+
+import os
+import tempfile
+
+import pandas as pd
+import numpy as np
+
+_UUID_HEX = np.r_[0:8, 9:13, 14:18, 19:23, 24:36]
+_UUID_DASH = [8, 13, 18, 23]
+_NIBBLE_SHIFTS = np.arange(60, -1, -4, dtype=np.uint64)
+
+
+def parse_uuids(values):
+    """(n, 2) uint64 words for canonical UUID strings (either hex case), plus a validity mask"""
+    try:
+        raw = np.asarray(values, dtype='S37').view(np.uint8).reshape(len(values), 37)
+    except UnicodeEncodeError:
+        return np.zeros((len(values), 2), dtype=np.uint64), np.zeros(len(values), dtype=bool)
+    # Hex digits to nibbles with byte arithmetic: '0'-'9' -> 0-9, 'a'-'f' / 'A'-'F' -> 10-15
+    nibbles = raw.take(_UUID_HEX, axis=1)
+    nibbles -= np.uint8(ord('0'))
+    letter = nibbles > 9
+    # Upper case to lower: 'A'-'F' sit 0x20 below 'a'-'f'; no other byte lands on them
+    nibbles |= letter.view(np.uint8) << np.uint8(5)
+    # Per-row checks read the 32 flag bytes as 4 words instead of reducing 32 columns
+    bad = (letter & (nibbles - np.uint8(ord('a') - ord('0')) > 5)).view(np.uint64)
+    valid = (bad[:, 0] | bad[:, 1] | bad[:, 2] | bad[:, 3]) == 0
+    for col in _UUID_DASH:
+        valid &= raw[:, col] == ord('-')
+    valid &= raw[:, 36] == 0
+    nibbles -= letter.view(np.uint8) * np.uint8(ord('a') - ord('0') - 10)
+    # Pair nibbles into the 16 bytes and read them as two big-endian words
+    packed = (nibbles[:, 0::2] << 4) | (nibbles[:, 1::2] & 0xF)
+    return packed.view('>u8').astype(np.uint64), valid
+
+
+def format_uuids(words):
+    """Canonical (lowercase) UUID strings back from (n, 2) words"""
+    nibbles = (words[:, :, None] >> _NIBBLE_SHIFTS) & np.uint64(0xF)
+    text = np.full((len(words), 36), ord('-'), dtype=np.uint8)
+    text[:, _UUID_HEX] = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)[nibbles.reshape(len(words), 32)]
+    return text.view('S36').ravel().astype(str)
+
+
+def _packed_bytes(values):
+    """Raw bytes of each ID, null-padded to a multiple of 8 and viewed as uint64 words"""
+    series = pd.Series(values, dtype=object)
+    try:
+        raw = np.asarray(series.to_numpy(dtype=str), dtype='S')
+    except UnicodeEncodeError:
+        raw = np.asarray(series.astype(str).str.encode('utf-8').to_numpy(), dtype='S')
+    width = max(8, -(-raw.dtype.itemsize // 8) * 8)
+    return raw.astype(f'S{width}').view(np.uint64).reshape(len(values), width // 8)
+
+
+def _pad(words, width):
+    """Widen packed-byte words with null words (the same IDs, longer layout)"""
+    if words.shape[1] >= width:
+        return words
+    return np.concatenate([words, np.zeros((len(words), width - words.shape[1]), dtype=np.uint64)], axis=1)
+
+
+def id_words(values):
+    """Exact fixed-width key per ID: UUID bits when every value is a UUID, else raw bytes
+
+    Missing values get an extra marker word so they equal each other (as in
+    pandas) but no real ID.
+    """
+    values = np.asarray(values, dtype=object)
+    missing = pd.isna(values)
+    present = np.where(missing, '', values) if missing.any() else values
+    words, valid = parse_uuids(present)
+    if not np.all(valid | missing):
+        words = _packed_bytes(present)
+    if missing.any():
+        words = np.column_stack([words, missing.astype(np.uint64)])
+    return words
+
+
+def hash_words(words):
+    """64-bit mix of each row of words"""
+    key = np.zeros(len(words), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in words.T:
+            key = (key ^ column) * np.uint64(0x9E3779B97F4A7C15)
+            key ^= key >> np.uint64(29)
+        key = (key ^ (key >> np.uint64(31))) * np.uint64(0xBF58476D1CE4E5B9)
+    return key ^ (key >> np.uint64(32))
+
+
+def _exact_repeats(words, positions):
+    """Of rows sharing a hash, those equal to an earlier row (by position)"""
+    columns = [words[:, k] for k in range(words.shape[1] - 1, -1, -1)]
+    order = np.lexsort([positions] + columns)
+    ordered = words[order]
+    same = (ordered[1:] == ordered[:-1]).all(axis=1)
+    return positions[order][1:][same]
+
+
+def duplicated_words(words, hashes=None, order=None):
+    """Like Series.duplicated(keep='first') over rows of words (order: argsort of hashes)"""
+    n = len(words)
+    hashes = hash_words(words) if hashes is None else hashes
+    order = np.argsort(hashes) if order is None else order
+    equal = hashes[order][1:] == hashes[order][:-1]
+    shared = np.zeros(n, dtype=bool)
+    shared[1:] |= equal
+    shared[:-1] |= equal
+    candidates = np.sort(order[shared])
+    result = np.zeros(n, dtype=bool)
+    if len(candidates):
+        result[_exact_repeats(words[candidates], candidates)] = True
+    return result
+
+
+def duplicated(values):
+    """Boolean mask of repeated IDs (later occurrences), like Series.duplicated()"""
+    return duplicated_words(id_words(values))
+
+
+def count_duplicates(values):
+    return int(duplicated(values).sum())
+
+
+def _merge_runs(first, second):
+    """Two (hashes, words) runs sorted by hash as one sorted run, without re-sorting"""
+    (hashes1, words1), (hashes2, words2) = first, second
+    # Final position of each second-run row: its insert point plus the rows before it
+    at = np.searchsorted(hashes1, hashes2) + np.arange(len(hashes2))
+    rest = np.ones(len(hashes1) + len(hashes2), dtype=bool)
+    rest[at] = False
+    hashes = np.empty(len(rest), dtype=np.uint64)
+    words = np.empty((len(rest), words1.shape[1]), dtype=np.uint64)
+    hashes[at], hashes[rest] = hashes2, hashes1
+    words[at], words[rest] = words2, words1
+    return hashes, words
+
+
+class DuplicateTracker:
+    """Finds repeated IDs across a stream of chunks
+
+    Keeps the hashes and words of every distinct ID seen so far as a few
+    hash-sorted runs whose sizes at least double from newest to oldest: a
+    chunk is checked with binary search plus an exact word comparison in each
+    run, and its new IDs become the newest run, merged (linearly) into older
+    runs no larger than it. Each ID is copied O(log n) times in total rather
+    than once per chunk. Stays on UUID words while every ID is a UUID and
+    re-keys to packed bytes otherwise.
+    """
+
+    def __init__(self):
+        self.runs = []
+        self.uuid = True
+        self.seen_missing = False
+
+    def _rekey(self, convert):
+        """Re-hash every stored run after converting its words"""
+        runs = []
+        for _, words in self.runs:
+            words = convert(words)
+            hashes = hash_words(words)
+            order = np.argsort(hashes)
+            runs.append((hashes[order], words[order]))
+        self.runs = runs
+
+    def _keys(self, values):
+        """Words for values in the tracker's layout, converting the stored keys if needed"""
+        words, valid = parse_uuids(values)
+        if self.uuid and valid.all():
+            return words
+        if self.uuid:
+            self.uuid = False
+            self._rekey(lambda words: _packed_bytes(format_uuids(words)))
+        words = _packed_bytes(values)
+        width = max([words.shape[1]] + [stored.shape[1] for _, stored in self.runs])
+        if any(stored.shape[1] < width for _, stored in self.runs):
+            self._rekey(lambda stored: _pad(stored, width))
+        return _pad(words, width)
+
+    def update(self, values, parsed=None):
+        """Mask of rows in this chunk whose ID already appeared (here or earlier)
+
+        parsed is parse_uuids(values) when the caller already has it.
+        """
+        values = np.asarray(values, dtype=object)
+        words, valid = parse_uuids(values) if parsed is None else parsed
+        if self.uuid and valid.all():
+            # Every ID is a UUID, so none is missing
+            return self._update(words)
+        missing = pd.isna(values)
+        if not missing.any():
+            return self._update(self._keys(values))
+        # Missing IDs repeat each other, as in pandas
+        repeated = np.ones(len(values), dtype=bool)
+        repeated[np.flatnonzero(missing)[0]] = self.seen_missing
+        self.seen_missing = True
+        repeated[~missing] = self._update(self._keys(values[~missing]))
+        return repeated
+
+    def _update(self, words):
+        hashes = hash_words(words)
+        order = np.argsort(hashes)
+        repeated = duplicated_words(words, hashes, order)
+
+        # Sorted probes walk each run's hashes in order (far fewer cache misses)
+        probes = hashes[order]
+        for stored_hashes, stored_words in self.runs:
+            left = np.searchsorted(stored_hashes, probes)
+            at = np.minimum(left, len(stored_hashes) - 1)
+            hit = np.flatnonzero(stored_hashes[at] == probes)
+            rows = order[hit]
+            repeated[rows] |= (stored_words[at[hit]] == words[rows]).all(axis=1)
+            # Hash collisions with several stored IDs are vanishingly rare
+            after = np.minimum(at[hit] + 1, len(stored_hashes) - 1)
+            for k in np.flatnonzero((after > at[hit]) & (stored_hashes[after] == probes[hit])):
+                i, start = rows[k], at[hit][k]
+                stop = np.searchsorted(stored_hashes, probes[hit][k], side='right')
+                repeated[i] |= bool((stored_words[start:stop] == words[i]).all(axis=1).any())
+
+        fresh = ~repeated[order]
+        if fresh.any():
+            self.runs.append((probes[fresh], words[order[fresh]]))
+            while len(self.runs) > 1 and len(self.runs[-2][0]) <= 2 * len(self.runs[-1][0]):
+                self.runs[-2:] = [_merge_runs(*self.runs[-2:])]
+        return repeated
+
+
+def fits_in_memory(n_bytes, fraction=0.25):
+    """Whether n_bytes is under `fraction` of physical memory (True if unknown)"""
+    try:
+        total = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return True
+    return n_bytes <= total * fraction
+
+
+class PartitionedDuplicates:
+    """External (out-of-core) duplicate detection for ID streams larger than RAM
+
+    add() hash-partitions each chunk's keys (words, hash, row number) into
+    per-partition spill files; finish() deduplicates one partition at a time,
+    so peak memory is about one partition. The key layout is fixed by the
+    first chunk: UUID words, else packed bytes at least min_width bytes wide.
+    IDs that do not fit it (a non-UUID after UUID chunks, an ID longer than the
+    width) are skipped and reported by add() rather than failing the stream.
+    """
+
+    def __init__(self, partitions=16, tmpdir=None, min_width=32):
+        self.bits = max(1, int(np.ceil(np.log2(partitions))))
+        self.workdir = tempfile.TemporaryDirectory(dir=tmpdir)
+        self.paths = [os.path.join(self.workdir.name, f"part{p}.bin") for p in range(1 << self.bits)]
+        self.min_width = min_width
+        self.uuid = None
+        self.width = None
+        self.rows = 0
+
+    def _keys(self, values, parsed=None, keep=None):
+        """(words, keyed) for values: key words per row and whether the row is indexed"""
+        values = np.asarray(values, dtype=object)
+        missing = pd.isna(values)
+        present = np.where(missing, '', values) if missing.any() else values
+        words, valid = parse_uuids(present) if parsed is None else parsed
+        keep = np.ones(len(values), dtype=bool) if keep is None else np.asarray(keep, dtype=bool)
+        if self.uuid is None and keep.any():
+            self.uuid = bool(np.all(valid | missing | ~keep))
+        if self.uuid is not False:
+            keyed = keep & (valid | missing)
+            words = np.where(missing[:, None], np.uint64(0), words)
+        else:
+            lengths = pd.Series(present, dtype=object).astype(str).str.encode('utf-8').str.len().to_numpy()
+            if self.width is None:
+                self.width = max(-(-int(lengths[keep].max(initial=0)) // 8), -(-self.min_width // 8))
+            keyed = keep & (lengths <= 8 * self.width)
+            words = _pad(_packed_bytes(np.where(keyed, present, '')), self.width)
+        # Marker word: missing IDs equal each other but no real ID
+        return np.column_stack([words, missing.astype(np.uint64)]), keyed
+
+    def add(self, values, parsed=None, keep=None):
+        """Spill one chunk of IDs; returns the mask of rows not indexed
+
+        parsed is parse_uuids(values) when the caller already has it; rows
+        outside the keep mask are numbered but not indexed.
+        """
+        words, keyed = self._keys(values, parsed, keep)
+        rows = np.arange(self.rows, self.rows + len(words), dtype=np.uint64)
+        self.rows += len(words)
+        words, rows = words[keyed], rows[keyed]
+        hashes = hash_words(words)
+        records = np.column_stack([words, hashes, rows])
+        part = (hashes >> np.uint64(64 - self.bits)).astype(np.int64)
+        # Stable, so each partition keeps rows in ascending order
+        order = np.argsort(part, kind='stable')
+        bounds = np.searchsorted(part[order], np.arange(len(self.paths) + 1))
+        for p, path in enumerate(self.paths):
+            if bounds[p + 1] > bounds[p]:
+                with open(path, 'ab') as f:
+                    records[order[bounds[p]:bounds[p + 1]]].tofile(f)
+        return ~keyed
+
+    def _ids(self, words):
+        """Original ID strings (None when missing) back from stored words"""
+        if self.uuid:
+            ids = format_uuids(words[:, :2]).astype(object)
+        else:
+            raw = np.ascontiguousarray(words[:, :-1]).view(f'S{8 * (words.shape[1] - 1)}').ravel()
+            ids = np.array([value.decode('utf-8') for value in raw], dtype=object)
+        ids[words[:, -1] == 1] = None
+        return ids
+
+    def finish(self):
+        """(row numbers, IDs) of every repeated ID (later occurrences), by row"""
+        rows, words = [], []
+        try:
+            for path in self.paths:
+                if not os.path.exists(path):
+                    continue
+                width = 3 if self.uuid else self.width + 1
+                records = np.fromfile(path, dtype=np.uint64).reshape(-1, width + 2)
+                mask = duplicated_words(records[:, :width], records[:, width])
+                rows.append(records[mask, width + 1].astype(np.int64))
+                words.append(records[mask, :width])
+        finally:
+            self.workdir.cleanup()
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=object)
+        rows, words = np.concatenate(rows), np.concatenate(words)
+        order = np.argsort(rows)
+        return rows[order], self._ids(words[order])
+
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Fused feature-engineering stage for the cleaning pipeline
+Per-product and per-platform features are computed on the small dimension side,
+then attached to the review rows in a single gather + concat
+"""
+
+import pandas as pd
+import numpy as np
+
+from lookups import take, compose_codes
+from grouped import group_mode, group_share
+
+
+def dimension_codes(dim_index, lookup, row_codes):
+    """Row codes into a product-keyed dimension frame, via the product lookup"""
+    return compose_codes(dim_index.get_indexer(lookup.product_ids), row_codes)
+
+
+def gather_column(values, codes):
+    """Take a dimension column for each row code, keeping categoricals categorical"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        cat_codes = compose_codes(values.cat.codes.to_numpy(), codes)
+        return pd.Categorical.from_codes(cat_codes, dtype=values.dtype)
+    return take(values.to_numpy(), codes)
+
+
+def gather_frame(dim, codes, columns=None):
+    """Gather the requested dimension columns for each row code"""
+    columns = list(dim.columns) if columns is None else columns
+    return {col: gather_column(dim[col], codes) for col in columns}
+
+
+def fill_missing(values, fill_value):
+    """Replace NaN left by unmatched rows (like fillna after a left merge)"""
+    if values.dtype.kind != 'f':
+        return values
+    return np.where(np.isnan(values), fill_value, values)
+
+
+def product_attributes(products):
+    """Per-product attributes and price tier, indexed by product_id"""
+    dim = products.set_index('product_id')[['brand', 'type', 'base_price', 'launch_date']]
+    dim = dim.assign(price_tier=pd.cut(
+        dim['base_price'],
+        bins=[0, 25000, 35000, 50000],
+        labels=['low', 'medium', 'high']
+    ))
+    return dim
+
+
+def marketing_features(marketing):
+    """Per-product marketing aggregates, indexed by product_id"""
+    marketing_agg = marketing.groupby('product_id').agg({
+        'spend_idr': 'sum',
+        'engagement_rate': 'mean',
+        'campaign_id': 'count'
+    }).rename(columns={
+        'spend_idr': 'total_marketing_spend',
+        'engagement_rate': 'avg_engagement_rate',
+        'campaign_id': 'num_campaigns'
+    })
+
+    # Add channel diversity
+    marketing_agg['channel_diversity'] = marketing.groupby('product_id')['channel'].nunique()
+
+    # Most used channel
+    marketing_agg['primary_channel'] = group_mode(marketing['product_id'], marketing['channel'])
+    return marketing_agg
+
+
+def review_metrics(reviews):
+    """Per-product review aggregates, indexed by product_id"""
+    product_metrics = reviews.groupby('product_id').agg({
+        'rating': ['mean', 'std', 'count'],
+        'is_template': 'mean'
+    })
+    product_metrics.columns = ['avg_rating', 'rating_std', 'review_count', 'template_ratio']
+    product_metrics.insert(
+        3, 'positive_ratio',
+        group_share(reviews['product_id'], reviews['sentiment'], 'Positive')
+    )
+    return product_metrics.round(3)
+
+
+def attach_features(facts, columns):
+    """Append all new feature columns to the fact rows with a single concat"""
+    return pd.concat([facts, pd.DataFrame(columns, index=facts.index)], axis=1)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Batch trend forecasting over the daily sales cube
+Every product x region x channel series with sales is a row of one stacked
+(series, days) array, and each model is fitted to all rows at once:
+- SeasonalNaive      : repeat the last weekly cycle
+- ExponentialSmoothing: Holt level + trend, smoothing weights picked per series
+                        from a grid by one-step-ahead error
+- DiscountRegression : units ~ 1 + discount_pct + day, least squares per series
+Model state is additive over days, so new days update a fitted model without
+refitting from scratch; states are cached per model in sales_forecast.npz
+"""
+
+import hashlib
+import os
+
+import pandas as pd
+import numpy as np
+
+CACHE_PATH = 'sales_forecast.npz'
+CACHE_VERSION = 1
+
+
+def stack_series(cube, by=('region', 'channel')):
+    """(series, days) units and discount arrays plus the labels of each row"""
+    units = cube.series('units', by)
+    discount = cube.avg_discount(by)
+    return units, discount, cube.series_index(by)
+
+
+class SeasonalNaive:
+    """Forecast = the same weekday of the last observed week"""
+
+    name = 'seasonal_naive'
+
+    def __init__(self, season=7):
+        self.season = season
+        self.last = None
+        self.n_days = 0
+
+    def update(self, units, discount=None):
+        """Fold in the next block of days (columns) for every series"""
+        history = units if self.last is None else np.concatenate([self.last, units], axis=1)
+        self.last = history[:, -self.season:]
+        self.n_days += units.shape[1]
+        return self
+
+    def forecast(self, horizon, discount=None):
+        # last[:, 0] is exactly one season before the first forecast day
+        return np.tile(self.last, -(-horizon // self.season))[:, :horizon]
+
+    def state(self):
+        return {'season': np.asarray(self.season), 'last': self.last, 'n_days': np.asarray(self.n_days)}
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls(int(state['season']))
+        model.last, model.n_days = state['last'], int(state['n_days'])
+        return model
+
+
+class ExponentialSmoothing:
+    """Holt's linear method run for every (alpha, beta) pair on every series
+
+    The sum of squared one-step errors is kept per pair, so the best pair per
+    series is always the one that forecast its history best.
+    """
+
+    name = 'exp_smoothing'
+
+    def __init__(self, alphas=(0.02, 0.05, 0.1, 0.2, 0.4), betas=(0.0, 0.01, 0.05)):
+        grid = np.array([(a, b) for a in alphas for b in betas])
+        self.alpha = grid[:, 0:1]
+        self.beta = grid[:, 1:2]
+        self.level = None
+        self.trend = None
+        self.sse = None
+        self.n_days = 0
+
+    def update(self, units, discount=None):
+        units = np.asarray(units, dtype=float)
+        start = 0
+        if self.level is None:
+            shape = (len(self.alpha), units.shape[0])
+            self.level = np.broadcast_to(units[:, 0], shape).copy()
+            self.trend = np.zeros(shape)
+            self.sse = np.zeros(shape)
+            start = 1
+        # One step per day, vectorized over the grid and every series
+        for t in range(start, units.shape[1]):
+            error = units[:, t] - (self.level + self.trend)
+            self.sse += error * error
+            previous = self.level
+            self.level = self.level + self.trend + self.alpha * error
+            self.trend = self.trend + self.beta * (self.level - previous - self.trend)
+        self.n_days += units.shape[1]
+        return self
+
+    @property
+    def best(self):
+        """Index of the chosen (alpha, beta) pair per series"""
+        return np.argmin(self.sse, axis=0)
+
+    def forecast(self, horizon, discount=None):
+        rows = np.arange(self.level.shape[1])
+        level, trend = self.level[self.best, rows], self.trend[self.best, rows]
+        return np.maximum(level[:, None] + trend[:, None] * np.arange(1, horizon + 1), 0)
+
+    def state(self):
+        return {'alpha': self.alpha, 'beta': self.beta, 'level': self.level, 'trend': self.trend,
+                'sse': self.sse, 'n_days': np.asarray(self.n_days)}
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls()
+        model.alpha, model.beta = state['alpha'], state['beta']
+        model.level, model.trend, model.sse = state['level'], state['trend'], state['sse']
+        model.n_days = int(state['n_days'])
+        return model
+
+
+class DiscountRegression:
+    """Per-series least squares of daily units on [1, discount_pct, day]
+
+    Only X'X and X'y are stored, so appending days adds to them. Future days
+    assume each series keeps its recent average discount unless one is given.
+    """
+
+    name = 'discount_regression'
+    k = 3
+
+    def __init__(self, recent=28):
+        self.recent = recent
+        self.xtx = None
+        self.xty = None
+        self.recent_discount = None
+        self.n_days = 0
+
+    def _design(self, discount, first_day):
+        days = np.arange(first_day, first_day + discount.shape[1], dtype=float)
+        ones = np.ones_like(discount)
+        return np.stack([ones, discount, np.broadcast_to(days, discount.shape)], axis=-1)
+
+    def update(self, units, discount):
+        units = np.asarray(units, dtype=float)
+        # Days without sales carry no discount; they are left out of the fit
+        observed = ~np.isnan(discount)
+        X = self._design(np.where(observed, discount, 0.0), self.n_days) * observed[..., None]
+        xtx = np.einsum('sdi,sdj->sij', X, X)
+        xty = np.einsum('sdi,sd->si', X, np.where(observed, units, 0.0))
+        self.xtx = xtx if self.xtx is None else self.xtx + xtx
+        self.xty = xty if self.xty is None else self.xty + xty
+        window = discount if self.recent_discount is None else np.concatenate(
+            [self.recent_discount, discount], axis=1)
+        self.recent_discount = window[:, -self.recent:]
+        self.n_days += units.shape[1]
+        return self
+
+    @property
+    def coefficients(self):
+        # Tiny ridge keeps series with constant discount (or no sales) solvable
+        ridge = 1e-6 * np.eye(self.k)
+        return np.linalg.solve(self.xtx + ridge, self.xty[..., None])[..., 0]
+
+    def forecast(self, horizon, discount=None):
+        """discount: planned discount_pct per (series, day) or a scalar; NaN = recent average"""
+        observed = ~np.isnan(self.recent_discount)
+        counts = observed.sum(axis=1)
+        recent = np.where(counts > 0, np.where(observed, self.recent_discount, 0).sum(axis=1)
+                          / np.maximum(counts, 1), 0.0)[:, None]
+        if discount is not None:
+            discount = np.asarray(discount, dtype=float)
+            recent = np.where(np.isnan(discount), recent, discount)
+        X = self._design(np.broadcast_to(recent, (self.xty.shape[0], horizon)), self.n_days)
+        return np.maximum(np.einsum('shi,si->sh', X, self.coefficients), 0)
+
+    def state(self):
+        return {'recent': np.asarray(self.recent), 'xtx': self.xtx, 'xty': self.xty,
+                'recent_discount': self.recent_discount, 'n_days': np.asarray(self.n_days)}
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls(int(state['recent']))
+        model.xtx, model.xty = state['xtx'], state['xty']
+        model.recent_discount, model.n_days = state['recent_discount'], int(state['n_days'])
+        return model
+
+
+MODELS = [SeasonalNaive, ExponentialSmoothing, DiscountRegression]
+
+
+def _history_key(units, discount, n_days):
+    """Checksum of the first n_days, to tell appended days from rewritten history"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(units[:, :n_days]).tobytes())
+    digest.update(np.ascontiguousarray(np.nan_to_num(discount[:, :n_days], nan=-1)).tobytes())
+    return digest.hexdigest()
+
+
+def _load_states(cache_path, units, discount, index):
+    """Cached model states whose history is a prefix of units / discount, else {}"""
+    if not (cache_path and os.path.exists(cache_path)):
+        return {}
+    with np.load(cache_path, allow_pickle=False) as data:
+        if int(data['version']) != CACHE_VERSION or data['index'].tolist() != list(map(str, index)):
+            return {}
+        n_days = int(data['n_days'])
+        if n_days > units.shape[1] or str(data['history']) != _history_key(units, discount, n_days):
+            return {}
+        states = {}
+        for key in data.files:
+            if '/' in key:
+                model, field = key.split('/', 1)
+                states.setdefault(model, {})[field] = data[key]
+    return states
+
+
+def fit_models(units, discount, index=None, models=MODELS, cache_path=CACHE_PATH):
+    """Fitted models for the stacked series, reusing and extending the cache
+
+    - same history            -> cached states as they are
+    - days appended           -> cached states updated with the new days only
+    - anything else changed   -> fit from scratch
+    """
+    index = pd.RangeIndex(units.shape[0]) if index is None else index
+    states = _load_states(cache_path, units, discount, index)
+    fitted = {}
+    for model_cls in models:
+        state = states.get(model_cls.name)
+        model = model_cls() if state is None else model_cls.from_state(state)
+        if units.shape[1] > model.n_days:
+            model.update(units[:, model.n_days:], discount[:, model.n_days:])
+        fitted[model_cls.name] = model
+
+    if cache_path:
+        arrays = {f"{name}/{field}": value for name, model in fitted.items()
+                  for field, value in model.state().items()}
+        np.savez(cache_path, version=CACHE_VERSION, n_days=units.shape[1],
+                 index=np.asarray(list(map(str, index))), history=_history_key(units, discount, units.shape[1]),
+                 **arrays)
+    return fitted
+
+
+def backtest(units, discount, horizon=28, models=MODELS):
+    """Mean absolute error per model when the last `horizon` days are held out"""
+    if not 0 < horizon < units.shape[1]:
+        raise ValueError(f"backtest needs 0 < horizon < days of history, "
+                         f"got horizon={horizon} for {units.shape[1]} days")
+    train_units, train_discount = units[:, :-horizon], discount[:, :-horizon]
+    actual = units[:, -horizon:]
+    errors = {}
+    for model_cls in models:
+        model = model_cls().update(train_units, train_discount)
+        predicted = model.forecast(horizon, discount[:, -horizon:])
+        errors[model_cls.name] = float(np.abs(predicted - actual).mean())
+    return errors
+
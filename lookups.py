@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Product lookup arrays for join-free validation and enrichment
+Maps product_id codes to small per-product arrays (launch_date, base_price, brand)
+so reviews, marketing and sales rows can be validated by integer indexing
+instead of a merge
+"""
+
+from collections import namedtuple
+
+import pandas as pd
+import numpy as np
+
+KeyCheck = namedtuple('KeyCheck', ['orphan_rows', 'orphan_keys', 'unused_keys'])
+
+
+def take(values, codes):
+    """Index a small array by row codes, missing (NaN/NaT) where code is -1"""
+    missing = codes < 0
+    if not missing.any():
+        return values[codes]
+    if values.dtype.kind == 'M':
+        out = np.full(len(codes), np.datetime64('NaT'), dtype=values.dtype)
+    elif values.dtype.kind in 'iubf':
+        out = np.full(len(codes), np.nan)
+    else:
+        out = np.full(len(codes), np.nan, dtype=object)
+    out[~missing] = values[codes[~missing]]
+    return out
+
+
+def compose_codes(outer, inner):
+    """Chain two code maps: outer[inner], keeping -1 where inner is -1"""
+    if len(outer) == 0:
+        return np.full(len(inner), -1)
+    return np.where(inner >= 0, outer[inner], -1)
+
+
+class ProductLookup:
+    """Per-product attribute arrays addressed by integer product codes"""
+
+    def __init__(self, products):
+        self.product_ids = pd.Index(products['product_id'])
+        self.columns = {col: products[col].to_numpy() for col in products.columns
+                        if col != 'product_id'}
+        brand_codes, brands = pd.factorize(products['brand'])
+        self.columns['brand_code'] = brand_codes
+        self.brands = brands
+
+    def codes(self, product_ids):
+        """Integer position of each product_id in the lookup (-1 if unknown)"""
+        return self.product_ids.get_indexer(product_ids)
+
+    def gather(self, column, codes):
+        """Take per-product values for each row code, missing for unknown products"""
+        return take(self.columns[column], codes)
+
+    def launch_dates(self, codes):
+        return self.gather('launch_date', codes)
+
+
+def after_launch_mask(frame, date_col, lookup, codes=None):
+    """Boolean mask of rows dated on/after their product's launch date
+
+    Rows whose product is unknown compare as False, matching a left merge
+    followed by `date >= launch_date`.
+    """
+    if codes is None:
+        codes = lookup.codes(frame['product_id'])
+    return frame[date_col].to_numpy() >= lookup.launch_dates(codes)
+
+
+def pre_launch_mask(frame, date_col, lookup, codes=None):
+    """Boolean mask of rows dated before their product's launch date"""
+    if codes is None:
+        codes = lookup.codes(frame['product_id'])
+    return frame[date_col].to_numpy() < lookup.launch_dates(codes)
+
+
+def key_integrity(keys, master_keys, counts=None):
+    """Foreign-key check of keys against master_keys (e.g. product_id)
+
+    orphan_rows counts rows whose key is missing from the master (missing keys
+    included), orphan_keys / unused_keys list the distinct keys found on only
+    one side. keys may already be distinct values with their row counts (as
+    kept by a columnar store), which skips the per-row pass.
+    """
+    if counts is None:
+        codes, keys = pd.factorize(keys)
+        counts = np.bincount(codes[codes >= 0], minlength=len(keys))
+        missing_rows = int((codes < 0).sum())
+    else:
+        keys, counts = pd.Index(keys), np.asarray(counts)
+        missing_rows = int(counts[keys.isna()].sum())
+        keys, counts = keys[~keys.isna()], counts[~keys.isna()]
+    keys = pd.Index(keys)
+    known = keys.isin(master_keys)
+    master = pd.Index(pd.unique(pd.Series(master_keys).dropna()))
+    return KeyCheck(int(counts[~known].sum()) + missing_rows, list(keys[~known]),
+                    list(master[~master.isin(keys)]))
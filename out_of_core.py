@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Out-of-core grouped sums for tables that do not fit in memory
+ExternalGroupBy takes chunks of integer key columns plus float value columns,
+pre-aggregates each chunk (sum, or min / max per column) and keeps the
+partial results in memory until they
+outgrow the memory budget; from then on they are hash-partitioned by key into
+spill files. result() aggregates one partition at a time (re-partitioning any
+partition still over budget), so peak memory follows the budget, not the row
+count. The budget defaults to $SALES_MEMORY_BUDGET or 512MB
+"""
+
+import os
+import tempfile
+
+import pandas as pd
+import numpy as np
+
+from dedup import hash_words
+
+MEMORY_BUDGET = os.environ.get('SALES_MEMORY_BUDGET', '512MB')
+_UNITS = {'': 1, 'B': 1, 'K': 2**10, 'KB': 2**10, 'M': 2**20, 'MB': 2**20,
+          'G': 2**30, 'GB': 2**30, 'T': 2**40, 'TB': 2**40}
+
+
+def parse_bytes(size):
+    """'512MB', '2g', '1.5GB' or a plain number -> bytes"""
+    if isinstance(size, (int, float, np.integer, np.floating)):
+        return int(size)
+    text = str(size).strip().upper()
+    number = text.rstrip('KMGTB ')
+    return int(float(number) * _UNITS[text[len(number):].strip()])
+
+
+class ExternalGroupBy:
+    """Sum of value columns per distinct combination of integer key columns
+
+    add() accepts DataFrames (or dicts of arrays) holding every key and value
+    column. Pre-aggregated rows are held as (rows, keys + values) uint64
+    records; floats are stored bit for bit. how maps value columns to 'min'
+    or 'max' instead of the default 'sum'; NaN values are skipped as in
+    pandas.
+    """
+
+    def __init__(self, keys, values, memory_budget=MEMORY_BUDGET, fanout=16, tmpdir=None, how=None):
+        self.keys = list(keys)
+        self.values = list(values)
+        self.how = {**dict.fromkeys(self.values, 'sum'), **(how or {})}
+        self.budget = parse_bytes(memory_budget)
+        self.bits = max(1, int(np.ceil(np.log2(fanout))))
+        self.tmpdir = tmpdir
+        self.workdir = None
+        self.buffer = []
+        self.buffered = 0
+        self.rows = 0
+        self.spilled = 0
+
+    def _records(self, frame):
+        keys = np.column_stack([np.asarray(frame[k], dtype=np.int64) for k in self.keys]).view(np.uint64)
+        values = np.column_stack([np.asarray(frame[v], dtype=np.float64) for v in self.values]).view(np.uint64)
+        return np.concatenate([keys, values], axis=1)
+
+    def _frame(self, records):
+        k = len(self.keys)
+        keys = pd.DataFrame(records[:, :k].view(np.int64), columns=self.keys)
+        values = pd.DataFrame(np.ascontiguousarray(records[:, k:]).view(np.float64), columns=self.values)
+        return pd.concat([keys, values], axis=1)
+
+    def _reduce(self, records):
+        """Records with one row per distinct key"""
+        if not len(records):
+            return records
+        grouped = self._frame(records).groupby(self.keys, sort=False, as_index=False)
+        return self._records(grouped.agg(self.how))
+
+    def add(self, frame):
+        records = self._records(frame)
+        self.rows += len(records)
+        records = self._reduce(records)
+        self.buffer.append(records)
+        self.buffered += records.nbytes
+        # Combining needs the buffer twice over (concat + groupby), hence half the budget
+        if self.buffered > self.budget // 2:
+            records = self._reduce(np.concatenate(self.buffer))
+            self.buffer, self.buffered = [records], records.nbytes
+            if self.buffered > self.budget // 4:
+                self._spill(records, self._prefix(), 0)
+                self.buffer, self.buffered = [], 0
+
+    def _prefix(self):
+        if self.workdir is None:
+            self.workdir = tempfile.TemporaryDirectory(dir=self.tmpdir)
+        return os.path.join(self.workdir.name, 'part')
+
+    def _spill(self, records, prefix, level):
+        """Append records to prefix<p>.bin by hash bits [level * bits, (level + 1) * bits)"""
+        shift = np.uint64(64 - self.bits * (level + 1))
+        part = ((hash_words(records[:, :len(self.keys)]) >> shift) & np.uint64((1 << self.bits) - 1)).astype(np.int64)
+        order = np.argsort(part, kind='stable')
+        bounds = np.searchsorted(part[order], np.arange((1 << self.bits) + 1))
+        for p in range(1 << self.bits):
+            if bounds[p + 1] > bounds[p]:
+                with open(f"{prefix}{p}.bin", 'ab') as f:
+                    records[order[bounds[p]:bounds[p + 1]]].tofile(f)
+        self.spilled += records.nbytes
+
+    def _partitions(self, prefix, level):
+        """Reduced records of every spill file under prefix, one file at a time"""
+        width = len(self.keys) + len(self.values)
+        block = max(1, self.budget // 4 // (8 * width))
+        for p in range(1 << self.bits):
+            path = f"{prefix}{p}.bin"
+            if not os.path.exists(path):
+                continue
+            too_big = os.path.getsize(path) > self.budget // 4
+            if too_big and self.bits * (level + 2) <= 64:
+                # Still over budget: split it again on the next hash bits
+                with open(path, 'rb') as f:
+                    while True:
+                        records = np.fromfile(f, dtype=np.uint64, count=block * width)
+                        if not len(records):
+                            break
+                        self._spill(records.reshape(-1, width), f"{prefix}{p}_", level + 1)
+                os.remove(path)
+                yield from self._partitions(f"{prefix}{p}_", level + 1)
+            else:
+                records = np.fromfile(path, dtype=np.uint64).reshape(-1, width)
+                os.remove(path)
+                yield self._reduce(records)
+
+    def iter_partitions(self):
+        """Aggregated DataFrames, each holding a disjoint set of keys"""
+        try:
+            if self.workdir is None:
+                yield self._frame(self._reduce(np.concatenate(self.buffer) if self.buffer
+                                               else np.empty((0, len(self.keys) + len(self.values)), np.uint64)))
+                return
+            for records in self.buffer:
+                self._spill(records, self._prefix(), 0)
+            self.buffer, self.buffered = [], 0
+            for records in self._partitions(self._prefix(), 0):
+                yield self._frame(records)
+        finally:
+            if self.workdir is not None:
+                self.workdir.cleanup()
+                self.workdir = None
+
+    def result(self):
+        """All groups, sorted by key (the output itself must fit in memory)"""
+        frame = pd.concat(list(self.iter_partitions()), ignore_index=True)
+        return frame.sort_values(self.keys, kind='stable', ignore_index=True)
+
+
+def group_sums(chunks, keys, values, memory_budget=MEMORY_BUDGET, **options):
+    """ExternalGroupBy over an iterable of DataFrames, as one sorted DataFrame"""
+    groups = ExternalGroupBy(keys, values, memory_budget, **options)
+    for chunk in chunks:
+        groups.add(chunk)
+    return groups.result()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Process-pool helpers for resampling and pairwise workloads
+Work is split into batches, each batch gets its own child seed from one
+SeedSequence (so results are reproducible for a given seed and batch size
+whatever the worker count), and batches run across a fork-based process pool
+of $REPORT_WORKERS workers (default: one per CPU)
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+
+def default_workers():
+    return int(os.environ.get('REPORT_WORKERS') or os.cpu_count() or 1)
+
+
+def batch_sizes(total, batch_size):
+    """Split `total` items into batches of at most `batch_size`"""
+    full, rest = divmod(total, batch_size)
+    return [batch_size] * full + ([rest] if rest else [])
+
+
+def spawn_seeds(seed, n):
+    """Independent, reproducible child seeds for n batches"""
+    return np.random.SeedSequence(seed).spawn(n)
+
+
+# Read-only data handed to forked workers without pickling it per task
+_SHARED = None
+
+
+def _call_shared(func, task):
+    return func(_SHARED, task)
+
+
+def parallel_map(func, tasks, workers=None, shared=None):
+    """map(func, tasks) over a process pool, serially when one worker suffices
+
+    With `shared` set, func is called as func(shared, task); the object is
+    inherited by the forked workers instead of being pickled with every task,
+    which matters for large arrays.
+    Only the 'fork' start method is used: the report scripts run at import time,
+    so 'spawn' workers would re-execute them. Without fork, work runs in-process.
+    """
+    global _SHARED
+    tasks = list(tasks)
+    workers = default_workers() if workers is None else workers
+    workers = min(workers, len(tasks))
+    if shared is not None:
+        func, _SHARED = partial(_call_shared, func), shared
+    try:
+        if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            return [func(task) for task in tasks]
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            return list(pool.map(func, tasks))
+    finally:
+        _SHARED = None
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-section profiler behind the scripts' --profile flag
+Scripts mark their sections with profiler.section(name). While profiling, a
+SIGPROF interval timer samples the Python stack, weighting each sample by the
+CPU time since the previous one, so a long pandas / numpy call is charged to
+the line that made it. The pandas entry points the scripts lean on (merge,
+copy, apply, iterrows, groupby, ...) are counted and timed when called from
+outside pandas. At exit it writes, under profile/<script>/,
+
+  NN-<section>.folded   collapsed stacks (CPU microseconds) for flamegraph.pl / inferno
+  speedscope.json       one sampled profile per section, for speedscope.app
+  sections.json         wall / CPU seconds and pandas counters per section
+
+and prints a per-section summary to stderr. A disabled profiler is a no-op
+"""
+
+import atexit
+import functools
+import json
+import os
+import re
+import signal
+import sys
+import time
+from collections import Counter
+
+import pandas as pd
+from pandas.core.groupby import SeriesGroupBy
+from pandas.core.groupby.groupby import GroupBy
+
+PROFILE_DIR = 'profile'
+INTERVAL = 0.001  # CPU seconds between stack samples
+# counter -> (owner, attribute) pairs wrapped while profiling
+PANDAS_OPS = {
+    'merge': [(pd, 'merge'), (pd.DataFrame, 'merge'), (pd.DataFrame, 'join')],
+    'copy': [(pd.DataFrame, 'copy'), (pd.Series, 'copy')],
+    'apply': [(pd.DataFrame, 'apply'), (pd.Series, 'apply'), (GroupBy, 'apply'), (SeriesGroupBy, 'apply')],
+    'iterrows': [(pd.DataFrame, 'iterrows'), (pd.DataFrame, 'itertuples')],
+    'groupby': [(pd.DataFrame, 'groupby'), (pd.Series, 'groupby')],
+    'concat': [(pd, 'concat')],
+    'sort': [(pd.DataFrame, 'sort_values'), (pd.Series, 'sort_values')],
+    'read_csv': [(pd, 'read_csv')],
+    'to_csv': [(pd.DataFrame, 'to_csv'), (pd.Series, 'to_csv')],
+}
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def add_profile_argument(parser):
+    parser.add_argument('--profile', nargs='?', const=PROFILE_DIR, metavar='DIR',
+                        help=f"profile each section; writes flame graphs and pandas counters to DIR "
+                             f"(default {PROFILE_DIR}/)")
+
+
+class _Section:
+    def __init__(self, name):
+        self.name = name
+        self.stacks = Counter()
+        self.counters = Counter()
+        self.op_seconds = Counter()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+    def close(self):
+        self.wall = time.perf_counter() - self.wall
+        self.cpu = time.process_time() - self.cpu
+
+
+class Profiler:
+    """Section timings, sampled stacks and pandas counters for one script run"""
+
+    def __init__(self, script, out_dir=None, interval=INTERVAL):
+        self.script = script
+        self.out_dir = out_dir
+        self.interval = interval
+        self.sections = []
+        self.current = None
+        self.patched = []
+        self.labels = {}
+        self.pid = os.getpid()
+        self.sampling = False
+
+    @property
+    def enabled(self):
+        return self.out_dir is not None
+
+    def start(self):
+        if not self.enabled:
+            return self
+        self.section('setup')
+        self._patch_pandas()
+        if hasattr(signal, 'setitimer'):
+            self.last_cpu = time.process_time()
+            signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+            self.sampling = True
+        atexit.register(self.finish)
+        return self
+
+    def section(self, name):
+        """Start the next section (ending the current one)"""
+        if not self.enabled:
+            return
+        if self.current is not None:
+            self.current.close()
+        self.current = _Section(name)
+        self.sections.append(self.current)
+
+    def _label(self, frame):
+        key = (frame.f_code, frame.f_lineno)
+        if key not in self.labels:
+            path = frame.f_code.co_filename
+            if path.startswith(_ROOT):
+                path = os.path.relpath(path, _ROOT)
+            elif 'site-packages' in path:
+                path = path.split('site-packages' + os.sep, 1)[1]
+            else:
+                path = os.path.basename(path)
+            self.labels[key] = f"{frame.f_code.co_name} ({path}:{frame.f_lineno})"
+        return self.labels[key]
+
+    def _sample(self, signum, frame):
+        now = time.process_time()
+        weight, self.last_cpu = now - self.last_cpu, now
+        stack = []
+        while frame is not None:
+            if frame.f_code.co_filename != __file__:  # the pandas counting wrapper
+                stack.append(self._label(frame))
+            frame = frame.f_back
+        # Only profiler frames (e.g. inside finish()) leave nothing to charge
+        if stack:
+            self.current.stacks[tuple(reversed(stack))] += weight
+
+    def _counted(self, op, func):
+        @functools.wraps(func)
+        def counted(*args, **kwargs):
+            # Only calls made by our code; pandas calling itself is one operation
+            if sys._getframe(1).f_globals.get('__name__', '').startswith('pandas'):
+                return func(*args, **kwargs)
+            section = self.current
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                section.counters[op] += 1
+                section.op_seconds[op] += time.perf_counter() - started
+        return counted
+
+    def _patch_pandas(self):
+        for op, targets in PANDAS_OPS.items():
+            for owner, name in targets:
+                # The owner's own attribute (None if inherited), so restoring leaves no copy behind
+                self.patched.append((owner, name, vars(owner).get(name)))
+                setattr(owner, name, self._counted(op, getattr(owner, name)))
+
+    def _unpatch_pandas(self):
+        for owner, name, original in reversed(self.patched):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self.patched = []
+
+    def finish(self):
+        """Stop sampling, restore pandas and write the reports (once)"""
+        if not self.enabled or self.current is None or os.getpid() != self.pid:
+            return
+        if self.sampling:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, signal.SIG_DFL)
+        self._unpatch_pandas()
+        self.current.close()
+        self.current = None
+        directory = os.path.join(self.out_dir, self.script)
+        self.write(directory)
+        self.print_summary(directory)
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.folded'):
+                os.remove(os.path.join(directory, name))
+        frames, index = [], {}
+        profiles = []
+        for number, section in enumerate(self.sections, 1):
+            slug = re.sub(r'[^a-z0-9]+', '-', section.name.lower()).strip('-') or 'section'
+            with open(os.path.join(directory, f"{number:02d}-{slug}.folded"), 'w') as f:
+                for stack, weight in section.stacks.most_common():
+                    if round(weight * 1e6):
+                        f.write(f"{';'.join(stack)} {round(weight * 1e6)}\n")
+            samples, weights = [], []
+            for stack, weight in section.stacks.items():
+                for label in stack:
+                    if label not in index:
+                        index[label] = len(frames)
+                        frames.append({'name': label})
+                samples.append([index[label] for label in stack])
+                weights.append(weight)
+            profiles.append({'type': 'sampled', 'name': f"{number:02d} {section.name}", 'unit': 'seconds',
+                             'startValue': 0, 'endValue': sum(weights), 'samples': samples, 'weights': weights})
+        with open(os.path.join(directory, 'speedscope.json'), 'w') as f:
+            json.dump({'$schema': 'https://www.speedscope.app/file-format-schema.json',
+                       'name': self.script, 'exporter': 'profiling.py', 'activeProfileIndex': 0,
+                       'shared': {'frames': frames}, 'profiles': profiles}, f)
+        with open(os.path.join(directory, 'sections.json'), 'w') as f:
+            json.dump([{'section': s.name, 'wall_seconds': round(s.wall, 6), 'cpu_seconds': round(s.cpu, 6),
+                        'sampled_seconds': round(sum(s.stacks.values()), 6), 'pandas_ops': dict(s.counters),
+                        'pandas_op_seconds': {op: round(t, 6) for op, t in s.op_seconds.items()}}
+                       for s in self.sections], f, indent=1, ensure_ascii=False)
+
+    def print_summary(self, directory):
+        out = sys.stderr
+        total = sum(s.wall for s in self.sections) or 1e-9
+        print(f"\nPROFILE ({self.script}) - sections by wall time, written to {directory}/", file=out)
+        for section in self.sections:
+            ops = ' '.join(f"{op}={n}" for op, n in sorted(section.counters.items()))
+            print(f"  {section.wall:8.3f}s {section.wall / total:6.1%}  cpu {section.cpu:7.3f}s  "
+                  f"{section.name}" + (f"  [{ops}]" if ops else ''), file=out)
+            own = Counter()
+            for stack, weight in section.stacks.items():
+                own[stack[-1]] += weight
+            sampled = sum(own.values())
+            for label, weight in own.most_common(3):
+                if sampled and weight / sampled >= 0.05:
+                    print(f"{'':28}{weight / sampled:6.1%} self  {label}", file=out)
+
+
+def start_profiler(out_dir, script=None):
+    """Profiler for this script, sampling from now on if out_dir is set (else a no-op)"""
+    script = script or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    return Profiler(script, out_dir).start()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Shared data-quality metrics for the scorecard
+Built in one chunked scan of reviews.csv (plus the small marketing table), cached
+to quality_metrics.json and updated incrementally when rows are appended,
+so the report renders from the cache instead of rescanning the data
+"""
+
+import hashlib
+import json
+import math
+import os
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+import numpy as np
+
+from lookups import ProductLookup, pre_launch_mask
+from sales_data import SALES_PATH, is_lfs_pointer
+
+TODAY = datetime(2025, 11, 3)
+CACHE_PATH = 'quality_metrics.json'
+CACHE_VERSION = 3
+BLOCK_BYTES = 65536
+
+
+def expected_sentiment(ratings):
+    """Vectorized rating -> sentiment rule (>= 4 Positive, <= 2.5 Negative)"""
+    ratings = np.asarray(ratings, dtype=float)
+    return np.select([ratings >= 4.0, ratings <= 2.5], ['Positive', 'Negative'], 'Neutral')
+
+
+def _sha256(path, nbytes=None, offset=0):
+    """sha256 of nbytes (default: the rest of the file) starting at offset"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        remaining = math.inf if nbytes is None else nbytes
+        while remaining > 0:
+            block = f.read(int(min(remaining, 1 << 20)))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def file_signature(path, tail_bytes=BLOCK_BYTES):
+    """Size, mtime_ns and a hash of the last block: cheap enough for every cache check
+
+    Rewriting a file changes its mtime, and the tail hash also catches a copy
+    that kept the size and mtime. The tail also lets an append be told from a
+    rewrite: the bytes already consumed must still end with the same block.
+    """
+    stat = os.stat(path)
+    tail_len = min(tail_bytes, stat.st_size)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'tail_len': tail_len, 'tail': _sha256(path, tail_len, stat.st_size - tail_len)}
+
+
+def is_append(path, previous, sha256):
+    """True if path is the file `previous` (whole-file hash sha256) was taken from, with lines appended
+
+    The earlier part is only hashed once the cheap checks (growth, line end,
+    same last block at the old offset) pass.
+    """
+    offset = previous['size']
+    if os.path.getsize(path) <= offset:
+        return False
+    if offset:
+        with open(path, 'rb') as f:
+            f.seek(offset - 1)
+            if f.read(1) != b'\n':  # the last consumed row was incomplete
+                return False
+    return (_sha256(path, previous['tail_len'], offset - previous['tail_len']) == previous['tail']
+            and _sha256(path, offset) == sha256)
+
+
+class QualityMetrics:
+    """Mergeable counters behind the data quality scorecard"""
+
+    def __init__(self):
+        self.total_reviews = 0
+        self.future_reviews = 0
+        self.pre_launch_reviews = 0
+        self.mismatched_sentiment = 0
+        self.comment_counts = Counter()
+        self.platform_counts = Counter()
+        self.product_counts = Counter()
+        self.product_rating_sums = Counter()
+        self.id_min = None
+        self.id_max = None
+        self.id_last = None
+        self.id_breaks = 0
+        # Pearson sums for marketing spend vs engagement
+        self.marketing = {'n': 0, 'sx': 0.0, 'sy': 0.0, 'sxx': 0.0, 'syy': 0.0, 'sxy': 0.0}
+        self.sales_status = None
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def update_reviews(self, chunk, lookup, today=TODAY):
+        """Fold one chunk of reviews (date already parsed) into the counters"""
+        self.total_reviews += len(chunk)
+        self.future_reviews += int((chunk['date'] > today).sum())
+        self.pre_launch_reviews += int(pre_launch_mask(chunk, 'date', lookup).sum())
+        self.mismatched_sentiment += int(
+            (chunk['sentiment'].to_numpy() != expected_sentiment(chunk['rating'])).sum()
+        )
+        self.comment_counts.update(chunk['comment'].value_counts().to_dict())
+        self.platform_counts.update(chunk['platform'].value_counts().to_dict())
+        self.product_counts.update(chunk['product_id'].value_counts().to_dict())
+        self.product_rating_sums.update(chunk.groupby('product_id')['rating'].sum().to_dict())
+
+        ids = chunk['review_id'].str.slice(1).astype(np.int64).to_numpy()
+        if len(ids):
+            steps = np.diff(ids if self.id_last is None else np.r_[self.id_last, ids])
+            self.id_breaks += int(np.count_nonzero(steps != 1))
+            self.id_min = int(ids.min()) if self.id_min is None else min(self.id_min, int(ids.min()))
+            self.id_max = int(ids.max()) if self.id_max is None else max(self.id_max, int(ids.max()))
+            self.id_last = int(ids[-1])
+        return self
+
+    def update_marketing(self, chunk):
+        x = chunk['spend_idr'].to_numpy(dtype=float)
+        y = chunk['engagement_rate'].to_numpy(dtype=float)
+        m = self.marketing
+        m['n'] += len(x)
+        m['sx'] += x.sum()
+        m['sy'] += y.sum()
+        m['sxx'] += (x * x).sum()
+        m['syy'] += (y * y).sum()
+        m['sxy'] += (x * y).sum()
+        return self
+
+    def update_sales_status(self, path=SALES_PATH):
+        if not os.path.exists(path):
+            self.sales_status = "not found"
+        elif is_lfs_pointer(path):
+            with open(path) as f:
+                size = next((int(line.split()[1]) for line in f if line.startswith('size ')), 0)
+            self.sales_status = f"{size / 1e6:.0f}MB file in Git LFS (not analyzed)"
+        else:
+            self.sales_status = f"{os.path.getsize(path) / 1e6:.0f}MB file available"
+        return self
+
+    # ------------------------------------------------------------------
+    # Derived figures
+    # ------------------------------------------------------------------
+    @property
+    def unique_comments(self):
+        return len(self.comment_counts)
+
+    @property
+    def sequential_ids(self):
+        return self.total_reviews > 0 and self.id_breaks == 0
+
+    @property
+    def platform_max_deviation(self):
+        """Largest platform share deviation from uniform, in percent"""
+        counts = np.array(list(self.platform_counts.values()), dtype=float)
+        if not len(counts):
+            return math.nan
+        expected = counts.sum() / len(counts)
+        return float(np.abs(counts - expected).max() / expected * 100)
+
+    @property
+    def product_count_std(self):
+        counts = pd.Series(self.product_counts, dtype=float)
+        return float(counts.std())
+
+    @property
+    def product_rating_range(self):
+        means = pd.Series(self.product_rating_sums) / pd.Series(self.product_counts)
+        return float(means.min()), float(means.max())
+
+    @property
+    def marketing_correlation(self):
+        m = self.marketing
+        n = m['n']
+        cov = m['sxy'] - m['sx'] * m['sy'] / n
+        var_x = m['sxx'] - m['sx'] ** 2 / n
+        var_y = m['syy'] - m['sy'] ** 2 / n
+        return cov / math.sqrt(var_x * var_y) if var_x > 0 and var_y > 0 else math.nan
+
+    @property
+    def critical_issues(self):
+        """Names of the anomaly summary items that flag a problem"""
+        low, high = self.product_rating_range
+        flags = {
+            'future_reviews': self.future_reviews > 0,
+            'pre_launch_reviews': self.pre_launch_reviews > 0,
+            'mismatched_sentiment': self.mismatched_sentiment > 0,
+            'comment_uniqueness': self.unique_comments < self.total_reviews / 100,
+            'sequential_ids': self.sequential_ids,
+            'platform_distribution': self.platform_max_deviation < 2,
+            'product_review_counts': self.product_count_std < 50,
+            'average_ratings': high - low < 0.3,
+            'marketing_roi': self.marketing_correlation < 0,
+            'sales': not (self.sales_status or '').endswith('file available'),
+        }
+        return [name for name, flagged in flags.items() if flagged]
+
+    # ------------------------------------------------------------------
+    # Cache (de)serialisation
+    # ------------------------------------------------------------------
+    _COUNTERS = ['comment_counts', 'platform_counts', 'product_counts', 'product_rating_sums']
+    _SCALARS = ['total_reviews', 'future_reviews', 'pre_launch_reviews', 'mismatched_sentiment',
+                'id_min', 'id_max', 'id_last', 'id_breaks', 'marketing']
+
+    def to_dict(self):
+        state = {name: getattr(self, name) for name in self._SCALARS}
+        state.update({name: {key: value.item() if hasattr(value, 'item') else value
+                             for key, value in getattr(self, name).items()}
+                      for name in self._COUNTERS})
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        metrics = cls()
+        for name in cls._SCALARS:
+            setattr(metrics, name, state[name])
+        for name in cls._COUNTERS:
+            setattr(metrics, name, Counter(state[name]))
+        return metrics
+
+
+def _scan_reviews(metrics, path, lookup, offset=0, chunksize=200_000):
+    """Fold the review rows from byte offset onwards (0: the whole file)"""
+    with open(path, 'rb') as f:
+        if offset:
+            names = pd.read_csv(path, nrows=0).columns
+            f.seek(offset)
+            chunks = pd.read_csv(f, chunksize=chunksize, header=None, names=names, parse_dates=['date'])
+        else:
+            chunks = pd.read_csv(f, chunksize=chunksize, parse_dates=['date'])
+        for chunk in chunks:
+            metrics.update_reviews(chunk, lookup)
+    return metrics
+
+
+def load_quality_metrics(reviews_path='reviews.csv', products_path='products.csv',
+                         marketing_path='marketing.csv', cache_path=CACHE_PATH,
+                         chunksize=200_000):
+    """Return up-to-date QualityMetrics, reusing / extending the cache when possible
+
+    - inputs unchanged       -> served straight from the cache
+    - rows appended          -> only the reviews past the consumed byte offset are scanned
+    - anything else changed  -> full rebuild in one chunked scan
+
+    Checking for a hit costs a stat and one block read per input; the consumed
+    part of reviews.csv is only re-hashed when the file grew. The sales status
+    is not cached: it is re-read from sales.csv on every call.
+    """
+    signatures = {
+        'reviews': file_signature(reviews_path),
+        'products': file_signature(products_path),
+        'marketing': file_signature(marketing_path),
+    }
+    cache = None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+        if cache.get('version') != CACHE_VERSION:
+            cache = None
+
+    if cache is not None and cache['signatures'] == signatures:
+        return QualityMetrics.from_dict(cache['metrics']).update_sales_status()
+
+    products = pd.read_csv(products_path, parse_dates=['launch_date'])
+    lookup = ProductLookup(products)
+
+    appended = (
+        cache is not None
+        and cache['signatures']['products'] == signatures['products']
+        and cache['signatures']['marketing'] == signatures['marketing']
+        and is_append(reviews_path, cache['signatures']['reviews'], cache['reviews_sha256'])
+    )
+    if appended:
+        metrics = QualityMetrics.from_dict(cache['metrics'])
+        _scan_reviews(metrics, reviews_path, lookup, cache['signatures']['reviews']['size'], chunksize)
+    else:
+        metrics = _scan_reviews(QualityMetrics(), reviews_path, lookup, 0, chunksize)
+        metrics.update_marketing(pd.read_csv(marketing_path))
+    metrics.update_sales_status()
+
+    if cache_path:
+        with open(cache_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'signatures': signatures,
+                       'reviews_sha256': _sha256(reviews_path), 'metrics': metrics.to_dict()}, f)
+    return metrics
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Local HTTP/JSON query service over the cleaned datasets
+Loads products / marketing / reviews _cleaned.csv once, precomputes the report
+tables (brand performance, platform bias, channel efficiency, campaign lift)
+and answers from memory. A background task polls the files and swaps in a
+freshly loaded state once they change, so queries never wait on a reload.
+Plain asyncio, no web framework:
+
+    python query_service.py --port 8765
+    curl 'localhost:8765/ratings?product_id=PC008&platform=Shopee&period=last_quarter'
+    curl 'localhost:8765/spend?by=channel'
+
+Endpoints: /health, /brands, /platforms, /channels, /spend, /campaigns/lift,
+/ratings
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import numpy as np
+
+from campaign_lift import campaign_lift
+from report_tables import brand_performance, channel_efficiency, platform_bias, review_windows
+from sales_cube import load_daily_cube
+from sales_data import SALES_PATH, sales_available
+
+CLEANED_PATHS = {
+    'products': 'products_cleaned.csv',
+    'marketing': 'marketing_cleaned.csv',
+    'reviews': 'reviews_cleaned.csv',
+}
+DATE_COLUMNS = {'products': ['launch_date'], 'marketing': ['start_date', 'end_date'], 'reviews': ['date']}
+PERIODS = {'last_month': 'M', 'last_quarter': 'Q', 'last_year': 'Y'}
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error'}
+
+
+def watched_paths(paths, sales_path):
+    """The cleaned files plus sales.csv, whose arrival or change reloads the sales lift"""
+    return {**paths, 'sales': sales_path}
+
+
+def file_stamps(paths):
+    """(mtime_ns, size) per file, None if missing; any change triggers a reload"""
+    stamps = {}
+    for name, path in paths.items():
+        try:
+            stat = os.stat(path)
+            stamps[name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamps[name] = None
+    return stamps
+
+
+def records(frame):
+    """JSON-ready list of row dicts (index included, NaN -> null)"""
+    frame = frame.reset_index() if frame.index.name or isinstance(frame.index, pd.MultiIndex) else frame
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, (pd.Timestamp, pd.Period)):
+        return str(value)
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
+
+
+class QueryError(ValueError):
+    """Bad request parameters (answered with HTTP 400)"""
+
+
+def query_day(value, name):
+    """A date parameter as datetime64[D]; QueryError unless it parses to a real date"""
+    try:
+        day = pd.Timestamp(value)
+    except (ValueError, TypeError) as error:
+        raise QueryError(f"{name} must be a date (YYYY-MM-DD), got {value!r}") from error
+    if pd.isna(day):
+        raise QueryError(f"{name} must be a date (YYYY-MM-DD), got {value!r}")
+    return np.datetime64(day, 'D')
+
+
+class ServiceState:
+    """Everything a query needs, loaded once; replaced wholesale on reload
+
+    Reviews are kept sorted by day with integer product / platform codes, so
+    a rating query is a binary search for the date range plus integer
+    compares over that slice.
+    """
+
+    def __init__(self, paths=CLEANED_PATHS, sales_path=SALES_PATH):
+        self.stamps = file_stamps(watched_paths(paths, sales_path))
+        started = time.perf_counter()
+        tables = {name: pd.read_csv(path, parse_dates=DATE_COLUMNS[name]) for name, path in paths.items()}
+        self.products, self.marketing, self.reviews = tables['products'], tables['marketing'], tables['reviews']
+
+        self.brands = brand_performance(self.reviews, self.products)
+        self.platforms = platform_bias(self.reviews)
+        self.channels = channel_efficiency(self.marketing)
+        lift = review_windows(self.reviews, self.marketing)
+        if sales_available(sales_path):
+            cube = load_daily_cube(self.products['product_id'], sales_path)
+            lift = lift.join(campaign_lift(self.marketing, cube).add_prefix('sales_'))
+        self.lift = self.marketing.set_index('campaign_id')[['product_id', 'channel', 'spend_idr']].join(lift)
+
+        reviews = self.reviews[self.reviews['date'].notna()].sort_values('date', kind='stable')
+        self.review_days = reviews['date'].to_numpy().astype('datetime64[D]')
+        self.review_ratings = reviews['rating'].to_numpy(dtype=float)
+        self.review_positive = (reviews['sentiment'] == 'Positive').to_numpy()
+        self.product_codes, self.product_labels = pd.factorize(reviews['product_id'])
+        self.platform_codes, self.platform_labels = pd.factorize(reviews['platform'])
+        brands = reviews['product_id'].map(self.products.set_index('product_id')['brand'])
+        self.brand_codes, self.brand_labels = pd.factorize(brands)
+        self.latest_day = self.review_days.max() if len(self.review_days) else np.datetime64('today', 'D')
+
+        self.loaded_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.load_seconds = time.perf_counter() - started
+
+    def _code(self, labels, value, name):
+        code = pd.Index(labels).get_indexer([value])[0]
+        if code < 0:
+            raise QueryError(f"unknown {name}: {value}")
+        return code
+
+    def period_bounds(self, period, asof=None):
+        """[start, end] days of the calendar month / quarter / year before asof"""
+        if period not in PERIODS:
+            raise QueryError(f"period must be one of {sorted(PERIODS)}")
+        current = pd.Period(pd.Timestamp(self.latest_day if asof is None else query_day(asof, 'asof')),
+                            freq=PERIODS[period])
+        previous = current - 1
+        return previous.start_time.to_datetime64(), previous.end_time.to_datetime64()
+
+    def ratings(self, product_id=None, platform=None, brand=None, start=None, end=None, period=None, asof=None):
+        if period:
+            start, end = self.period_bounds(period, asof)
+        start = None if start is None else query_day(start, 'start')
+        end = None if end is None else query_day(end, 'end')
+        lo = 0 if start is None else np.searchsorted(self.review_days, start)
+        hi = len(self.review_days) if end is None else np.searchsorted(self.review_days, end, side='right')
+        keep = np.ones(max(hi - lo, 0), dtype=bool)
+        for value, codes, labels, name in ((product_id, self.product_codes, self.product_labels, 'product_id'),
+                                           (platform, self.platform_codes, self.platform_labels, 'platform'),
+                                           (brand, self.brand_codes, self.brand_labels, 'brand')):
+            if value is not None:
+                keep &= codes[lo:hi] == self._code(labels, value, name)
+        ratings = self.review_ratings[lo:hi][keep]
+        rated = ~np.isnan(ratings)
+        return {
+            'filters': {'product_id': product_id, 'platform': platform, 'brand': brand},
+            'start': None if start is None else str(start),
+            'end': None if end is None else str(end),
+            'reviews': int(keep.sum()),
+            'avg_rating': float(ratings[rated].mean()) if rated.any() else None,
+            'positive_pct': float(self.review_positive[lo:hi][keep].mean() * 100) if keep.any() else None,
+        }
+
+    def spend(self, by='channel'):
+        marketing = self.marketing.assign(month=self.marketing['start_date'].dt.to_period('M').astype(str))
+        marketing = marketing.merge(self.products[['product_id', 'brand']], on='product_id', how='left')
+        if by not in ('channel', 'product_id', 'brand', 'month'):
+            raise QueryError("by must be one of channel, product_id, brand, month")
+        totals = marketing.groupby(by).agg(spend_idr=('spend_idr', 'sum'), campaigns=('campaign_id', 'count'),
+                                           avg_engagement=('engagement_rate', 'mean'))
+        return totals.sort_values('spend_idr', ascending=False)
+
+
+class QueryService:
+    """asyncio HTTP/1.1 server (GET, keep-alive) over a hot-reloaded ServiceState"""
+
+    def __init__(self, paths=CLEANED_PATHS, sales_path=SALES_PATH, poll_seconds=2.0):
+        self.paths = paths
+        self.sales_path = sales_path
+        self.poll_seconds = poll_seconds
+        self.state = ServiceState(paths, sales_path)
+        self.reloads = 0
+        self.routes = {
+            '/health': self.health,
+            '/brands': lambda q: records(self._filter(self.state.brands, q, 'brand')),
+            '/platforms': lambda q: records(self._filter(self.state.platforms, q, 'platform')),
+            '/channels': lambda q: records(self._filter(self.state.channels, q, 'channel')),
+            '/spend': lambda q: records(self.state.spend(q.get('by', 'channel'))),
+            '/campaigns/lift': self.lift,
+            '/ratings': lambda q: self.state.ratings(**{k: q.get(k) for k in (
+                'product_id', 'platform', 'brand', 'start', 'end', 'period', 'asof')}),
+        }
+
+    @staticmethod
+    def _filter(frame, query, key):
+        if key in query:
+            if query[key] not in frame.index:
+                raise QueryError(f"unknown {key}: {query[key]}")
+            return frame.loc[[query[key]]]
+        return frame
+
+    def health(self, query):
+        state = self.state
+        return {'status': 'ok', 'loaded_at': state.loaded_at, 'load_seconds': round(state.load_seconds, 3),
+                'reloads': self.reloads, 'rows': {'products': len(state.products),
+                                                  'marketing': len(state.marketing),
+                                                  'reviews': len(state.reviews)},
+                'sales_lift': any(c.startswith('sales_') for c in state.lift.columns)}
+
+    def lift(self, query):
+        lift = self.state.lift
+        for column in ('product_id', 'channel'):
+            if column in query:
+                lift = lift[lift[column] == query[column]]
+        return records(self._filter(lift, query, 'campaign_id'))
+
+    async def watch(self):
+        """Reload in a worker thread once the files changed and then held still for one poll"""
+        loop = asyncio.get_running_loop()
+        pending = None
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            stamps = file_stamps(watched_paths(self.paths, self.sales_path))
+            if stamps == self.state.stamps:
+                pending = None
+                continue
+            if stamps != pending or None in [stamps[name] for name in self.paths]:
+                # Still being written (or a cleaned file missing): wait for it to settle
+                pending = stamps
+                continue
+            try:
+                state = await loop.run_in_executor(None, ServiceState, self.paths, self.sales_path)
+            except Exception as error:
+                print(f"Reload failed, still serving data loaded at {self.state.loaded_at}: {error}")
+                pending = None
+                continue
+            self.state = state
+            self.reloads += 1
+            pending = None
+            print(f"Reloaded datasets in {state.load_seconds:.2f}s")
+
+    def respond(self, target):
+        """(status, payload) for one request target"""
+        url = urlsplit(target)
+        handler = self.routes.get(url.path.rstrip('/') or '/')
+        if handler is None:
+            return 404, {'error': f"unknown path {url.path}", 'paths': sorted(self.routes)}
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            return 200, handler(query)
+        except QueryError as error:
+            return 400, {'error': str(error)}
+        except Exception as error:
+            return 500, {'error': f"{type(error).__name__}: {error}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                parts = lines[0].split()
+                headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(':') for line in lines[1:] if line)}
+                if len(parts) != 3:
+                    status, payload = 400, {'error': 'malformed request line'}
+                elif parts[0] not in ('GET', 'HEAD'):
+                    status, payload = 405, {'error': f"method {parts[0]} not allowed"}
+                else:
+                    status, payload = self.respond(parts[1])
+                body = json.dumps(payload, default=_json_default).encode()
+                keep_alive = (len(parts) == 3 and parts[2] == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode())
+                if parts[:1] != ['HEAD']:
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        watcher = asyncio.create_task(self.watch())
+        print(f"Serving cleaned datasets on http://{host}:{port} (loaded in {self.state.load_seconds:.2f}s)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local JSON query service over the cleaned datasets")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--poll', type=float, default=2.0, help="seconds between file change checks")
+    args = parser.parse_args()
+    try:
+        asyncio.run(QueryService(poll_seconds=args.poll).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
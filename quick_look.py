@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Approximate quick-look reports (--approx mode)
+Streams a CSV once in chunks and summarises it with constant-memory sketches;
+every printed figure carries its error bound
+"""
+
+import pandas as pd
+import numpy as np
+
+from sketches import CountMinSketch, HyperLogLog, KLLSketch, Moments
+
+
+class QuickLook:
+    """Sketch state for one table: numeric distributions, distinct counts, top values"""
+
+    def __init__(self, numeric=(), distinct=(), heavy=(), k=200, p=14, width=2048):
+        self.rows = 0
+        self.moments = {col: Moments() for col in numeric}
+        self.quantiles = {col: KLLSketch(k) for col in numeric}
+        self.distinct = {col: HyperLogLog(p) for col in distinct}
+        self.heavy = {col: CountMinSketch(width) for col in heavy}
+
+    @property
+    def columns(self):
+        return list(dict.fromkeys([*self.moments, *self.distinct, *self.heavy]))
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for col in self.moments:
+            values = chunk[col].to_numpy(dtype=float)
+            self.moments[col].update(values)
+            self.quantiles[col].update(values)
+        for col, hll in self.distinct.items():
+            hll.update(chunk[col])
+        for col, cms in self.heavy.items():
+            cms.update(chunk[col])
+        return self
+
+
+def stream_quick_look(path, numeric=(), distinct=(), heavy=(), chunksize=100_000):
+    """Build a QuickLook for a CSV in a single chunked pass"""
+    summary = QuickLook(numeric, distinct, heavy)
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=summary.columns):
+        summary.update(chunk)
+    return summary
+
+
+def print_quick_look(title, summary, bins=5, top=5):
+    """Print describe() / value_counts(bins=...) / nunique / top-k approximations"""
+    print(f"\n📊 {title} (approximate, {summary.rows:,} rows, single pass):")
+    print("-" * 80)
+    for col, moments in summary.moments.items():
+        kll = summary.quantiles[col]
+        q25, q50, q75 = kll.quantile([0.25, 0.5, 0.75])
+        print(f"{col} distribution (quantiles ±{kll.error_bound:.1%} rank error):")
+        print(f"   count {moments.count:,}  mean {moments.mean:.2f}  std {moments.std:.2f}  "
+              f"min {moments.min:.2f}  max {moments.max:.2f}")
+        print(f"   25% {q25:.2f}  50% {q50:.2f}  75% {q75:.2f}")
+        if moments.count and bins:
+            # Same equal-width bins as value_counts(bins=...)
+            edges = np.linspace(moments.min, moments.max, bins + 1)
+            edges[0] -= (moments.max - moments.min) * 0.001
+            counts = kll.histogram(edges)
+            margin = 2 * kll.error_bound * moments.count
+            print(f"   Binned counts (±{margin:,.0f} per bin):")
+            for lo, hi, count in zip(edges[:-1], edges[1:], counts):
+                print(f"   ({lo:.3f}, {hi:.3f}]  ~{count:,.0f}")
+    for col, hll in summary.distinct.items():
+        print(f"Distinct {col}: ~{hll.estimate():,.0f} (±{hll.error_bound:.1%} std error)")
+    for col, cms in summary.heavy.items():
+        margin = cms.error_bound * cms.count
+        print(f"Top {col} (counts overestimate by at most {margin:,.0f}):")
+        for value, count in cms.most_common(top):
+            print(f"   '{value}' - ~{count:,} times ({count / max(cms.count, 1) * 100:.1f}%)")
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Golden-output regression harness for the pipeline and report scripts
+Runs data_cleaning_pipeline.py and the three report scripts in a scratch
+directory and captures what they produce: a checksum plus per-column numeric
+summaries of every *_cleaned.csv, and every printed number parsed into
+{section | line: values}. `capture` stores one such capture per baseline in
+regression_golden.json; `check` reruns the scripts under one or more engines
+(environment / flag variants that switch on alternate code paths) and reports
+every value that drifted from the engine's baseline beyond the tolerances.
+When sales.csv is only a Git LFS pointer, a small seeded sample is generated
+in its place, so the sales sections (and the paths they drive) always run
+
+    python regression_harness.py capture
+    python regression_harness.py check --engine default --engine out_of_core
+    python regression_harness.py check --env SALES_MEMORY_BUDGET=1MB --rtol 1e-6
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from collections import Counter, namedtuple
+
+import pandas as pd
+import numpy as np
+
+from sales_data import SALES_CHANNELS, SALES_PATH, sales_available
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(REPO, 'regression_golden.json')
+GOLDEN_VERSION = 2
+# Run in order: the report scripts read what the pipeline writes
+SCRIPTS = ['data_cleaning_pipeline.py', 'analysis.py', 'deeper_analysis.py', 'visualization_report.py']
+INPUTS = ['products.csv', 'marketing.csv', 'reviews.csv', SALES_PATH]
+OUTPUTS = ['reviews_cleaned.csv', 'marketing_cleaned.csv', 'products_cleaned.csv']
+# Lines whose numbers are measurements of the run, not results
+VOLATILE = [r'rows/s\b']
+# name -> environment overrides, extra arguments per script and the baseline
+# engine whose captured results it must reproduce. Every engine that is not
+# its own baseline switches on an alternate code path
+ENGINES = {
+    'default': {'env': {'REPORT_WORKERS': '1'}, 'args': {}, 'baseline': 'default'},
+    # Tiny budget: the sales cube's grouped sums spill to disk and re-partition
+    'out_of_core': {'env': {'REPORT_WORKERS': '1', 'SALES_MEMORY_BUDGET': '64KB'}, 'args': {},
+                    'baseline': 'default'},
+    # Resampling tests and pairwise batches run in a forked process pool
+    'parallel': {'env': {'REPORT_WORKERS': '4'}, 'args': {}, 'baseline': 'default'},
+    # Single-pass sketch quick look instead of the full reports
+    'approx': {'env': {'REPORT_WORKERS': '1'}, 'args': {'analysis.py': ['--approx'],
+                                                         'deeper_analysis.py': ['--approx']},
+               'baseline': 'approx'},
+}
+BASELINES = sorted({spec['baseline'] for spec in ENGINES.values()})
+SAMPLE_ROWS = 20_000
+SAMPLE_REGIONS = ['Bandung', 'Jakarta', 'Makassar', 'Medan', 'Semarang', 'Surabaya']
+
+Drift = namedtuple('Drift', ['kind', 'where', 'golden', 'actual'])
+
+_TOKEN = re.compile(
+    r'(?P<date>\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?)'
+    r'|(?<![\w.])(?P<number>[-+]?\d+(?:,\d{3})*(?:\.\d+)?(?:[eE][-+]?\d+)?|nan|inf)(?!\.?\w)'
+)
+_SEPARATOR = re.compile(r'^\s*([=\-─━])\1{9,}\s*$')
+
+
+def parse_metrics(text, volatile=VOLATILE):
+    """Printed output -> {'section | line with numbers as #': [number strings]}
+
+    The section is the last line underlined by a ==== / ---- rule. Numbers
+    keep their printed form so comparisons know the printed precision;
+    dates and identifiers (PC001) stay part of the key. Repeated keys within
+    a section get a ' [n]' suffix; lines matching a volatile pattern are skipped.
+    """
+    metrics = {}
+    seen = Counter()
+    section = ''
+    previous = ''
+    for line in text.splitlines():
+        if _SEPARATOR.match(line):
+            if previous.strip() and not _SEPARATOR.match(previous):
+                section = ' '.join(_TOKEN.sub(_key_token, previous).split())
+            previous = line
+            continue
+        previous = line
+        if not line.strip() or any(re.search(pattern, line) for pattern in volatile):
+            continue
+        values = [m.group('number') for m in _TOKEN.finditer(line) if m.group('number')]
+        key = f"{section} | {' '.join(_TOKEN.sub(_key_token, line).split())}"
+        seen[key] += 1
+        if seen[key] > 1:
+            key = f"{key} [{seen[key]}]"
+        metrics[key] = values
+    return metrics
+
+
+def _key_token(match):
+    return match.group('date') or '#'
+
+
+def _number(text):
+    return float(text.replace(',', ''))
+
+
+def _decimals(text):
+    mantissa = text.lower().split('e')[0]
+    return len(mantissa.split('.')[1]) if '.' in mantissa else 0
+
+
+def file_digest(path):
+    """sha256, shape and per-column fingerprints of a CSV output"""
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+    columns = {}
+    for col in frame.columns:
+        text = frame[col]
+        numeric = pd.to_numeric(text.replace('', np.nan), errors='coerce')
+        entry = {'sha256': hashlib.sha256('\n'.join(text).encode()).hexdigest()}
+        if numeric.notna().sum() == (text != '').sum() and numeric.notna().any():
+            entry.update(count=int(numeric.notna().sum()), sum=float(numeric.sum()),
+                         min=float(numeric.min()), max=float(numeric.max()))
+        columns[col] = entry
+    return {'sha256': digest, 'rows': len(frame), 'columns': columns}
+
+
+def write_sample_sales(path, products_path, rows=SAMPLE_ROWS, seed=0):
+    """Seeded stand-in for sales.csv with the real file's columns and value rules
+
+    Dates span 2020-2025 whatever the launch date, so some rows are pre-launch
+    (a validation warning), and a few transaction_ids repeat (rejected).
+    """
+    rng = np.random.default_rng(seed)
+    products = pd.read_csv(products_path, parse_dates=['launch_date'])
+    pick = rng.integers(0, len(products), rows)
+    dates = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 2192, rows), unit='D')
+    discount = rng.choice([0, 5, 10, 15, 20], rows)
+    units = rng.integers(1, 20, rows)
+    price = products['base_price'].to_numpy(dtype=float)[pick] * (100 - discount) / 100
+    ids = rng.integers(0, 256, (rows, 16), dtype=np.uint8)
+    ids[rng.choice(rows, rows // 1000, replace=False)] = ids[rng.choice(rows, rows // 1000, replace=False)]
+    hexes = [row.tobytes().hex() for row in ids]
+    pd.DataFrame({
+        'transaction_id': [f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}" for h in hexes],
+        'date': dates.strftime('%Y-%m-%d'),
+        'product_id': products['product_id'].to_numpy()[pick],
+        'region': rng.choice(SAMPLE_REGIONS, rows),
+        'channel': rng.choice(SALES_CHANNELS, rows),
+        'units_sold': units,
+        'avg_price': price,
+        'discount_pct': discount,
+        'revenue': units * price,
+        'days_since_launch': (dates - products['launch_date'].to_numpy()[pick]).days,
+    }).to_csv(path, index=False)
+
+
+def run_scripts(engine=None, env=None, scripts=SCRIPTS, workdir=None, volatile=VOLATILE):
+    """Run the scripts in a scratch directory and capture their outputs
+
+    engine names an ENGINES entry; env adds further environment overrides.
+    The raw inputs are linked in, so the repo's own files are never written.
+    """
+    spec = ENGINES[engine or 'default']
+    run_env = dict(os.environ, **spec['env'], **(env or {}))
+    run_env['PYTHONHASHSEED'] = '0'
+    real_sales = sales_available(os.path.join(REPO, SALES_PATH))
+    with tempfile.TemporaryDirectory(dir=workdir) as scratch:
+        for name in INPUTS:
+            if os.path.exists(os.path.join(REPO, name)) and (name != SALES_PATH or real_sales):
+                os.symlink(os.path.join(REPO, name), os.path.join(scratch, name))
+        if not real_sales:
+            write_sample_sales(os.path.join(scratch, SALES_PATH), os.path.join(REPO, 'products.csv'))
+        captured = {'engine': engine or 'default', 'env': {**spec['env'], **(env or {})},
+                    'sales': SALES_PATH if real_sales else f'sample ({SAMPLE_ROWS:,} rows)',
+                    'versions': {'python': sys.version.split()[0], 'pandas': pd.__version__,
+                                 'numpy': np.__version__},
+                    'scripts': {}, 'files': {}}
+        for script in scripts:
+            proc = subprocess.run([sys.executable, os.path.join(REPO, script), *spec['args'].get(script, [])],
+                                  cwd=scratch, env=run_env, capture_output=True, text=True)
+            captured['scripts'][script] = {'returncode': proc.returncode,
+                                           'metrics': parse_metrics(proc.stdout, volatile)}
+            if proc.returncode:
+                captured['scripts'][script]['stderr'] = proc.stderr[-2000:]
+        for name in OUTPUTS:
+            path = os.path.join(scratch, name)
+            captured['files'][name] = file_digest(path) if os.path.exists(path) else None
+    return captured
+
+
+def _close(golden, actual, rtol, atol, slack=0.0):
+    if math.isnan(golden) or math.isnan(actual):
+        return math.isnan(golden) and math.isnan(actual)
+    return abs(actual - golden) <= atol + rtol * abs(golden) + slack
+
+
+def compare(golden, candidate, rtol=1e-9, atol=0.0, rounding_slack=True):
+    """Drift records between two captures (an empty list means equivalent)
+
+    With rounding_slack, printed values may also differ by one unit in their
+    last printed decimal: that is all a sum moving by 1e-12 needs to round the
+    other way, and printed values cannot tell such a flip from a real change.
+    """
+    drifts = []
+    for script, expected in golden['scripts'].items():
+        actual = candidate['scripts'].get(script)
+        if actual is None:
+            drifts.append(Drift('script missing', script, None, None))
+            continue
+        if actual['returncode'] != expected['returncode']:
+            drifts.append(Drift('exit code', script, expected['returncode'],
+                                f"{actual['returncode']}: {actual.get('stderr', '').strip()[-300:]}"))
+        got = actual['metrics']
+        for key, values in expected['metrics'].items():
+            where = f"{script}: {key}"
+            if key not in got:
+                drifts.append(Drift('missing line', where, values, None))
+            elif len(got[key]) != len(values):
+                drifts.append(Drift('value count', where, values, got[key]))
+            else:
+                for want, have in zip(values, got[key]):
+                    slack = 10.0 ** -_decimals(want) if rounding_slack and '.' in want else 0.0
+                    if not _close(_number(want), _number(have), rtol, atol, slack):
+                        drifts.append(Drift('value', where, want, have))
+        for key in got.keys() - expected['metrics'].keys():
+            drifts.append(Drift('new line', f"{script}: {key}", None, got[key]))
+
+    for name, expected in golden['files'].items():
+        actual = candidate['files'].get(name)
+        if expected is None or actual is None:
+            if (expected is None) != (actual is None):
+                drifts.append(Drift('file', name, expected and 'present', actual and 'present'))
+            continue
+        if expected['sha256'] == actual['sha256']:
+            continue
+        if expected['rows'] != actual['rows']:
+            drifts.append(Drift('rows', name, expected['rows'], actual['rows']))
+        if list(expected['columns']) != list(actual['columns']):
+            drifts.append(Drift('columns', name, list(expected['columns']), list(actual['columns'])))
+        for col, want in expected['columns'].items():
+            have = actual['columns'].get(col)
+            if have is None or want['sha256'] == have['sha256']:
+                continue
+            if 'sum' not in want or 'sum' not in have:
+                drifts.append(Drift('column values', f"{name}: {col}", want['sha256'][:12], have['sha256'][:12]))
+                continue
+            for stat in ('count', 'sum', 'min', 'max'):
+                if not _close(want[stat], have[stat], rtol, atol):
+                    drifts.append(Drift(f'column {stat}', f"{name}: {col}", want[stat], have[stat]))
+    return drifts
+
+
+def print_report(drifts, label):
+    if not drifts:
+        print(f"✓ {label}: no drift")
+        return
+    print(f"✗ {label}: {len(drifts)} drift(s)")
+    for drift in drifts:
+        print(f"  [{drift.kind}] {drift.where}")
+        if drift.golden is not None or drift.actual is not None:
+            print(f"      golden: {drift.golden}")
+            print(f"      actual: {drift.actual}")
+
+
+def _env_pairs(pairs):
+    env = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition('=')
+        env[key] = value
+    return env
+
+
+def _load(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != GOLDEN_VERSION:
+        sys.exit(f"{path} was written by another harness version - recapture it")
+    return data
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Golden-output regression harness")
+    commands = parser.add_subparsers(dest='command', required=True)
+    capture = commands.add_parser('capture', help="record the current outputs as the golden file")
+    capture.add_argument('--output', default=GOLDEN_PATH)
+    check = commands.add_parser('check', help="rerun the scripts and compare with the golden file")
+    check.add_argument('--golden', default=GOLDEN_PATH)
+    check.add_argument('--engine', action='append', choices=sorted(ENGINES),
+                       help="engine(s) to check (default: all)")
+    check.add_argument('--env', action='append', metavar='KEY=VALUE',
+                       help="extra environment override for the run")
+    check.add_argument('--save', metavar='DIR', help="also write each candidate capture to DIR/<engine>.json")
+    diff = commands.add_parser('compare', help="compare two saved captures")
+    diff.add_argument('golden')
+    diff.add_argument('candidate')
+    for sub in (check, diff):
+        sub.add_argument('--rtol', type=float, default=1e-9)
+        sub.add_argument('--atol', type=float, default=0.0)
+        sub.add_argument('--strict-print', action='store_true',
+                         help="no one-unit rounding slack on printed values")
+    args = parser.parse_args()
+
+    if args.command == 'capture':
+        captures = {}
+        for baseline in BASELINES:
+            captured = run_scripts(baseline)
+            failed = [s for s, out in captured['scripts'].items() if out['returncode']]
+            if failed:
+                sys.exit(f"not capturing: {', '.join(failed)} failed under {baseline}")
+            captures[baseline] = captured
+        with open(args.output, 'w') as f:
+            json.dump({'version': GOLDEN_VERSION, 'baselines': captures}, f, indent=1, ensure_ascii=False,
+                      sort_keys=True)
+            f.write('\n')
+        n_metrics = sum(len(out['metrics']) for captured in captures.values()
+                        for out in captured['scripts'].values())
+        print(f"✓ Captured {n_metrics} output lines from {len(SCRIPTS)} scripts under "
+              f"{', '.join(BASELINES)} to {args.output}")
+        sys.exit(0)
+
+    if args.command == 'compare':
+        golden, candidate = _load(args.golden), _load(args.candidate)
+        golden = golden['baselines'][ENGINES[candidate['engine']]['baseline']] if 'baselines' in golden else golden
+        drifts = compare(golden, candidate, args.rtol, args.atol, not args.strict_print)
+        print_report(drifts, args.candidate)
+        sys.exit(1 if drifts else 0)
+
+    goldens = _load(args.golden)['baselines']
+    failed = False
+    for engine in args.engine or list(ENGINES):
+        golden = goldens[ENGINES[engine]['baseline']]
+        candidate = run_scripts(engine, _env_pairs(args.env))
+        if args.save:
+            os.makedirs(args.save, exist_ok=True)
+            with open(os.path.join(args.save, f'{engine}.json'), 'w') as f:
+                json.dump({'version': GOLDEN_VERSION, **candidate}, f, indent=1, ensure_ascii=False, sort_keys=True)
+        if candidate['sales'] != golden['sales']:
+            print(f"! sales input differs from the golden capture ({golden['sales']} -> "
+                  f"{candidate['sales']}); sales sections will show as drift")
+        drifts = compare(golden, candidate, args.rtol, args.atol, not args.strict_print)
+        print_report(drifts, f"engine {engine}")
+        failed = failed or bool(drifts)
+    sys.exit(1 if failed else 0)
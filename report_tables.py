@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Report-section tables shared by analysis.py and query_service.py
+Brand performance, platform rating bias and channel efficiency, computed the
+same way whether printed by the report or served as JSON
+"""
+
+import pandas as pd
+import numpy as np
+
+from correlation_engine import campaign_roi
+from grouped import group_share
+
+
+def brand_performance(reviews, products):
+    """Average rating, review count and % positive per brand, best rated first"""
+    brands = reviews['product_id'].map(products.set_index('product_id')['brand']).rename('brand')
+    stats = reviews['rating'].groupby(brands).agg(['mean', 'count'])
+    stats.columns = ['avg_rating', 'total_reviews']
+    stats['positive_pct'] = group_share(brands, reviews['sentiment'], 'Positive') * 100
+    return stats.round(2).sort_values('avg_rating', ascending=False)
+
+
+def platform_bias(reviews):
+    """Rating mean / std / count per review platform, highest mean first"""
+    bias = reviews.groupby('platform')['rating'].agg(['mean', 'std', 'count']).round(2)
+    return bias.sort_values('mean', ascending=False)
+
+
+def channel_efficiency(marketing):
+    """Spend, engagement, campaign count and cost per engagement per channel"""
+    marketing = marketing.assign(cost_per_engagement=campaign_roi(marketing))
+    efficiency = marketing.groupby('channel').agg({
+        'spend_idr': 'sum',
+        'engagement_rate': 'mean',
+        'campaign_id': 'count',
+        'cost_per_engagement': 'mean'
+    }).round(2)
+    efficiency.columns = ['total_spend', 'avg_engagement', 'num_campaigns', 'avg_cost_per_engagement']
+    return efficiency.sort_values('avg_engagement', ascending=False)
+
+
+def review_windows(reviews, marketing, window=30):
+    """Review count and average rating before / during / after every campaign
+
+    Reviews are sorted by (product, day) once; each window is then two binary
+    searches inside its product's block instead of a filter over all reviews.
+    Rating sums add up each window's own slice (differencing a running total
+    over every review would leave float noise in the means).
+    """
+    reviews = reviews[reviews['date'].notna()]
+    products, product_ids = pd.factorize(reviews['product_id'])
+    days = reviews['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    first_day = days.min() if len(days) else 0
+    order = np.lexsort((days, products))
+    # One sortable key per review: product in the high bits, day offset in the low
+    keys = products[order].astype(np.int64) * (1 << 32) + (days[order] - first_day)
+    ratings = reviews['rating'].to_numpy(dtype=float)[order]
+    rated = np.concatenate([[0], np.cumsum(~np.isnan(ratings))])
+    # Trailing zero so a window ending at the last review is a valid reduceat index
+    padded = np.append(np.nan_to_num(ratings), 0.0)
+
+    campaign_products = pd.Index(product_ids).get_indexer(marketing['product_id']).astype(np.int64)
+    start = marketing['start_date'].to_numpy().astype('datetime64[D]').astype(np.int64) - first_day
+    end = marketing['end_date'].to_numpy().astype('datetime64[D]').astype(np.int64) - first_day
+    base = campaign_products * (1 << 32)
+    # Inclusive [first, last] days, as in the report: before ends the day ahead of the start
+    bounds = {'before': (start - window, start - 1), 'during': (start, end), 'after': (end + 1, end + window)}
+
+    result = pd.DataFrame(index=pd.Index(marketing['campaign_id'], name='campaign_id'))
+    for name, (first, last) in bounds.items():
+        # Clamped so a window never reaches into the previous product's block
+        lo = np.searchsorted(keys, base + np.maximum(first, 0), side='left')
+        hi = np.maximum(np.searchsorted(keys, base + np.maximum(last, -1), side='right'), lo)
+        hi = np.where(campaign_products >= 0, hi, lo)
+        count = rated[hi] - rated[lo]
+        sums = np.add.reduceat(padded, np.column_stack([lo, hi]).ravel())[::2] if len(lo) else np.zeros(0)
+        result[f'{name}_reviews'] = hi - lo
+        result[f'{name}_rating'] = np.where(count > 0, sums / np.maximum(count, 1), np.nan)
+    return result
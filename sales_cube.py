@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Daily sales cube: revenue, units and discount per product x region x channel x day
+Built in one chunked pass over sales.csv (grouped sums go through the
+memory-bounded out_of_core.ExternalGroupBy) and cached to sales_daily.npz, so
+engines that need daily series (campaign lift, cannibalization, forecasting)
+slice arrays instead of filtering the 1M-row transaction table. Only the
+product x region x channel series that have sales are stored, so memory grows
+with the series that occur rather than with every combination
+"""
+
+import os
+
+import pandas as pd
+import numpy as np
+
+from out_of_core import MEMORY_BUDGET, ExternalGroupBy
+from quality_metrics import file_signature
+from sales_data import SALES_CHANNELS, SALES_PATH, iter_sales
+
+CACHE_PATH = 'sales_daily.npz'
+CACHE_VERSION = 3
+# Axes of one stored series
+KEYS = ['product', 'region', 'channel']
+# measure -> how each sale contributes to it
+MEASURES = {
+    'revenue': lambda chunk: chunk['revenue'],
+    'units': lambda chunk: chunk['units_sold'],
+    'discount_units': lambda chunk: chunk['units_sold'] * chunk['discount_pct'],
+}
+
+
+class _Labels:
+    """Grow-only label -> code mapping shared across chunks"""
+
+    def __init__(self, labels=()):
+        self.labels = list(labels)
+
+    def codes(self, values):
+        index = pd.Index(self.labels)
+        codes = index.get_indexer(values)
+        missing = codes < 0
+        if missing.any():
+            self.labels.extend(pd.unique(np.asarray(values)[missing]))
+            codes = pd.Index(self.labels).get_indexer(values)
+        return codes
+
+
+class DailyCube:
+    """Daily measures for the product x region x channel series that have sales
+
+    Only series that occur are stored: `keys` holds the product / region /
+    channel codes of each row of the (series, days) arrays revenue, units and
+    discount_units (units x discount_pct, so the units-weighted discount is
+    discount_units / units), sorted by product; product_offsets() indexes
+    each product's rows. Day d covers start + d days. Products follow
+    products.csv; sales for unknown product_ids are dropped.
+    """
+
+    def __init__(self, product_ids, regions, channels, start, keys, revenue, units, discount_units):
+        self.product_ids = pd.Index(product_ids)
+        self.regions = pd.Index(regions)
+        self.channels = pd.Index(channels)
+        self.start = np.datetime64(start, 'D')
+        self.keys = pd.DataFrame({name: np.asarray(keys[name], dtype=np.int64) for name in KEYS})
+        self.revenue = revenue
+        self.units = units
+        self.discount_units = discount_units
+
+    @property
+    def n_days(self):
+        return self.revenue.shape[-1]
+
+    @property
+    def dates(self):
+        return pd.date_range(pd.Timestamp(self.start), periods=self.n_days, freq='D')
+
+    def day_index(self, dates):
+        """Day offsets of dates (may fall outside [0, n_days))"""
+        return (pd.to_datetime(dates).to_numpy().astype('datetime64[D]') - self.start).astype(np.int64)
+
+    def _groups(self, by):
+        """(group of each stored series, key codes per group) for the product axis plus `by`"""
+        names = ['product'] + [name for name in ('region', 'channel') if name in by]
+        if names == ['product']:
+            # Every product gets a row, with or without sales, so rows line up with product_ids
+            return self.keys['product'].to_numpy(), {'product': np.arange(len(self.product_ids))}
+        if names == KEYS:
+            return np.arange(len(self.keys)), {name: self.keys[name].to_numpy() for name in KEYS}
+        shape = tuple(len(labels) for labels in (self.product_ids, self.regions, self.channels))
+        shape = tuple(size for size, name in zip(shape, KEYS) if name in names)
+        combined = np.ravel_multi_index(tuple(self.keys[name].to_numpy() for name in names), shape)
+        unique, groups = np.unique(combined, return_inverse=True)
+        return groups, dict(zip(names, np.unravel_index(unique, shape)))
+
+    def series(self, measure='units', by=()):
+        """(rows, days) daily totals: one row per product, or per series_index(by) row
+
+        With no `by` every product has a row (in product_ids order); adding
+        'region' / 'channel' keeps only the combinations that have sales.
+        """
+        data = getattr(self, measure)
+        groups, codes = self._groups(by)
+        if list(codes) == KEYS:
+            return data
+        out = np.zeros((len(codes['product']), data.shape[1]))
+        if len(groups):
+            order = np.argsort(groups, kind='stable')
+            groups = groups[order]
+            starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+            out[groups[starts]] = np.add.reduceat(data[order], starts, axis=0)
+        return out
+
+    def series_index(self, by=()):
+        """Labels of the series(measure, by) rows"""
+        _, codes = self._groups(by)
+        if list(codes) == ['product']:
+            return pd.Index(self.product_ids, name='product_id')
+        labels = {'product': self.product_ids, 'region': self.regions, 'channel': self.channels}
+        return pd.MultiIndex.from_arrays([labels[name][codes[name]] for name in codes],
+                                         names=['product_id' if name == 'product' else name for name in codes])
+
+    def product_offsets(self, by=()):
+        """Product p owns rows offsets[p]:offsets[p + 1] of series(measure, by)"""
+        _, codes = self._groups(by)
+        return np.searchsorted(codes['product'], np.arange(len(self.product_ids) + 1))
+
+    def avg_discount(self, by=()):
+        """Units-weighted daily discount_pct (NaN on days without sales)"""
+        units = self.series('units', by)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(units > 0, self.series('discount_units', by) / units, np.nan)
+
+    @classmethod
+    def from_sales(cls, product_ids, path=SALES_PATH, chunksize=250_000, memory_budget=MEMORY_BUDGET):
+        """Stream sales.csv once, summing every measure per (product, region, channel, day)"""
+        products = pd.Index(product_ids)
+        regions = _Labels()
+        channels = _Labels(SALES_CHANNELS)
+        groups = ExternalGroupBy(KEYS + ['day'], list(MEASURES), memory_budget)
+        for chunk in iter_sales(path, chunksize, usecols=['date', 'product_id', 'region', 'channel',
+                                                           'units_sold', 'discount_pct', 'revenue']):
+            p = products.get_indexer(chunk['product_id'])
+            known = p >= 0
+            chunk = chunk[known]
+            groups.add({
+                'product': p[known],
+                'region': regions.codes(chunk['region']),
+                'channel': channels.codes(chunk['channel']),
+                'day': chunk['date'].to_numpy().astype('datetime64[D]').astype(np.int64),
+                **{name: weight(chunk).to_numpy(dtype=float) for name, weight in MEASURES.items()},
+            })
+        cells = groups.result()
+
+        if not len(cells):
+            keys = {name: np.zeros(0, dtype=np.int64) for name in KEYS}
+            return cls(products, [], channels.labels, np.datetime64(0, 'D'), keys,
+                       *(np.zeros((0, 0)) for _ in MEASURES))
+
+        day = cells['day'].to_numpy()
+        first_day = int(day.min())
+        n_days = int(day.max()) - first_day + 1
+        # Regions in sorted order so the layout does not depend on row order
+        region_labels = np.asarray(regions.labels, dtype=object)
+        region_order = np.argsort(region_labels, kind='stable')
+        region_rank = np.argsort(region_order)
+        shape = (len(products), len(region_labels), len(channels.labels))
+        combined = np.ravel_multi_index((cells['product'].to_numpy(), region_rank[cells['region'].to_numpy()],
+                                         cells['channel'].to_numpy()), shape)
+        # One row per series that has sales, in (product, region, channel) order
+        unique, rows = np.unique(combined, return_inverse=True)
+        flat = rows * n_days + (day - first_day)
+        size = len(unique) * n_days
+        measures = [np.bincount(flat, weights=cells[name].to_numpy(), minlength=size).reshape(len(unique), n_days)
+                    for name in MEASURES]
+        keys = dict(zip(KEYS, np.unravel_index(unique, shape)))
+        return cls(products, region_labels[region_order], channels.labels,
+                   np.datetime64(first_day, 'D'), keys, *measures)
+
+    def save(self, path, signature=None):
+        np.savez(path, version=CACHE_VERSION, product_ids=np.asarray(self.product_ids, dtype=str),
+                 regions=np.asarray(self.regions, dtype=str), channels=np.asarray(self.channels, dtype=str),
+                 start=self.start, **{f"key_{name}": self.keys[name].to_numpy() for name in KEYS},
+                 **{name: getattr(self, name) for name in MEASURES},
+                 signature=np.asarray(repr(sorted((signature or {}).items()))))
+
+    @classmethod
+    def load(cls, path):
+        """(cube, signature key) from a cache file, (None, None) if written by another version"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != CACHE_VERSION:
+                return None, None
+            cube = cls(data['product_ids'], data['regions'], data['channels'], data['start'],
+                       {name: data[f"key_{name}"] for name in KEYS}, *(data[name] for name in MEASURES))
+            return cube, str(data['signature'])
+
+
+def load_daily_cube(product_ids, path=SALES_PATH, cache_path=CACHE_PATH, chunksize=250_000,
+                    memory_budget=MEMORY_BUDGET):
+    """Daily cube for product_ids, served from the cache while sales.csv is unchanged"""
+    signature = file_signature(path)
+    key = repr(sorted(signature.items()))
+    if cache_path and os.path.exists(cache_path):
+        cube, cached_key = DailyCube.load(cache_path)
+        if cube is not None and cached_key == key and list(cube.product_ids) == list(product_ids):
+            return cube
+    cube = DailyCube.from_sales(product_ids, path, chunksize, memory_budget)
+    if cache_path:
+        cube.save(cache_path, signature)
+    return cube
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Shared access to sales.csv (~1,000,000 rows)
+The file is stored in Git LFS, so a fresh checkout may only contain the pointer;
+callers check sales_available() and skip sales sections when it is missing
+"""
+
+import os
+
+import pandas as pd
+import numpy as np
+
+from out_of_core import MEMORY_BUDGET, group_sums
+
+SALES_PATH = 'sales.csv'
+SALES_CHANNELS = ['Shopee', 'Tokopedia', 'Official Store', 'Alfamart', 'Indomaret', 'Hypermarket']
+
+
+def is_lfs_pointer(path):
+    """True if the file is a Git LFS pointer rather than the real data"""
+    with open(path, 'rb') as f:
+        return f.read(64).startswith(b'version https://git-lfs')
+
+
+def sales_available(path=SALES_PATH):
+    return os.path.exists(path) and not is_lfs_pointer(path)
+
+
+def iter_sales(path=SALES_PATH, chunksize=250_000, usecols=None, parse_dates=True):
+    """Stream sales.csv in chunks, parsing the date column when it is read"""
+    dates = ['date'] if parse_dates and (usecols is None or 'date' in usecols) else None
+    yield from pd.read_csv(path, chunksize=chunksize, usecols=usecols, parse_dates=dates)
+
+
+def product_totals(product_ids, path=SALES_PATH, chunksize=250_000, memory_budget=MEMORY_BUDGET):
+    """Revenue and units per product in one streamed pass (aligned to product_ids)"""
+    index = pd.Index(product_ids)
+
+    def chunks():
+        for chunk in iter_sales(path, chunksize, usecols=['product_id', 'units_sold', 'revenue']):
+            codes = index.get_indexer(chunk['product_id'])
+            known = codes >= 0
+            yield {'product': codes[known], 'sales_revenue': chunk['revenue'].to_numpy(dtype=float)[known],
+                   'sales_units': chunk['units_sold'].to_numpy(dtype=float)[known]}
+
+    totals = group_sums(chunks(), ['product'], ['sales_revenue', 'sales_units'], memory_budget)
+    sums = np.zeros((len(index), 2))
+    sums[totals['product'].to_numpy()] = totals[['sales_revenue', 'sales_units']].to_numpy()
+    return pd.DataFrame(sums, index=index, columns=['sales_revenue', 'sales_units'])
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Row-level validation of sales.csv
+Every row gets a bit flag per failed rule (revenue invariant, days_since_launch
+recomputed from products.launch_date, pre-launch sale, channel / region domain,
+product key, discount and quantity ranges, duplicate or malformed
+transaction_id), computed with whole-column operations one chunk at a time.
+Rows failing a rule go to a compact gzip reject file: data row number,
+transaction_id, flag_bits and reason names. Warnings (pre-launch sales) are
+only counted: they never reject a row and are left out of the reject file
+"""
+
+import os
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import numpy as np
+
+from dedup import DuplicateTracker, PartitionedDuplicates, fits_in_memory, parse_uuids
+from sales_data import SALES_CHANNELS, SALES_PATH, iter_sales
+
+REJECT_PATH = 'sales_rejects.csv.gz'
+# In-memory duplicate tracking costs ~40 bytes per row, a CSV row is ~100 bytes
+KEY_BYTES_PER_FILE_BYTE = 0.4
+
+REASONS = OrderedDict([
+    ('revenue_mismatch', 1 << 0),
+    ('days_since_launch_mismatch', 1 << 1),
+    ('pre_launch_sale', 1 << 2),
+    ('unknown_product', 1 << 3),
+    ('unknown_channel', 1 << 4),
+    ('blank_region', 1 << 5),
+    ('bad_discount', 1 << 6),
+    ('bad_quantity', 1 << 7),
+    ('duplicate_transaction', 1 << 8),
+    ('bad_id', 1 << 9),
+])
+# Counted but not rejected: the README defines negative days_since_launch as
+# sales before launch (pre-orders / teasers), valid rows like pre-launch reviews
+WARNINGS = ['pre_launch_sale']
+REJECT_BITS = sum(bit for name, bit in REASONS.items() if name not in WARNINGS)
+
+
+def reason_names(flags):
+    """'a;b' reason strings for an array of flag bitmasks"""
+    flags = np.asarray(flags)
+    values, inverse = np.unique(flags, return_inverse=True)
+    names = np.array([';'.join(name for name, bit in REASONS.items() if value & bit) for value in values],
+                     dtype=object)
+    return names[inverse.ravel()]
+
+
+class SalesValidator:
+    """Stateful chunk validator (duplicate IDs are tracked across chunks)
+
+    revenue must equal units_sold * avg_price within rtol / atol (IDR);
+    days_since_launch must equal date - launch_date exactly; transaction_id
+    must be a canonical UUID in either hex case (README spec), missing or
+    malformed IDs are flagged bad_id. IDs that differ only in case are
+    duplicates. With external_duplicates, transaction_ids are spilled to
+    disk instead and the duplicates are only known after the last chunk (see
+    finish_duplicates).
+    """
+
+    def __init__(self, lookup, channels=SALES_CHANNELS, rtol=1e-6, atol=0.5, external_duplicates=False):
+        self.lookup = lookup
+        self.channels = pd.Index(channels)
+        self.rtol = rtol
+        self.atol = atol
+        self.seen = PartitionedDuplicates() if external_duplicates else DuplicateTracker()
+        self.rows = 0
+        self.counts = OrderedDict((name, 0) for name in REASONS)
+        self.seconds = 0.0
+
+    def validate(self, chunk):
+        """Flag bitmask per row of one sales chunk (date already parsed)"""
+        started = time.perf_counter()
+        flags = np.zeros(len(chunk), dtype=np.uint16)
+
+        def flag(name, mask):
+            mask = np.asarray(mask, dtype=bool)
+            flags[mask] |= REASONS[name]
+            self.counts[name] += int(mask.sum())
+
+        units = chunk['units_sold'].to_numpy(dtype=float)
+        price = chunk['avg_price'].to_numpy(dtype=float)
+        revenue = chunk['revenue'].to_numpy(dtype=float)
+        flag('revenue_mismatch', ~np.isclose(revenue, units * price, rtol=self.rtol, atol=self.atol))
+
+        codes = self.lookup.codes(chunk['product_id'])
+        known = codes >= 0
+        launch = self.lookup.launch_dates(codes).astype('datetime64[D]')
+        expected = (chunk['date'].to_numpy().astype('datetime64[D]') - launch).astype(np.int64)
+        stored = chunk['days_since_launch'].to_numpy(dtype=float)
+        flag('days_since_launch_mismatch', known & (stored != expected))
+        flag('pre_launch_sale', known & (expected < 0))
+        flag('unknown_product', ~known)
+
+        flag('unknown_channel', self.channels.get_indexer(chunk['channel']) < 0)
+        # Strip / compare the few distinct regions, not every row; code -1 (NaN)
+        # picks the trailing True
+        region_codes, regions = pd.factorize(chunk['region'])
+        blank = np.append(np.asarray(regions.astype(str).str.strip() == '', dtype=bool), True)
+        flag('blank_region', blank[region_codes])
+
+        discount = chunk['discount_pct'].to_numpy(dtype=float)
+        flag('bad_discount', ~((discount >= 0) & (discount < 100)))
+        flag('bad_quantity', ~((units > 0) & (price > 0)))
+        # Duplicates are checked among well-formed IDs only, the same way in
+        # both modes; malformed ones are already rejected as bad_id
+        ids = np.asarray(chunk['transaction_id'], dtype=object)
+        words, valid = parse_uuids(ids)
+        flag('bad_id', ~valid)
+        if isinstance(self.seen, PartitionedDuplicates):
+            self.seen.add(ids, (words, valid), keep=valid)
+        elif valid.all():
+            flag('duplicate_transaction', self.seen.update(ids, (words, valid)))
+        else:
+            repeated = np.zeros(len(ids), dtype=bool)
+            repeated[valid] = self.seen.update(ids[valid], (words[valid], valid[valid]))
+            flag('duplicate_transaction', repeated)
+
+        self.rows += len(chunk)
+        self.seconds += time.perf_counter() - started
+        return flags
+
+    def finish_duplicates(self):
+        """(rows, transaction_ids) of duplicates found by the external pass"""
+        started = time.perf_counter()
+        rows, ids = self.seen.finish()
+        self.counts['duplicate_transaction'] += len(rows)
+        self.seconds += time.perf_counter() - started
+        return rows, ids
+
+
+def validate_sales(lookup, path=SALES_PATH, reject_path=REJECT_PATH, chunksize=250_000,
+                   external_duplicates=None, **options):
+    """Validate sales.csv chunk by chunk and write the rejected rows
+
+    external_duplicates=None picks the on-disk duplicate pass when the
+    transaction_id keys would not comfortably fit in memory. Returns the
+    SalesValidator, whose counts / rows / seconds summarise the run.
+    """
+    if external_duplicates is None:
+        external_duplicates = not fits_in_memory(os.path.getsize(path) * KEY_BYTES_PER_FILE_BYTE)
+    validator = SalesValidator(lookup, external_duplicates=external_duplicates, **options)
+    rejects = []
+    offset = 0
+    for chunk in iter_sales(path, chunksize):
+        flags = validator.validate(chunk)
+        bad = np.flatnonzero(flags & REJECT_BITS)
+        rejects.append(pd.DataFrame({
+            'row': bad + offset,
+            'transaction_id': chunk['transaction_id'].to_numpy()[bad],
+            'flag_bits': flags[bad] & REJECT_BITS,
+        }))
+        offset += len(chunk)
+
+    if external_duplicates:
+        rows, ids = validator.finish_duplicates()
+        rejects.append(pd.DataFrame({'row': rows, 'transaction_id': ids,
+                                     'flag_bits': np.full(len(rows), REASONS['duplicate_transaction'], np.uint16)}))
+
+    rejected = pd.concat(rejects, ignore_index=True) if rejects else pd.DataFrame(
+        columns=['row', 'transaction_id', 'flag_bits'])
+    if external_duplicates and len(rejected):
+        # Fold the duplicate flags into rows already rejected for other reasons
+        rejected = rejected.sort_values('row', kind='stable')
+        rows = rejected['row'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        flags = np.bitwise_or.reduceat(rejected['flag_bits'].to_numpy(dtype=np.uint16), starts)
+        rejected = rejected.iloc[starts].assign(flag_bits=flags).reset_index(drop=True)
+    rejected['reasons'] = reason_names(rejected['flag_bits'].to_numpy(dtype=np.uint16))
+    if reject_path:
+        rejected.to_csv(reject_path, index=False)
+    validator.rejected = len(rejected)
+    return validator
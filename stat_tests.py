@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Statistical tests for the synthetic-data checks
+- chisquare            : Pearson chi-square goodness of fit (exact chi2 tail probabilities)
+- ks_1samp / ks_2samp  : Kolmogorov-Smirnov tests (asymptotic p-values)
+- multinomial_test     : Monte-Carlo (parametric bootstrap) version of the chi-square test
+- permutation_test     : label-permutation test for differences in group means
+Resampling runs in vectorized batches with one spawned seed per batch, spread
+across a process pool (parallel.py), so results depend only on the seed.
+Every test returns TestResult(name, statistic, p_upper, p_lower, details):
+p_upper is the usual "more extreme than chance" p-value, p_lower the chance of
+a result at least this even - tiny p_lower means "too uniform to be random".
+The KS tests are two-sided distance tests with no such lower tail: their
+p_lower is NaN
+"""
+
+import math
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+
+from parallel import batch_sizes, parallel_map, spawn_seeds
+
+TestResult = namedtuple('TestResult', ['name', 'statistic', 'p_upper', 'p_lower', 'details'])
+
+_EPS = 1e-15
+
+
+# ----------------------------------------------------------------------
+# Distribution tails (no scipy)
+# ----------------------------------------------------------------------
+def _gamma_p_series(a, x):
+    term = total = 1.0 / a
+    ap = a
+    for _ in range(10_000):
+        ap += 1
+        term *= x / ap
+        total += term
+        if abs(term) < abs(total) * _EPS:
+            break
+    return total * math.exp(-x + a * math.log(x) - math.lgamma(a))
+
+
+def _gamma_q_fraction(a, x):
+    # Modified Lentz continued fraction
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 10_000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < _EPS:
+            break
+    return h * math.exp(-x + a * math.log(x) - math.lgamma(a))
+
+
+def gamma_p(a, x):
+    """Regularized lower incomplete gamma P(a, x)"""
+    if x <= 0:
+        return 0.0
+    return _gamma_p_series(a, x) if x < a + 1 else 1 - _gamma_q_fraction(a, x)
+
+
+def gamma_q(a, x):
+    """Regularized upper incomplete gamma Q(a, x) = 1 - P(a, x)"""
+    if x <= 0:
+        return 1.0
+    return 1 - _gamma_p_series(a, x) if x < a + 1 else _gamma_q_fraction(a, x)
+
+
+def chi2_sf(x, df):
+    return gamma_q(df / 2, x / 2)
+
+
+def chi2_cdf(x, df):
+    return gamma_p(df / 2, x / 2)
+
+
+def kolmogorov_sf(x):
+    """P(K > x) for the Kolmogorov distribution"""
+    if x < 0.2:
+        return 1.0
+    k = np.arange(1, 101)
+    terms = (-1.0) ** (k - 1) * np.exp(-2 * k * k * x * x)
+    return float(min(1.0, max(0.0, 2 * terms.sum())))
+
+
+# ----------------------------------------------------------------------
+# Analytic tests
+# ----------------------------------------------------------------------
+def _expected_counts(counts, probs):
+    counts = np.asarray(counts, dtype=float)
+    probs = np.full(len(counts), 1 / len(counts)) if probs is None else np.asarray(probs, dtype=float)
+    return counts, probs / probs.sum()
+
+
+def chisquare(counts, probs=None, name='chisquare'):
+    """Pearson goodness of fit of category counts to probs (uniform by default)"""
+    counts, probs = _expected_counts(counts, probs)
+    expected = counts.sum() * probs
+    statistic = float(((counts - expected) ** 2 / expected).sum())
+    df = len(counts) - 1
+    details = {'df': df, 'n': int(counts.sum()), 'categories': len(counts)}
+    return TestResult(name, statistic, chi2_sf(statistic, df), chi2_cdf(statistic, df), details)
+
+
+def ks_1samp(values, cdf, name='ks_1samp'):
+    """One-sample KS test of values against a vectorized CDF"""
+    values = np.sort(np.asarray(values, dtype=float))
+    n = len(values)
+    f = cdf(values)
+    ranks = np.arange(1, n + 1)
+    statistic = float(max((ranks / n - f).max(), (f - (ranks - 1) / n).max()))
+    en = math.sqrt(n)
+    p_upper = kolmogorov_sf((en + 0.12 + 0.11 / en) * statistic)
+    return TestResult(name, statistic, p_upper, math.nan, {'n': n})
+
+
+def ks_2samp(a, b, name='ks_2samp'):
+    """Two-sample KS test (do a and b come from the same distribution?)"""
+    a = np.sort(np.asarray(a, dtype=float))
+    b = np.sort(np.asarray(b, dtype=float))
+    points = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, points, side='right') / len(a)
+    cdf_b = np.searchsorted(b, points, side='right') / len(b)
+    statistic = float(np.abs(cdf_a - cdf_b).max())
+    en = math.sqrt(len(a) * len(b) / (len(a) + len(b)))
+    p_upper = kolmogorov_sf((en + 0.12 + 0.11 / en) * statistic)
+    return TestResult(name, statistic, p_upper, math.nan, {'n_a': len(a), 'n_b': len(b)})
+
+
+def uniform_cdf(lo, hi):
+    return lambda x: np.clip((np.asarray(x, dtype=float) - lo) / (hi - lo), 0, 1)
+
+
+# ----------------------------------------------------------------------
+# Resampling tests
+# ----------------------------------------------------------------------
+def _resample(batch_func, n_resamples, seed, batch_size, workers):
+    sizes = batch_sizes(n_resamples, batch_size)
+    tasks = list(zip(sizes, spawn_seeds(seed, len(sizes))))
+    return np.concatenate(parallel_map(batch_func, tasks, workers))
+
+
+def _tail_pvalues(observed, simulated):
+    # +1 so a p-value is never exactly zero for a finite number of draws
+    n = len(simulated)
+    p_upper = (1 + np.count_nonzero(simulated >= observed)) / (n + 1)
+    p_lower = (1 + np.count_nonzero(simulated <= observed)) / (n + 1)
+    return float(p_upper), float(p_lower)
+
+
+def _multinomial_batch(n, probs, task):
+    size, seed = task
+    expected = n * probs
+    draws = np.random.default_rng(seed).multinomial(n, probs, size=size)
+    return ((draws - expected) ** 2 / expected).sum(axis=1)
+
+
+def multinomial_test(counts, probs=None, n_resamples=10_000, seed=0, batch_size=2_000,
+                     workers=None, name='multinomial_test'):
+    """Chi-square statistic against its simulated null (counts drawn from probs)
+
+    Cost depends on the number of categories, not rows, so it stays fast for
+    any table size; unlike the asymptotic test it is exact for small counts.
+    """
+    counts, probs = _expected_counts(counts, probs)
+    n = int(counts.sum())
+    observed = float(((counts - n * probs) ** 2 / (n * probs)).sum())
+    simulated = _resample(partial(_multinomial_batch, n, probs), n_resamples, seed, batch_size, workers)
+    p_upper, p_lower = _tail_pvalues(observed, simulated)
+    details = {'n': n, 'categories': len(counts), 'resamples': n_resamples}
+    return TestResult(name, observed, p_upper, p_lower, details)
+
+
+def _between_groups(sums, sizes, total, n):
+    """Between-group sum of squares from per-group sums (group sizes are fixed)"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nansum(sums ** 2 / sizes, axis=-1) - total ** 2 / n
+
+
+def _permutation_batch(codes, values, n_groups, task):
+    size, seed = task
+    n = len(codes)
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permuted(np.broadcast_to(codes, (size, n)), axis=1)
+    flat = shuffled + (np.arange(size) * n_groups)[:, None]
+    sums = np.bincount(flat.ravel(), weights=np.tile(values, size), minlength=size * n_groups)
+    sizes = np.bincount(codes, minlength=n_groups)
+    return _between_groups(sums.reshape(size, n_groups), sizes, values.sum(), n)
+
+
+def permutation_test(codes, values, n_resamples=10_000, seed=0, max_cells=4_000_000,
+                     workers=None, name='permutation_test'):
+    """Do group means of values differ more than shuffled labels would give?
+
+    codes are integer group labels (e.g. from pd.factorize). The statistic is the
+    between-group sum of squares; each batch shuffles labels for many resamples
+    at once and reduces them with a single bincount.
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    n_groups = int(codes.max()) + 1
+    sizes = np.bincount(codes, minlength=n_groups)
+    sums = np.bincount(codes, weights=values, minlength=n_groups)
+    observed = float(_between_groups(sums, sizes, values.sum(), len(values)))
+    batch_size = max(1, max_cells // max(len(codes), 1))
+    simulated = _resample(partial(_permutation_batch, codes, values, n_groups),
+                          n_resamples, seed, batch_size, workers)
+    p_upper, p_lower = _tail_pvalues(observed, simulated)
+    details = {'n': len(values), 'groups': n_groups, 'resamples': n_resamples,
+               'means': sums / np.maximum(sizes, 1)}
+    return TestResult(name, observed, p_upper, p_lower, details)
+
+
+def describe_uniformity(result, alpha=0.05):
+    """Plain-language reading of a uniformity test"""
+    if result.p_lower < alpha:
+        return "too even even for random assignment"
+    if result.p_upper < alpha:
+        return "uneven, as real-world data usually is"
+    return "indistinguishable from uniform random assignment"
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomaly_checks import (count_uniformity, daily_volume, decimal_granularity, group_balance,
+                            group_mean_spread, review_checks, sales_checks, sequential_ids)
+
+
+def test_count_uniformity_flags_only_the_lower_tail():
+    even = count_uniformity([2500, 2500, 2500, 2500])
+    fair = count_uniformity(np.random.default_rng(0).multinomial(10_000, [0.25] * 4))
+    skewed = count_uniformity([4000, 2000, 2000, 2000])
+    assert even.flagged and even.details['p_lower'] < 0.05
+    assert not fair.flagged
+    assert not skewed.flagged and skewed.details['test'].p_upper < 0.05
+
+
+def test_count_uniformity_uses_expected_shares():
+    counts = [2000, 1000, 1000]
+    assert count_uniformity(counts, probs=[2, 1, 1]).flagged
+    assert not count_uniformity(counts).flagged
+
+
+def test_count_uniformity_details_follow_probs():
+    result = count_uniformity([2000, 1000, 1000], probs=[2, 1, 1])
+    assert list(result.details['expected']) == [2000, 1000, 1000]
+    assert result.details['noise_std'].to_numpy() == pytest.approx(
+        np.sqrt(4000 * np.array([0.5, 0.25, 0.25]) * np.array([0.5, 0.75, 0.75])))
+    assert result.details['max_deviation_pct'] == 0
+
+
+def test_sequential_ids_counts_gaps():
+    assert sequential_ids(pd.Series(['R1', 'R2', 'R3']), 'R').flagged
+    gapped = sequential_ids(pd.Series(['R1', 'R2', 'R5']), 'R')
+    assert not gapped.flagged and gapped.details['non_sequential'] == 1
+
+
+def test_daily_volume_flags_constant_days():
+    assert daily_volume(np.repeat(np.arange(30), 5)).flagged
+    bursty = np.repeat(np.arange(30), np.random.default_rng(0).integers(1, 20, 30))
+    assert not daily_volume(bursty).flagged
+
+
+def test_group_checks_skip_missing_codes():
+    codes = np.array([0, 0, 1, 1, -1, 2, 2])
+    ratings = np.array([3.0, 3.2, 3.1, 3.1, 5.0, 3.0, 3.2])
+    spread = group_mean_spread(codes, 3, ratings)
+    assert spread.flagged and spread.details['max'] == pytest.approx(3.1)
+    balance = group_balance(codes, 3)
+    assert balance.flagged and list(balance.details['counts']) == [2, 2, 2]
+
+
+def test_review_checks_weekdays_match_pandas():
+    dates = pd.Series(pd.date_range('2024-01-01', periods=40, freq='D'))
+    reviews = pd.DataFrame({'review_id': [f"R{i}" for i in range(40)], 'date': dates,
+                            'product_id': ['PC001', 'PC002'] * 20, 'platform': ['Shopee', 'Lazada'] * 20,
+                            'rating': np.linspace(1, 5, 40)})
+    counts = review_checks(reviews)['day_of_week_uniformity'].details['counts']
+    assert list(counts) == list(np.bincount(dates.dt.dayofweek, minlength=7))
+
+
+def test_sales_checks():
+    sales = pd.DataFrame({'transaction_id': ['a', 'b', 'a'], 'days_since_launch': [3, -1, 5],
+                          'revenue': [10.0, 20.0, 31.0], 'units_sold': [1, 2, 3], 'avg_price': [10.0] * 3})
+    checks = sales_checks(sales)
+    assert checks['duplicate_transactions'].details['duplicates'] == 1
+    assert checks['negative_days_since_launch'].details['negative'] == 1
+    assert checks['revenue_invariant'].details['mismatched'] == 1
+
+
+def test_sales_checks_over_chunks_match_one_frame():
+    rng = np.random.default_rng(1)
+    n = 3_000
+    ids = np.array([f"{i:08x}-0000-4000-8000-{i:012x}" for i in rng.integers(0, 2_500, n)], dtype=object)
+    ids[::500] = 'not-a-uuid'
+    ids[::700] = None
+    units = rng.integers(1, 5, n)
+    sales = pd.DataFrame({'transaction_id': ids, 'days_since_launch': rng.integers(-5, 100, n),
+                          'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 90, n), unit='D'),
+                          'units_sold': units, 'avg_price': 10.0, 'revenue': units * 10.0 + (rng.random(n) < 0.01)})
+    whole = sales_checks(sales)
+    chunked = sales_checks((sales.iloc[i:i + 400] for i in range(0, n, 400)), memory_budget='16KB')
+    assert whole['duplicate_transactions'].details['duplicates'] == int(sales['transaction_id'].duplicated().sum())
+    assert repr(chunked) == repr(whole)
+    assert not decimal_granularity([1.0, 2.5, 3.0]).flagged
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset
+from dataset import SalesQuery, open_store
+from out_of_core import ExternalGroupBy
+
+N = 2_000
+
+
+@pytest.fixture(scope='module')
+def sales(tmp_path_factory):
+    root = tmp_path_factory.mktemp('sales')
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'transaction_id': [f"{i:08x}-0000-4000-8000-{i:012x}" for i in range(N)],
+        'date': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, N), unit='D'),
+        'product_id': rng.choice(['PC001', 'PC002', 'PC003'], N),
+        'region': rng.choice(['Jakarta', 'Bandung'], N),
+        'channel': rng.choice(['Shopee', 'Alfamart'], N),
+        'units_sold': rng.integers(1, 20, N),
+        'avg_price': rng.choice([25000.0, 30000.0], N),
+        'discount_pct': rng.integers(0, 30, N),
+    })
+    frame['revenue'] = frame['units_sold'] * frame['avg_price']
+    frame['days_since_launch'] = rng.integers(-10, 900, N)
+    # Missing keys and values: such rows leave the groups but still count without by
+    frame.loc[::97, 'region'] = None
+    frame['date'] = frame['date'].astype(object)
+    frame.loc[::89, 'date'] = None
+    frame.loc[::83, 'avg_price'] = np.nan
+    path = root / 'sales.csv'
+    frame.to_csv(path, index=False)
+    frame = pd.read_csv(path, parse_dates=['date'])
+    return SalesQuery(open_store(str(path), str(root / 'store'))), frame
+
+
+def test_agg_matches_pandas(sales):
+    query, frame = sales
+    result = query.filter(product='PC002').agg(by='region', total=('revenue', 'sum'))
+    expected = frame[frame['product_id'] == 'PC002'].groupby('region')['revenue'].sum()
+    assert list(result['region']) == list(expected.index)
+    assert np.allclose(result['total'], expected)
+
+
+def in_memory(query, by=None, freq=None, **named):
+    """agg() the way pandas computes it over the loaded selection"""
+    frame = query.to_pandas()
+    if by is None:
+        return pd.Series({name: frame[col].agg(func) for name, (col, func) in named.items()})
+    keys = [pd.Grouper(key='date', freq=freq) if col == 'date' and freq else col for col in by]
+    result = frame.groupby(keys, observed=True).agg(**named).reset_index()
+    for col in by:
+        if isinstance(result[col].dtype, pd.CategoricalDtype):
+            result[col] = result[col].astype(result[col].cat.categories.dtype)
+    return result
+
+
+STATS = {f'{col}_{func}': (col, func) for col in ['revenue', 'units_sold', 'avg_price']
+         for func in ['sum', 'count', 'size', 'mean', 'min', 'max']}
+DATES = {'first': ('date', 'min'), 'last': ('date', 'max'), 'dated': ('date', 'count'),
+         'regions': ('region', 'count'), 'ids': ('transaction_id', 'count')}
+
+
+@pytest.mark.parametrize('by, freq', [(None, None), (['region'], None), (['product_id', 'date'], None),
+                                      (['date'], 'ME'), (['product_id', 'date'], 'W'),
+                                      (['days_since_launch'], None)])
+@pytest.mark.parametrize('budget', ['512MB', '64KB'])
+def test_streamed_agg_matches_pandas(sales, monkeypatch, by, freq, budget):
+    query, _ = sales
+    groups = []
+
+    class Recorded(ExternalGroupBy):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            groups.append(self)
+
+    monkeypatch.setattr(dataset, 'ExternalGroupBy', Recorded)
+    named = {**STATS, **DATES} if by is None or 'date' not in by else STATS
+    for selection in [query, query.filter(product=['PC001', 'PC003'], date=('2023-02-01', '2023-05-31'),
+                                          channel='Shopee')]:
+        result = selection.agg(by=by, freq=freq, memory_budget=budget, **named)
+        expected = in_memory(selection, by, freq, **named)
+        if by is None:
+            pd.testing.assert_series_equal(result, expected, rtol=1e-12)
+        else:
+            pd.testing.assert_frame_equal(result, expected, rtol=1e-12)
+    # Partial results outgrow 64KB once there are more than a handful of groups
+    assert (groups[0].spilled > 0) == (budget == '64KB' and by not in (None, ['region']))
+
+
+def test_agg_of_an_empty_selection(sales):
+    query, _ = sales
+    empty = query.filter(product='PC404')
+    pd.testing.assert_series_equal(empty.agg(**STATS, **DATES), in_memory(empty, **STATS, **DATES))
+    assert empty.agg({'revenue': 'sum'}, by='region').empty
+
+
+def test_other_aggregations_load_the_selection(sales, monkeypatch):
+    query, frame = sales
+    monkeypatch.setattr(dataset, 'ExternalGroupBy', None)
+    result = query.agg({'revenue': 'median'}, by='product_id')
+    expected = frame.groupby('product_id')['revenue'].median()
+    assert list(result['product_id']) == list(expected.index)
+    assert np.allclose(result['revenue'], expected)
+
+
+@pytest.mark.parametrize('named', [{'revenue': 'sum'}, {'total': ['revenue', 'sum']},
+                                   {'total': ('revenue',)}, {'total': (1, 'sum')}])
+def test_agg_rejects_malformed_named_aggregations(sales, named):
+    query, _ = sales
+    with pytest.raises(TypeError, match=r"\(column, func\) tuple"):
+        query.agg(**named)
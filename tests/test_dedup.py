@@ -0,0 +1,115 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dedup
+from dedup import DuplicateTracker, PartitionedDuplicates, duplicated, parse_uuids
+
+
+def uuids(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [str(uuid.UUID(bytes=rng.bytes(16))) for _ in range(n)]
+
+
+def with_repeats(ids, seed=1):
+    rng = np.random.default_rng(seed)
+    return list(ids) + [ids[i] for i in rng.integers(0, len(ids), len(ids) // 4)]
+
+
+def chunked(values, size):
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def tracker_mask(values, size):
+    tracker = DuplicateTracker()
+    return np.concatenate([tracker.update(np.asarray(chunk, dtype=object)) for chunk in chunked(values, size)])
+
+
+def external_rows(values, size, tmp_path):
+    spill = PartitionedDuplicates(partitions=4, tmpdir=tmp_path)
+    for chunk in chunked(values, size):
+        spill.add(chunk)
+    return spill.finish()
+
+
+@pytest.fixture
+def colliding(monkeypatch):
+    """Force every ID into one of four hash values"""
+    monkeypatch.setattr(dedup, 'hash_words', lambda words: (words.sum(axis=1) % np.uint64(4)) << np.uint64(62))
+
+
+def test_parse_uuids_round_trip_and_validity():
+    ids = uuids(50)
+    words, valid = parse_uuids(np.asarray(ids + ['', 'xyz', ids[0][:-1] + 'g', ids[0][:-1] + 'G',
+                                                 ids[0].replace('-', '_'), ids[0] + '0'], dtype=object))
+    assert valid[:50].all() and not valid[50:].any()
+    assert list(dedup.format_uuids(words[:50])) == ids
+
+
+def test_parse_uuids_accepts_either_hex_case():
+    ids = uuids(50)
+    words, valid = parse_uuids(np.asarray(ids, dtype=object))
+    upper, upper_valid = parse_uuids(np.asarray([value.upper() for value in ids], dtype=object))
+    assert upper_valid.all() and (upper == words).all()
+
+
+@pytest.mark.parametrize('values', [
+    with_repeats(uuids(2000)),
+    with_repeats(uuids(1000) + [f"TX{i:05d}" for i in range(1000)]),
+    with_repeats(uuids(500)) + [None, None, '', '', 'ü-id', 'ü-id', 'x' * 70, 'x' * 70],
+])
+def test_matches_pandas(values, tmp_path):
+    expected = pd.Series(values, dtype=object).duplicated().to_numpy()
+    assert (duplicated(values) == expected).all()
+    assert (tracker_mask(values, 300) == expected).all()
+
+
+@pytest.mark.parametrize('values', [
+    with_repeats(uuids(2000)),
+    with_repeats([f"TX{i:05d}" for i in range(2000)]),
+])
+def test_hash_collisions_are_resolved_exactly(colliding, values, tmp_path):
+    expected = pd.Series(values, dtype=object).duplicated().to_numpy()
+    assert (duplicated(values) == expected).all()
+    assert (tracker_mask(values, 300) == expected).all()
+    rows, ids = external_rows(values, 300, tmp_path)
+    assert list(rows) == list(np.flatnonzero(expected))
+    assert list(ids) == [values[i] for i in rows]
+
+
+def test_tracker_rekeys_when_non_uuids_arrive():
+    ids = uuids(300)
+    values = ids + ['TX1', ids[5], 'TX1', ids[299]]
+    mask = tracker_mask(values, 300)
+    assert list(np.flatnonzero(mask)) == [301, 302, 303]
+
+
+def test_tracker_keeps_a_few_sorted_runs():
+    values = with_repeats(uuids(5000))
+    tracker = DuplicateTracker()
+    mask = np.concatenate([tracker.update(np.asarray(chunk, dtype=object)) for chunk in chunked(values, 50)])
+    assert (mask == pd.Series(values, dtype=object).duplicated().to_numpy()).all()
+    sizes = [len(hashes) for hashes, _ in tracker.runs]
+    assert sum(sizes) == 5000 and len(sizes) <= np.log2(5000 / 50) + 1
+    assert all(size > 2 * newer for size, newer in zip(sizes, sizes[1:]))
+    assert all((np.diff(hashes.astype(object)) >= 0).all() for hashes, _ in tracker.runs)
+
+
+def test_external_skips_ids_that_do_not_fit(tmp_path):
+    ids = uuids(300)
+    spill = PartitionedDuplicates(partitions=4, tmpdir=tmp_path)
+    assert not spill.add(ids).any()
+    skipped = spill.add(['TX1', ids[5], 'TX1', None, None])
+    assert list(skipped) == [True, False, True, False, False]
+    rows, found = spill.finish()
+    assert list(rows) == [301, 304]
+    assert list(found) == [ids[5], None]
+
+
+def test_external_skips_ids_longer_than_the_layout(tmp_path):
+    spill = PartitionedDuplicates(partitions=4, tmpdir=tmp_path, min_width=8)
+    spill.add(['A1', 'A2'])
+    assert list(spill.add(['A1', 'B' * 20, 'B' * 20])) == [False, True, True]
+    assert list(spill.finish()[0]) == [2]
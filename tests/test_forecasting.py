@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from forecasting import MODELS, backtest
+
+
+def series(n_days):
+    rng = np.random.default_rng(0)
+    return rng.poisson(5, (3, n_days)).astype(float), rng.uniform(0, 20, (3, n_days))
+
+
+@pytest.mark.parametrize('n_days, horizon', [(28, 28), (10, 28), (30, 0)])
+def test_backtest_rejects_a_horizon_without_training_days(n_days, horizon):
+    with pytest.raises(ValueError, match='horizon'):
+        backtest(*series(n_days), horizon=horizon)
+
+
+def test_backtest_scores_every_model_with_one_training_day():
+    errors = backtest(*series(8), horizon=7)
+    assert list(errors) == [model.name for model in MODELS]
+    assert all(np.isfinite(mae) for mae in errors.values())
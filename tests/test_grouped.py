@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from grouped import group_counts, group_mode, group_share
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    frame = pd.DataFrame({
+        'product_id': rng.choice(['PC003', 'PC001', 'PC002', 'PC004'], n),
+        'channel': rng.choice(['Shopee', 'Tokopedia', 'Lazada'], n),
+    })
+    frame.loc[::37, 'product_id'] = np.nan
+    frame.loc[::29, 'channel'] = np.nan
+    # PC005: every value missing; PC006: a two-way tie broken by first appearance
+    extra = pd.DataFrame({'product_id': ['PC005', 'PC005', 'PC006', 'PC006', 'PC006', 'PC006'],
+                          'channel': [np.nan, np.nan, 'Tokopedia', 'Shopee', 'Shopee', 'Tokopedia']})
+    return pd.concat([frame, extra], ignore_index=True)
+
+
+def test_group_mode_matches_value_counts(frame):
+    result = group_mode(frame['product_id'], frame['channel'])
+    expected = (frame.dropna(subset=['channel']).groupby('product_id')['channel']
+                .agg(lambda x: x.value_counts().index[0]))
+    assert list(result.index) == ['PC001', 'PC002', 'PC003', 'PC004', 'PC005', 'PC006']
+    assert result.drop('PC005').equals(expected.astype(object))
+    assert result['PC006'] == 'Tokopedia'
+    assert pd.isna(result['PC005'])
+
+
+def test_group_share_matches_groupby_mean(frame):
+    result = group_share(frame['product_id'], frame['channel'], 'Shopee')
+    expected = (frame['channel'] == 'Shopee').groupby(frame['product_id']).mean()
+    assert list(result.index) == list(expected.index)
+    assert np.allclose(result, expected)
+    assert result['PC005'] == 0.0 and result['PC006'] == 0.5
+
+
+def test_group_share_of_no_rows_is_empty():
+    result = group_share(pd.Series([np.nan, np.nan]), pd.Series(['a', 'b']), 'a')
+    assert result.empty
+
+
+def test_group_counts_matches_crosstab(frame):
+    result = group_counts(frame['product_id'], frame['channel'])
+    expected = pd.crosstab(frame['product_id'], frame['channel'])
+    # crosstab drops groups with no counted value; group_counts keeps them as zero rows
+    assert (result.loc['PC005'] == 0).all()
+    assert result.drop('PC005').equals(expected.rename_axis(index='product_id', columns='channel'))
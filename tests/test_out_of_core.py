@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from out_of_core import ExternalGroupBy, group_sums, parse_bytes
+
+KEYS = ['product', 'day']
+VALUES = ['units', 'revenue']
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    return pd.DataFrame({
+        'product': rng.integers(-3, 40, n),
+        'day': rng.integers(0, 400, n),
+        'units': rng.integers(1, 20, n).astype(float),
+        'revenue': rng.normal(1e5, 3e4, n),
+    })
+
+
+def in_memory(frame):
+    return frame.groupby(KEYS, as_index=False)[VALUES].sum()
+
+
+def chunks(frame, size=5_000):
+    return (frame.iloc[start:start + size] for start in range(0, len(frame), size))
+
+
+@pytest.mark.parametrize('budget', ['512MB', '256KB', '64KB'])
+def test_spilled_sums_match_in_memory_groupby(frame, budget):
+    groups = ExternalGroupBy(KEYS, VALUES, budget, fanout=4)
+    for chunk in chunks(frame):
+        groups.add(chunk)
+    result = groups.result()
+    expected = in_memory(frame)
+    assert (groups.spilled > 0) == (budget != '512MB')
+    assert result[KEYS].equals(expected[KEYS])
+    assert np.allclose(result[VALUES], expected[VALUES], rtol=1e-12)
+
+
+def test_repartitioned_spills_hold_disjoint_keys(frame):
+    groups = ExternalGroupBy(KEYS, VALUES, '64KB', fanout=4)
+    for chunk in chunks(frame):
+        groups.add(chunk)
+    parts = list(groups.iter_partitions())
+    # More partitions than the first fanout: oversized spill files were split again
+    assert len(parts) > 4
+    keys = pd.concat(parts)[KEYS]
+    assert not keys.duplicated().any() and len(keys) == len(in_memory(frame))
+
+
+def test_min_and_max_columns_skip_nan(frame):
+    frame = frame.assign(revenue=frame['revenue'].mask(frame.index % 7 == 0))
+    groups = ExternalGroupBy(KEYS, VALUES, '64KB', fanout=4, how={'units': 'min', 'revenue': 'max'})
+    for chunk in chunks(frame):
+        groups.add(chunk)
+    result = groups.result()
+    expected = frame.groupby(KEYS, as_index=False).agg({'units': 'min', 'revenue': 'max'})
+    assert groups.spilled > 0
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_group_sums_accepts_dicts_of_arrays(frame):
+    arrays = ({name: chunk[name].to_numpy() for name in KEYS + VALUES} for chunk in chunks(frame))
+    result = group_sums(arrays, KEYS, VALUES, '128KB')
+    assert result[KEYS].equals(in_memory(frame)[KEYS])
+
+
+@pytest.mark.parametrize('text, expected', [('512MB', 512 * 2**20), ('2g', 2 * 2**30),
+                                            ('1.5KB', 1536), (4096, 4096)])
+def test_parse_bytes(text, expected):
+    assert parse_bytes(text) == expected
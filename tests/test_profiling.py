@@ -0,0 +1,17 @@
+import sys
+
+from profiling import Profiler
+
+
+def test_samples_without_script_frames_are_dropped(tmp_path, capsys):
+    profiler = Profiler('script', str(tmp_path))
+    profiler.section('only')
+    profiler.last_cpu = 0.0
+    profiler._sample(None, None)  # nothing outside profiling.py on the stack
+    profiler._sample(None, sys._getframe())
+    assert all(profiler.current.stacks)
+    profiler.current.close()
+    profiler.write(str(tmp_path))
+    profiler.print_summary(str(tmp_path))
+    folded = (tmp_path / '01-only.folded').read_text().splitlines()
+    assert all(not line.startswith(' ') for line in folded)
@@ -0,0 +1,104 @@
+import os
+import shutil
+
+import pytest
+
+import quality_metrics
+from quality_metrics import load_quality_metrics
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    for name in ['reviews.csv', 'products.csv', 'marketing.csv', 'sales.csv']:
+        shutil.copy(os.path.join(REPO, name), tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def load():
+    return load_quality_metrics(cache_path='quality_metrics.json')
+
+
+def rebuilt():
+    return load_quality_metrics(cache_path=None)
+
+
+def assert_same(metrics, expected):
+    # Rating sums are folded in a different chunking, so compare them as floats
+    actual, expected = metrics.to_dict(), expected.to_dict()
+    assert actual.pop('product_rating_sums') == pytest.approx(expected.pop('product_rating_sums'))
+    assert actual == expected
+
+
+def flip_sentiment(path, after_byte):
+    """Swap one Positive/Negative label past after_byte, keeping the file size"""
+    data = path.read_bytes()
+    at = data.index(b',Positive,', after_byte)
+    path.write_bytes(data[:at] + b',Negative,' + data[at + len(b',Positive,'):])
+
+
+def test_cache_hit_matches_full_scan(workdir):
+    first = load()
+    assert load().to_dict() == first.to_dict()
+    assert_same(first, rebuilt())
+
+
+def test_same_size_edit_past_first_block_invalidates(workdir):
+    before = load().mismatched_sentiment
+    reviews = workdir / 'reviews.csv'
+    size = reviews.stat().st_size
+    flip_sentiment(reviews, quality_metrics.BLOCK_BYTES * 2)
+    assert reviews.stat().st_size == size
+    after = load()
+    assert after.mismatched_sentiment != before
+    assert_same(after, rebuilt())
+
+
+def test_append_is_folded_incrementally(workdir, monkeypatch):
+    load()
+    reviews = workdir / 'reviews.csv'
+    lines = reviews.read_bytes().splitlines(keepends=True)
+    reviews.write_bytes(b''.join(lines[:-500]))
+    load()
+    reviews.write_bytes(b''.join(lines))
+    scanned = []
+    original = quality_metrics._scan_reviews
+    monkeypatch.setattr(quality_metrics, '_scan_reviews',
+                        lambda metrics, path, lookup, offset=0, chunksize=200_000:
+                        scanned.append(offset) or original(metrics, path, lookup, offset, chunksize))
+    assert_same(load(), rebuilt())
+    assert scanned[0] > 0
+
+
+def test_edit_with_growth_is_not_treated_as_append(workdir):
+    load()
+    reviews = workdir / 'reviews.csv'
+    flip_sentiment(reviews, quality_metrics.BLOCK_BYTES * 2)
+    with open(reviews, 'ab') as f:
+        f.write(reviews.read_bytes().splitlines(keepends=True)[-1])
+    assert_same(load(), rebuilt())
+
+
+def test_sales_status_follows_sales_file(workdir):
+    assert 'Git LFS' in load().sales_status
+    (workdir / 'sales.csv').write_text('product_id,date,units_sold\nPC001,2024-01-01,3\n')
+    assert load().sales_status.endswith('file available')
+
+
+def test_cache_hit_reads_only_the_last_blocks(workdir, monkeypatch):
+    load()
+    hashed = []
+    original = quality_metrics._sha256
+    monkeypatch.setattr(quality_metrics, '_sha256',
+                        lambda path, nbytes=None, offset=0: hashed.append(nbytes) or original(path, nbytes, offset))
+    load()
+    assert hashed and all(n is not None and n <= quality_metrics.BLOCK_BYTES for n in hashed)
+
+
+def test_critical_issues_follow_the_metrics(workdir):
+    metrics = load()
+    assert 'future_reviews' in metrics.critical_issues
+    metrics.future_reviews = 0
+    assert 'future_reviews' not in metrics.critical_issues
@@ -0,0 +1,66 @@
+import asyncio
+import os
+
+import query_service
+from query_service import CLEANED_PATHS, QueryService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = {name: os.path.join(ROOT, path) for name, path in CLEANED_PATHS.items()}
+POINTER = 'version https://git-lfs.github.com/spec/v1\noid sha256:{}\nsize 1\n'
+
+
+def test_sales_change_triggers_reload(tmp_path):
+    sales = tmp_path / 'sales.csv'
+    sales.write_text(POINTER.format('0' * 64))
+    service = QueryService(PATHS, str(sales), poll_seconds=0.01)
+    assert 'sales' in service.state.stamps
+
+    async def run():
+        watcher = asyncio.create_task(service.watch())
+        await asyncio.sleep(0.05)
+        assert service.reloads == 0
+        sales.write_text(POINTER.format('1' * 64) + 'changed\n')
+        for _ in range(500):
+            if service.reloads:
+                break
+            await asyncio.sleep(0.01)
+        watcher.cancel()
+
+    asyncio.run(run())
+    assert service.reloads == 1
+
+
+def test_missing_sales_does_not_block_reload(tmp_path, monkeypatch):
+    service = QueryService(PATHS, str(tmp_path / 'sales.csv'), poll_seconds=0.01)
+    assert service.state.stamps['sales'] is None
+    # A cleaned file rewritten while sales.csv is absent still reloads
+    monkeypatch.setattr(query_service, 'file_stamps',
+                        lambda paths: {name: None if name == 'sales' else (1, 1) for name in paths})
+
+    async def run():
+        watcher = asyncio.create_task(service.watch())
+        for _ in range(500):
+            if service.reloads:
+                break
+            await asyncio.sleep(0.01)
+        watcher.cancel()
+
+    asyncio.run(run())
+    assert service.reloads == 1
+
+
+def test_bad_parameters_are_400_and_internal_errors_500(tmp_path):
+    service = QueryService(PATHS, str(tmp_path / 'sales.csv'))
+    status, payload = service.respond('/ratings?product_id=PC008&period=last_quarter')
+    assert status == 200 and payload['start'] < payload['end']
+    for target in ('/ratings?start=yesterday', '/ratings?end=NaT', '/ratings?period=week',
+                   '/ratings?period=last_month&asof=soon', '/ratings?platform=Myspace'):
+        status, payload = service.respond(target)
+        assert status == 400, (target, payload)
+
+    def broken(query):
+        raise ValueError("internal bug")
+
+    service.routes['/brands'] = broken
+    status, payload = service.respond('/brands')
+    assert status == 500 and 'ValueError' in payload['error']
@@ -0,0 +1,60 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import parallel
+import sales_cube
+from out_of_core import ExternalGroupBy
+from regression_harness import ENGINES, REPO, SAMPLE_ROWS, write_sample_sales
+from sales_cube import DailyCube
+
+
+@pytest.fixture(scope='module')
+def sample(tmp_path_factory):
+    path = tmp_path_factory.mktemp('harness') / 'sales.csv'
+    write_sample_sales(path, f"{REPO}/products.csv")
+    return path
+
+
+def test_sample_sales_is_seeded(sample, tmp_path):
+    again = tmp_path / 'sales.csv'
+    write_sample_sales(again, f"{REPO}/products.csv")
+    assert sample.read_bytes() == again.read_bytes()
+    frame = pd.read_csv(sample)
+    assert len(frame) == SAMPLE_ROWS
+    assert frame['transaction_id'].duplicated().any()
+    assert (frame['days_since_launch'] < 0).any()
+
+
+@pytest.mark.parametrize('engine', [name for name, spec in ENGINES.items() if spec['baseline'] != name])
+def test_engine_changes_its_baseline_run(engine):
+    spec, baseline = ENGINES[engine], ENGINES[ENGINES[engine]['baseline']]
+    assert (spec['env'], spec['args']) != (baseline['env'], baseline['args'])
+
+
+def test_out_of_core_engine_spills_the_sales_cube(sample, monkeypatch):
+    groups = []
+
+    class Recorded(ExternalGroupBy):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            groups.append(self)
+
+    monkeypatch.setattr(sales_cube, 'ExternalGroupBy', Recorded)
+    products = pd.read_csv(f"{REPO}/products.csv")['product_id']
+    budget = ENGINES['out_of_core']['env']['SALES_MEMORY_BUDGET']
+    spilled = DailyCube.from_sales(products, str(sample), memory_budget=budget)
+    in_memory = DailyCube.from_sales(products, str(sample), memory_budget='512MB')
+    assert groups[0].spilled > 0 and groups[1].spilled == 0
+    assert spilled.keys.equals(in_memory.keys)
+    assert np.allclose(spilled.revenue, in_memory.revenue)
+
+
+def test_parallel_engine_uses_the_process_pool(monkeypatch):
+    monkeypatch.setenv('REPORT_WORKERS', ENGINES['parallel']['env']['REPORT_WORKERS'])
+    assert parallel.default_workers() > 1
+    assert 'fork' in multiprocessing.get_all_start_methods()
+    monkeypatch.setenv('REPORT_WORKERS', ENGINES['default']['env']['REPORT_WORKERS'])
+    assert parallel.default_workers() == 1
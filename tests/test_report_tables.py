@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from report_tables import review_windows
+
+
+def test_review_windows_match_direct_filters():
+    rng = np.random.default_rng(0)
+    n = 3_000
+    reviews = pd.DataFrame({
+        'product_id': rng.choice(['PC001', 'PC002', 'PC003'], n),
+        'date': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D'),
+        'rating': np.round(rng.uniform(1, 5, n), 1),
+    })
+    marketing = pd.DataFrame({
+        'campaign_id': ['MKT001', 'MKT002', 'MKT003', 'MKT004'],
+        'product_id': ['PC001', 'PC002', 'PC003', 'PC009'],
+        'start_date': pd.to_datetime(['2023-01-10', '2023-06-01', '2023-12-20', '2023-03-01']),
+        'end_date': pd.to_datetime(['2023-02-01', '2023-06-15', '2023-12-31', '2023-03-05']),
+    })
+    windows = review_windows(reviews, marketing)
+    day = pd.Timedelta(days=1)
+    for _, campaign in marketing.iterrows():
+        own = reviews[reviews['product_id'] == campaign['product_id']]
+        for name, (first, last) in {'before': (campaign['start_date'] - 30 * day, campaign['start_date'] - day),
+                                    'during': (campaign['start_date'], campaign['end_date']),
+                                    'after': (campaign['end_date'] + day, campaign['end_date'] + 30 * day)}.items():
+            inside = own[(own['date'] >= first) & (own['date'] <= last)]
+            row = windows.loc[campaign['campaign_id']]
+            assert row[f'{name}_reviews'] == len(inside)
+            if len(inside):
+                # Summed per window, so the mean is exact to the last bit or two
+                assert abs(row[f'{name}_rating'] - inside['rating'].mean()) < 1e-13
+            else:
+                assert np.isnan(row[f'{name}_rating'])
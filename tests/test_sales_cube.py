@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from campaign_lift import campaign_lift
+from sales_cube import DailyCube, load_daily_cube
+
+N = 3_000
+PRODUCTS = ['PC001', 'PC002', 'PC003', 'PC004']
+
+
+@pytest.fixture(scope='module')
+def sales(tmp_path_factory):
+    root = tmp_path_factory.mktemp('cube')
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({
+        'date': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 120, N), unit='D'),
+        'product_id': rng.choice(PRODUCTS[:3], N),
+        'region': rng.choice(['Jakarta', 'Bandung', 'Medan'], N),
+        'channel': rng.choice(['Shopee', 'Alfamart'], N),
+        'units_sold': rng.integers(1, 20, N),
+        'discount_pct': rng.integers(0, 30, N),
+    })
+    # PC003 only sells in Jakarta on Shopee; PC004 never sells
+    pc003 = frame['product_id'] == 'PC003'
+    frame.loc[pc003, ['region', 'channel']] = ['Jakarta', 'Shopee']
+    frame['revenue'] = frame['units_sold'] * 25000.0
+    path = root / 'sales.csv'
+    frame.to_csv(path, index=False)
+    return DailyCube.from_sales(PRODUCTS, str(path), chunksize=700), frame, path
+
+
+def expected_series(frame, keys, cube):
+    days = (frame['date'] - pd.Timestamp(cube.start)).dt.days
+    totals = frame.groupby(keys + [days])['units_sold'].sum()
+    return totals.unstack(fill_value=0).reindex(columns=range(cube.n_days), fill_value=0)
+
+
+def test_only_occurring_series_are_stored(sales):
+    cube, frame, _ = sales
+    assert len(cube.keys) == len(frame.groupby(['product_id', 'region', 'channel']))
+    offsets = cube.product_offsets(('region', 'channel'))
+    assert list(np.diff(offsets)) == [6, 6, 1, 0]
+
+
+@pytest.mark.parametrize('by', [('region', 'channel'), ('region',), ('channel',)])
+def test_series_by_matches_groupby(sales, by):
+    cube, frame, _ = sales
+    columns = ['product_id'] + list(by)
+    expected = expected_series(frame, columns, cube)
+    index = cube.series_index(by)
+    # Rows follow the cube's product / region / channel codes, not label order
+    assert sorted(index) == sorted(expected.index)
+    assert np.array_equal(cube.series('units', by), expected.loc[index].to_numpy())
+
+
+def test_product_series_keeps_every_product(sales):
+    cube, frame, _ = sales
+    expected = expected_series(frame, ['product_id'], cube).reindex(PRODUCTS, fill_value=0)
+    assert list(cube.series_index()) == PRODUCTS
+    assert np.array_equal(cube.series('units'), expected.to_numpy())
+
+
+def test_lift_by_channel_adds_up_to_product_lift(sales):
+    cube, _, _ = sales
+    marketing = pd.DataFrame({'campaign_id': ['MKT001', 'MKT002', 'MKT003'],
+                              'product_id': ['PC001', 'PC003', 'PC004'],
+                              'start_date': pd.to_datetime(['2023-02-01', '2023-02-15', '2023-02-01']),
+                              'end_date': pd.to_datetime(['2023-02-20', '2023-03-01', '2023-02-20']),
+                              'spend_idr': [1e9, 2e9, 3e9]})
+    total = campaign_lift(marketing, cube)
+    split = campaign_lift(marketing, cube, by=('channel',))
+    assert list(split.index.names) == ['campaign_id', 'channel']
+    assert list(split.loc['MKT002'].index) == ['Shopee']
+    assert 'MKT003' not in split.index.get_level_values('campaign_id')
+    summed = split['during_per_day'].groupby(level='campaign_id').sum()
+    assert np.allclose(summed, total.loc[summed.index, 'during_per_day'])
+
+
+def test_cache_round_trip(sales, tmp_path):
+    cube, _, path = sales
+    cache = str(tmp_path / 'daily.npz')
+    built = load_daily_cube(PRODUCTS, str(path), cache)
+    cached = load_daily_cube(PRODUCTS, str(path), cache)
+    assert cached.keys.equals(built.keys) and cached.keys.equals(cube.keys)
+    assert np.array_equal(cached.units, cube.units)
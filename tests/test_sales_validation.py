@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+import pytest
+
+from lookups import ProductLookup
+from sales_validation import REASONS, reason_names, validate_sales
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADER = 'transaction_id,date,product_id,region,channel,units_sold,avg_price,discount_pct,revenue,days_since_launch\n'
+GOOD = [
+    '7191ab00-07e9-0466-f9ee-0519d371b315,2024-11-29,PC002,Makassar,Shopee,6,28050.0,15,168300.0,1633',
+    '4483b61b-c754-5540-ad91-d290746a88be,2022-03-01,PC012,Semarang,Tokopedia,17,25500.0,15,433500.0,208',
+    '6d2fc88a-c197-c5ab-cbc2-adc041f55bd6,2021-06-10,PC002,Bandung,Alfamart,1,33000.0,0,33000.0,365',
+]
+
+
+@pytest.fixture
+def lookup():
+    return ProductLookup(pd.read_csv(os.path.join(REPO, 'products.csv'), parse_dates=['launch_date']))
+
+
+def run(tmp_path, lookup, rows, external_duplicates):
+    path = tmp_path / 'sales.csv'
+    path.write_text(HEADER + '\n'.join(rows) + '\n')
+    validator = validate_sales(lookup, path, tmp_path / 'rejects.csv.gz', chunksize=2,
+                               external_duplicates=external_duplicates)
+    return validator, pd.read_csv(tmp_path / 'rejects.csv.gz')
+
+
+@pytest.mark.parametrize('external_duplicates', [False, True])
+def test_malformed_and_duplicate_ids_are_flagged(tmp_path, lookup, external_duplicates):
+    rows = GOOD + [
+        'TX-0001' + GOOD[0][36:],
+        GOOD[1],
+        ',' + GOOD[0][37:],
+        'TX-0001' + GOOD[0][36:],
+    ]
+    validator, rejects = run(tmp_path, lookup, rows, external_duplicates)
+    assert validator.counts['bad_id'] == 3
+    # Malformed IDs are rejected as bad_id, not compared for duplicates
+    assert validator.counts['duplicate_transaction'] == 1
+    assert dict(zip(rejects['row'], rejects['reasons'])) == {
+        3: 'bad_id', 4: 'duplicate_transaction', 5: 'bad_id', 6: 'bad_id'}
+
+
+@pytest.mark.parametrize('external_duplicates', [False, True])
+def test_uppercase_ids_are_valid_and_match_their_lowercase_form(tmp_path, lookup, external_duplicates):
+    rows = GOOD + [GOOD[2][:36].upper() + GOOD[2][36:], GOOD[0][:36].upper() + GOOD[1][36:]]
+    validator, rejects = run(tmp_path, lookup, rows, external_duplicates)
+    assert validator.counts['bad_id'] == 0
+    assert validator.counts['duplicate_transaction'] == 2
+    assert list(rejects['row']) == [3, 4]
+
+
+def test_reason_names_follow_bit_order():
+    flags = [REASONS['bad_id'] | REASONS['revenue_mismatch'], 0]
+    assert list(reason_names(flags)) == ['revenue_mismatch;bad_id', '']
+
+
+@pytest.mark.parametrize('external_duplicates', [False, True])
+def test_malformed_id_in_first_chunk_does_not_change_the_key_layout(tmp_path, lookup, external_duplicates):
+    rows = ['TX-0001' + GOOD[0][36:]] + GOOD + [GOOD[2], GOOD[0]]
+    validator, rejects = run(tmp_path, lookup, rows, external_duplicates)
+    assert dict(zip(rejects['row'], rejects['reasons'])) == {
+        0: 'bad_id', 4: 'duplicate_transaction', 5: 'duplicate_transaction'}
+
+
+@pytest.mark.parametrize('external_duplicates', [False, True])
+def test_pre_launch_sales_are_counted_but_kept(tmp_path, lookup, external_duplicates):
+    pre_launch = '0f8fad5b-d9cb-469f-a165-70867728950e,2020-06-01,PC002,Bandung,Alfamart,1,33000.0,0,33000.0,-9'
+    rows = GOOD + [pre_launch, pre_launch]
+    validator, rejects = run(tmp_path, lookup, rows, external_duplicates)
+    assert validator.counts['pre_launch_sale'] == 2
+    assert validator.rejected == 1
+    assert dict(zip(rejects['row'], rejects['reasons'])) == {4: 'duplicate_transaction'}
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import CountMinSketch, HyperLogLog, KLLSketch, Moments
+
+
+def chunks(values, size=7_001):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def test_moments_match_numpy():
+    values = np.random.default_rng(0).normal(50, 10, 100_000)
+    moments = Moments()
+    for chunk in chunks(values):
+        moments.update(chunk)
+    assert moments.count == len(values)
+    assert moments.mean == pytest.approx(values.mean())
+    assert moments.std == pytest.approx(values.std(ddof=1))
+    assert (moments.min, moments.max) == (values.min(), values.max())
+
+
+def test_kll_ranks_within_error_bound():
+    values = np.random.default_rng(1).lognormal(0, 1, 200_000)
+    sketch = KLLSketch()
+    for chunk in chunks(values):
+        sketch.update(chunk)
+    points = np.quantile(values, np.linspace(0.01, 0.99, 99))
+    true_ranks = np.searchsorted(np.sort(values), points, side='right')
+    assert np.abs(sketch.rank(points) - true_ranks).max() <= sketch.error_bound * len(values)
+    assert sketch.histogram(np.r_[values.min() - 1, points]).sum() == pytest.approx(true_ranks[-1],
+                                                                                      abs=sketch.error_bound * len(values))
+
+
+@pytest.mark.parametrize('distinct', [1_000, 100_000])
+def test_hll_estimate_within_three_standard_errors(distinct):
+    values = np.random.default_rng(2).integers(0, distinct, 4 * distinct)
+    sketch = HyperLogLog()
+    for chunk in chunks(pd.Series(values).astype(str)):
+        sketch.update(chunk)
+    truth = len(np.unique(values))
+    assert abs(sketch.estimate() - truth) <= 3 * sketch.error_bound * truth
+
+
+def test_count_min_never_undercounts_and_finds_heavy_hitters():
+    values = pd.Series(np.random.default_rng(3).zipf(1.5, 100_000) % 5_000).astype(str)
+    sketch = CountMinSketch()
+    for chunk in chunks(values):
+        sketch.update(chunk)
+    truth = values.value_counts()
+    estimates = sketch.estimate(truth.index)
+    assert (estimates >= truth.to_numpy()).all()
+    assert (estimates - truth.to_numpy()).max() <= sketch.error_bound * len(values)
+    assert [key for key, _ in sketch.most_common(5)] == list(truth.index[:5])
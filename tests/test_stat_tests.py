@@ -0,0 +1,14 @@
+import math
+
+import numpy as np
+
+from stat_tests import describe_uniformity, ks_1samp, ks_2samp, uniform_cdf
+
+
+def test_ks_has_no_lower_tail():
+    values = np.random.default_rng(0).permutation((np.arange(500) + 0.5) / 500)
+    one = ks_1samp(values, uniform_cdf(0, 1))
+    two = ks_2samp(values[:250], values[250:])
+    assert one.p_upper > 0.05 and two.p_upper > 0.05
+    assert math.isnan(one.p_lower) and math.isnan(two.p_lower)
+    assert describe_uniformity(one) == "indistinguishable from uniform random assignment"
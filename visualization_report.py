@@ -3,14 +3,30 @@
 Create ASCII visualizations for key findings
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 
+from charts import bar_chart, to_html, write_chart
+from grouped import group_counts
+from profiling import add_profile_argument, start_profiler
+from quality_metrics import load_quality_metrics
+
+parser = argparse.ArgumentParser(description="ASCII visual summary of key findings")
+parser.add_argument('--html', metavar='PATH', help="also export the charts as a static HTML/SVG page")
+parser.add_argument('--max-rows', type=int, default=25,
+                    help="truncate long charts (platforms, brands) to the top N rows")
+add_profile_argument(parser)
+args = parser.parse_args()
+profiler = start_profiler(args.profile)
+MAX_ROWS = args.max_rows
+
 print("=" * 80)
 print("KEY FINDINGS - VISUAL SUMMARY")
 print("=" * 80)
 print()
 
+profiler.section("load")
 products = pd.read_csv('products.csv')
 marketing = pd.read_csv('marketing.csv')
 reviews = pd.read_csv('reviews.csv')
@@ -21,166 +37,172 @@ marketing['start_date'] = pd.to_datetime(marketing['start_date'])
 marketing['end_date'] = pd.to_datetime(marketing['end_date'])
 reviews['date'] = pd.to_datetime(reviews['date'])
 
-print("1. RATING DISTRIBUTION")
-print("-" * 80)
+report_charts = []
+
+
+def show(chart, leading_newline=True, underline=True):
+    """Write one chart in a single buffered write and keep it for the HTML export"""
+    report_charts.append(chart)
+    write_chart(chart, leading_newline=leading_newline, underline=underline)
+
+
+profiler.section("charts 1-8")
 rating_bins = [0, 1.5, 2.5, 3.5, 4.5, 6]
 rating_labels = ['1 ⭐', '2 ⭐⭐', '3 ⭐⭐⭐', '4 ⭐⭐⭐⭐', '5 ⭐⭐⭐⭐⭐']
 reviews['rating_category'] = pd.cut(reviews['rating'], bins=rating_bins, labels=rating_labels, include_lowest=True)
 rating_dist = reviews['rating_category'].value_counts().sort_index()
+rating_pct = rating_dist / len(reviews) * 100
+show(bar_chart(
+    rating_dist.index, rating_dist, width=50,
+    annotations=[f"{count:,} ({pct:.1f}%)" for count, pct in zip(rating_dist, rating_pct)],
+    title="1. RATING DISTRIBUTION"
+), leading_newline=False)
 
-max_count = rating_dist.max()
-for category, count in rating_dist.items():
-    bar_length = int((count / max_count) * 50)
-    bar = '█' * bar_length
-    pct = (count / len(reviews)) * 100
-    print(f"{category}: {bar} {count:,} ({pct:.1f}%)")
-
-print("\n2. SENTIMENT BREAKDOWN")
-print("-" * 80)
 sentiment_dist = reviews['sentiment'].value_counts()
-total = len(reviews)
-for sentiment, count in sentiment_dist.items():
-    pct = (count / total) * 100
-    bar_length = int(pct / 2)
-    bar = '█' * bar_length
-    emoji = '😞' if sentiment == 'Negative' else ('😊' if sentiment == 'Positive' else '😐')
-    print(f"{emoji} {sentiment:10s}: {bar} {count:,} ({pct:.1f}%)")
-
-print("\n3. TOP 10 PRODUCTS BY REVIEW VOLUME")
-print("-" * 80)
+sentiment_pct = (sentiment_dist / len(reviews)) * 100
+emojis = sentiment_dist.index.map({'Negative': '😞', 'Positive': '😊'}).fillna('😐')
+show(bar_chart(
+    [f"{emoji} {sentiment:10s}" for emoji, sentiment in zip(emojis, sentiment_dist.index)],
+    sentiment_pct, width=1, max_value=2, span=50,
+    annotations=[f"{count:,} ({pct:.1f}%)" for count, pct in zip(sentiment_dist, sentiment_pct)],
+    title="2. SENTIMENT BREAKDOWN"
+))
+
 product_counts = reviews.groupby('product_id').size().sort_values(ascending=False).head(10)
 product_info = products.set_index('product_id')[['product_name', 'brand']]
+product_counts = product_counts[product_counts.index.isin(product_info.index)]
+product_avg = reviews.groupby('product_id')['rating'].mean().reindex(product_counts.index)
+product_info = product_info.reindex(product_counts.index)
+show(bar_chart(
+    product_counts.index, product_counts, width=40,
+    annotations=[
+        f"{count} reviews - {avg:.2f} {'⭐' * int(avg)}\n       {brand} - {name[:50]}"
+        for count, avg, brand, name in zip(product_counts, product_avg,
+                                           product_info['brand'], product_info['product_name'])
+    ],
+    title="3. TOP 10 PRODUCTS BY REVIEW VOLUME"
+))
 
-for pid, count in product_counts.items():
-    if pid in product_info.index:
-        name = product_info.loc[pid, 'product_name']
-        brand = product_info.loc[pid, 'brand']
-        bar_length = int((count / product_counts.max()) * 40)
-        bar = '█' * bar_length
-        avg_rating = reviews[reviews['product_id'] == pid]['rating'].mean()
-        stars = '⭐' * int(avg_rating)
-        print(f"{pid}: {bar} {count} reviews - {avg_rating:.2f} {stars}")
-        print(f"       {brand} - {name[:50]}")
-
-print("\n4. MARKETING SPEND BY CHANNEL")
-print("-" * 80)
 channel_spend = marketing.groupby('channel')['spend_idr'].sum().sort_values(ascending=False)
-max_spend = channel_spend.max()
-
-for channel, spend in channel_spend.items():
-    bar_length = int((spend / max_spend) * 40)
-    bar = '█' * bar_length
-    spend_b = spend / 1e9
-    pct = (spend / marketing['spend_idr'].sum()) * 100
-    print(f"{channel:15s}: {bar} IDR {spend_b:.2f}B ({pct:.1f}%)")
+spend_pct = (channel_spend / marketing['spend_idr'].sum()) * 100
+show(bar_chart(
+    [f"{channel:15s}" for channel in channel_spend.index], channel_spend, width=40,
+    annotations=[f"IDR {spend / 1e9:.2f}B ({pct:.1f}%)" for spend, pct in zip(channel_spend, spend_pct)],
+    title="4. MARKETING SPEND BY CHANNEL"
+))
 
 avg_engagement = marketing.groupby('channel')['engagement_rate'].mean().sort_values(ascending=False)
-print("\nAverage Engagement Rate by Channel:")
-for channel, engagement in avg_engagement.items():
-    bar_length = int((engagement) * 50)
-    bar = '█' * bar_length
-    print(f"{channel:15s}: {bar} {engagement:.1%}")
+show(bar_chart(
+    [f"{channel:15s}" for channel in avg_engagement.index], avg_engagement, width=50, max_value=1,
+    annotations=[f"{engagement:.1%}" for engagement in avg_engagement],
+    title="Average Engagement Rate by Channel:"
+), underline=False)
 
-print("\n5. REVIEW TIMELINE (Reviews per Year)")
-print("-" * 80)
 reviews['year'] = reviews['date'].dt.year
 yearly_reviews = reviews.groupby('year').size()
+show(bar_chart(
+    yearly_reviews.index, yearly_reviews, width=50,
+    annotations=[f"{count:,} reviews{' ⚠️ FUTURE!' if year > 2025 else ''}"
+                 for year, count in yearly_reviews.items()],
+    title="5. REVIEW TIMELINE (Reviews per Year)"
+))
 
-for year, count in yearly_reviews.items():
-    bar_length = int((count / yearly_reviews.max()) * 50)
-    bar = '█' * bar_length
-    marker = ' ⚠️ FUTURE!' if year > 2025 else ''
-    print(f"{year}: {bar} {count:,} reviews{marker}")
-
-print("\n6. PLATFORM DISTRIBUTION (Suspiciously Uniform!)")
-print("-" * 80)
 platform_dist = reviews['platform'].value_counts()
 expected = len(reviews) / len(platform_dist)
+deviation = ((platform_dist - expected) / expected) * 100
+show(bar_chart(
+    [f"{platform:15s}" for platform in platform_dist.index], platform_dist, width=50,
+    annotations=[f"{count:,} (expected {expected:.0f}, {dev:+.2f}% deviation)"
+                 for count, dev in zip(platform_dist, deviation)],
+    title="6. PLATFORM DISTRIBUTION (Suspiciously Uniform!)", top=MAX_ROWS
+))
+
+comment_freq = reviews['comment'].value_counts().head(8)
+comment_pct = (comment_freq / len(reviews)) * 100
+comment_sentiments = group_counts(reviews['comment'], reviews['sentiment']).reindex(comment_freq.index)
+comment_ratings = reviews.groupby('comment')['rating'].agg(['min', 'max']).reindex(comment_freq.index)
+sentiment_count = {
+    label: comment_sentiments[label] if label in comment_sentiments else pd.Series(0, index=comment_freq.index)
+    for label in ['Positive', 'Neutral', 'Negative']
+}
+show(bar_chart(
+    ["   Frequency"] * len(comment_freq), comment_pct, width=1, max_value=1, span=100,
+    headers=[f"\n{i}. '{comment}'" for i, comment in enumerate(comment_freq.index, 1)],
+    annotations=[
+        f"{count:,} times ({pct:.1f}%)\n"
+        f"   Sentiments: Pos:{pos} / Neu:{neu} / Neg:{neg}\n"
+        f"   Rating range: {low:.1f} - {high:.1f}"
+        for count, pct, pos, neu, neg, low, high in zip(
+            comment_freq, comment_pct, sentiment_count['Positive'], sentiment_count['Neutral'],
+            sentiment_count['Negative'], comment_ratings['min'], comment_ratings['max'])
+    ],
+    title="7. MOST COMMON REVIEW COMMENTS"
+))
 
-for platform, count in platform_dist.items():
-    bar_length = int((count / platform_dist.max()) * 50)
-    bar = '█' * bar_length
-    deviation = ((count - expected) / expected) * 100
-    print(f"{platform:15s}: {bar} {count:,} (expected {expected:.0f}, {deviation:+.2f}% deviation)")
-
-print("\n7. MOST COMMON REVIEW COMMENTS")
-print("-" * 80)
-from collections import Counter
-comment_freq = Counter(reviews['comment'])
-
-for i, (comment, count) in enumerate(comment_freq.most_common(8), 1):
-    pct = (count / len(reviews)) * 100
-    bar_length = int(pct)
-    bar = '█' * bar_length
-
-    # Get sentiment distribution for this comment
-    comment_reviews = reviews[reviews['comment'] == comment]
-    sentiment_counts = comment_reviews['sentiment'].value_counts()
-
-    print(f"\n{i}. '{comment}'")
-    print(f"   Frequency: {bar} {count:,} times ({pct:.1f}%)")
-    print(f"   Sentiments: Pos:{sentiment_counts.get('Positive', 0)} / Neu:{sentiment_counts.get('Neutral', 0)} / Neg:{sentiment_counts.get('Negative', 0)}")
-    print(f"   Rating range: {comment_reviews['rating'].min():.1f} - {comment_reviews['rating'].max():.1f}")
-
-print("\n8. BRAND PERFORMANCE COMPARISON")
-print("-" * 80)
 brand_reviews = reviews.merge(products[['product_id', 'brand']], on='product_id')
 brand_stats = brand_reviews.groupby('brand').agg({
     'rating': ['mean', 'count']
 })
 brand_stats.columns = ['avg_rating', 'review_count']
 brand_stats = brand_stats.sort_values('avg_rating', ascending=False)
-
-for brand, row in brand_stats.iterrows():
-    rating = row['avg_rating']
-    count = row['review_count']
-    bar_length = int((rating / 5) * 30)
-    bar = '█' * bar_length
-    print(f"{brand:25s}: {bar} {rating:.2f}/5.0 ({count:,} reviews)")
-
+show(bar_chart(
+    [f"{brand:25s}" for brand in brand_stats.index], brand_stats['avg_rating'], width=30, max_value=5,
+    annotations=[f"{rating:.2f}/5.0 ({float(count):,} reviews)"
+                 for rating, count in zip(brand_stats['avg_rating'], brand_stats['review_count'])],
+    title="8. BRAND PERFORMANCE COMPARISON", top=MAX_ROWS
+))
+
+profiler.section("9. quality scorecard")
 print("\n9. DATA QUALITY SCORE CARD")
 print("-" * 80)
 
-def print_score(category, score, max_score, issues):
-    pct = (score / max_score) * 100
-    if pct >= 80:
-        grade = "✅ PASS"
-    elif pct >= 50:
-        grade = "⚠️  WARN"
-    else:
-        grade = "❌ FAIL"
-
-    bar_length = int(pct / 2)
-    bar = '█' * bar_length
-    empty = '░' * (50 - bar_length)
-    print(f"{category:30s}: {bar}{empty} {pct:.0f}% {grade}")
-    if issues:
-        print(f"{'':32s}  └─ {issues}")
-
-# Calculate scores
-total_reviews = len(reviews)
-future_reviews = len(reviews[reviews['date'] > pd.Timestamp('2025-11-03')])
-pre_launch_reviews = len(reviews.merge(products[['product_id', 'launch_date']], on='product_id')[
-    reviews.merge(products[['product_id', 'launch_date']], on='product_id')['date'] <
-    reviews.merge(products[['product_id', 'launch_date']], on='product_id')['launch_date']
-])
-mismatched_sentiment = 992
-unique_comments = 8
+
+def score_chart(scores, issues, title=None):
+    """Progress-bar chart of percentage scores with PASS / WARN / FAIL grades"""
+    pct = pd.Series(scores, dtype=float)
+    grades = np.select([pct >= 80, pct >= 50], ["✅ PASS", "⚠️  WARN"], "❌ FAIL")
+    return bar_chart(
+        [f"{category:30s}" for category in pct.index], pct, width=1, max_value=2, span=50, fill='░',
+        annotations=[f"{p:.0f}% {grade}" + (f"\n{'':32s}  └─ {issue}" if issue else "")
+                     for p, grade, issue in zip(pct, grades, issues)],
+        title=title
+    )
+
+
+# Calculate scores from the shared (cached, incrementally updated) quality metrics
+quality = load_quality_metrics()
+total_reviews = quality.total_reviews
+future_reviews = quality.future_reviews
+pre_launch_reviews = quality.pre_launch_reviews
+mismatched_sentiment = quality.mismatched_sentiment
+unique_comments = quality.unique_comments
+platform_deviation = quality.platform_max_deviation
 
 temporal_score = max(0, 100 - (future_reviews + pre_launch_reviews) / total_reviews * 100)
 sentiment_score = max(0, 100 - (mismatched_sentiment / total_reviews * 100 * 10))
 uniqueness_score = min(100, (unique_comments / total_reviews * 100 * 1000))
-distribution_score = 20  # Artificially uniform
+# Real platforms differ by 10%+; a near-even split is artificial
+distribution_score = min(100, platform_deviation * 10)
 
 print()
-print_score("Temporal Integrity", temporal_score, 100, f"{future_reviews + pre_launch_reviews} impossible dates")
-print_score("Sentiment Accuracy", sentiment_score, 100, f"{mismatched_sentiment} mismatched labels")
-print_score("Content Uniqueness", uniqueness_score, 100, f"Only {unique_comments} unique comments")
-print_score("Distribution Naturalness", distribution_score, 100, "Too uniform, suspicious")
+show(score_chart(
+    {
+        "Temporal Integrity": temporal_score,
+        "Sentiment Accuracy": sentiment_score,
+        "Content Uniqueness": uniqueness_score,
+        "Distribution Naturalness": distribution_score,
+    },
+    [
+        f"{future_reviews + pre_launch_reviews} impossible dates",
+        f"{mismatched_sentiment} mismatched labels",
+        f"Only {unique_comments} unique comments",
+        "Too uniform, suspicious" if distribution_score < 50 else "",
+    ]
+), leading_newline=False)
 
 overall_score = (temporal_score + sentiment_score + uniqueness_score + distribution_score) / 4
 print("\n" + "=" * 80)
-print_score("OVERALL DATA QUALITY", overall_score, 100, "")
+show(score_chart({"OVERALL DATA QUALITY": overall_score}, [""]), leading_newline=False)
 print("=" * 80)
 
 if overall_score < 50:
@@ -188,21 +210,32 @@ if overall_score < 50:
 else:
     print("\n✅ VERDICT: DATA QUALITY ACCEPTABLE")
 
+profiler.section("10. anomalies summary")
 print("\n10. TOP ANOMALIES SUMMARY")
 print("-" * 80)
-print(f"🔴 Critical Issues Found: 10")
+rating_low, rating_high = quality.product_rating_range
+marketing_corr = quality.marketing_correlation
+print(f"🔴 Critical Issues Found: {len(quality.critical_issues)}")
 print(f"   1. Future-dated reviews: {future_reviews}")
 print(f"   2. Pre-launch reviews: {pre_launch_reviews}")
 print(f"   3. Sentiment mismatches: {mismatched_sentiment}")
-print(f"   4. Comment uniqueness: {unique_comments}/{total_reviews} (0.08%)")
-print(f"   5. Sequential IDs: 100% sequential (no gaps)")
-print(f"   6. Platform distribution: < 2% deviation (too perfect)")
-print(f"   7. Product review counts: Std = 21 (too uniform)")
-print(f"   8. Average ratings: 2.91-3.08 range (too narrow)")
-print(f"   9. Marketing ROI: Negative correlation (-0.21)")
-print(f"  10. Sales.csv: 100MB file in Git LFS (not analyzed)")
+print(f"   4. Comment uniqueness: {unique_comments}/{total_reviews} ({unique_comments / total_reviews * 100:.2f}%)")
+print(f"   5. Sequential IDs: {'100% sequential (no gaps)' if quality.sequential_ids else f'{quality.id_breaks} gaps'}")
+print(f"   6. Platform distribution: {platform_deviation:.2f}% max deviation"
+      f"{' (too perfect)' if platform_deviation < 2 else ''}")
+print(f"   7. Product review counts: Std = {quality.product_count_std:.0f}"
+      f"{' (too uniform)' if quality.product_count_std < 50 else ''}")
+print(f"   8. Average ratings: {rating_low:.2f}-{rating_high:.2f} range"
+      f"{' (too narrow)' if rating_high - rating_low < 0.3 else ''}")
+print(f"   9. Marketing ROI: {'Negative' if marketing_corr < 0 else 'Positive'} correlation ({marketing_corr:.2f})")
+print(f"  10. Sales.csv: {quality.sales_status}")
 
 print("\n" + "=" * 80)
 print("CONCLUSION: This is SYNTHETIC/SIMULATED data with intentional anomalies")
 print("Perfect for testing, training, and demonstrating data quality issues!")
 print("=" * 80)
+
+if args.html:
+    profiler.section("html export")
+    to_html(report_charts, args.html)
+    print(f"\n✓ Charts exported to {args.html}")